@@ -10,6 +10,8 @@ import { MagnifyingGlassIcon, CalendarIcon, MapPinIcon, VideoCameraIcon } from '
 const EventList = () => {
     const [events, setEvents] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [filters, setFilters] = useState({
         search: '',
         event_type: '',
@@ -41,18 +43,11 @@ const EventList = () => {
             setLoading(true);
             console.log('Fetching events with queryFilters:', queryFilters);
             
-            const data = await eventsAPI.getEvents(queryFilters);
-            console.log('Fetched events data:', data);
-            
-            if (Array.isArray(data)) {
-                setEvents(data);
-                console.log('Events set to:', data);
-            } else {
-                console.warn('Received non-array data:', data);
-                setEvents([]);
-            }
-            
-            if (!data || data.length === 0) {
+            const { results, next } = await eventsAPI.getEvents(queryFilters);
+            setEvents(results);
+            setNextPage(next);
+
+            if (results.length === 0) {
                 console.log('No events found');
                 // Only show toast for user-initiated searches
                 if (Object.values(queryFilters).some(val => val)) {
@@ -63,11 +58,28 @@ const EventList = () => {
             console.error('Failed to fetch events:', error);
             toast.error('Failed to load events. Please try again later.');
             setEvents([]);
+            setNextPage(null);
         } finally {
             setLoading(false);
         }
     };
 
+    const loadMoreEvents = async () => {
+        if (!nextPage) return;
+        try {
+            setLoadingMore(true);
+            // The next link already carries the filters of the first page
+            const { results, next } = await eventsAPI.getEvents({}, nextPage);
+            setEvents(prev => [...prev, ...results]);
+            setNextPage(next);
+        } catch (error) {
+            console.error('Failed to fetch more events:', error);
+            toast.error('Failed to load more events');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleFilterChange = (e) => {
         const { name, value } = e.target;
         console.log(`Filter changed: ${name} = ${value}`);
@@ -249,6 +261,18 @@ const EventList = () => {
                             </div>
                         </div>
                     ))}
+                    {nextPage && (
+                        <div className="flex justify-center md:col-span-2 lg:col-span-3">
+                            <button
+                                type="button"
+                                onClick={loadMoreEvents}
+                                disabled={loadingMore}
+                                className="bg-slate-700 text-slate-200 px-6 py-2 rounded-lg hover:bg-slate-600 transition-colors disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more events'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             ) : (
                 <div className="text-center py-8">
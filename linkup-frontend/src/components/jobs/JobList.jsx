@@ -8,7 +8,9 @@ import { MagnifyingGlassIcon } from '@heroicons/react/24/outline';
 
 const JobList = () => {
   const [jobs, setJobs] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     job_type: '',
     experience_level: '',
@@ -24,17 +26,34 @@ const JobList = () => {
   const fetchJobs = async () => {
     try {
       setLoading(true);
-      const data = await jobsAPI.getJobs(filters);
-      setJobs(Array.isArray(data) ? data : []);
+      const { results, next } = await jobsAPI.getJobs(filters);
+      setJobs(results);
+      setNextPage(next);
     } catch (error) {
       console.error('Failed to fetch jobs:', error);
       toast.error('Failed to load jobs');
       setJobs([]);
+      setNextPage(null);
     } finally {
       setLoading(false);
     }
   };
 
+  const loadMoreJobs = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const { results, next } = await jobsAPI.getJobs(filters, nextPage);
+      setJobs(prev => [...prev, ...results]);
+      setNextPage(next);
+    } catch (error) {
+      console.error('Failed to fetch more jobs:', error);
+      toast.error('Failed to load more jobs');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
     setFilters(prev => ({
@@ -181,6 +200,18 @@ const JobList = () => {
               </div>
             </div>
           ))}
+          {nextPage && (
+            <div className="flex justify-center">
+              <button
+                type="button"
+                onClick={loadMoreJobs}
+                disabled={loadingMore}
+                className="bg-slate-700 text-slate-200 px-6 py-2 rounded-lg hover:bg-slate-600 transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more jobs'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -75,7 +75,7 @@ const Navbar = () => {
                             >
                                 {user.profile_picture ? (
                                     <img
-                                        src={user.profile_picture}
+                                        src={user.avatar_thumbnail || user.profile_picture}
                                         alt={user.full_name || "User"}
                                         className="w-10 h-10 rounded-full object-cover border-4 border-blue-600"
                                     />
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { 
   PlusIcon, 
   FolderIcon, 
@@ -44,6 +44,8 @@ const ProjectCollaboration = () => {
   const [activeTab, setActiveTab] = useState('projects');
   const [showProjectForm, setShowProjectForm] = useState(false);
   const [projects, setProjects] = useState([]);
+  const [projectsNext, setProjectsNext] = useState(null);
+  const [loadingMoreProjects, setLoadingMoreProjects] = useState(false);
   const [userProjects, setUserProjects] = useState([]);
   const [workspaces, setWorkspaces] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -105,6 +107,8 @@ const ProjectCollaboration = () => {
     amount: '',
     note: ''
   });
+  // One key per opened contribution form, so a retried submit never pays twice
+  const contributionKey = useRef(null);
   const [completedFundingRequests, setCompletedFundingRequests] = useState([]);
 
   // Fetch projects on component mount
@@ -112,9 +116,10 @@ const ProjectCollaboration = () => {
     const loadData = async () => {
       setLoading(true);
       try {
-        // Fetch all projects for reference
-        const projectsData = await fetchProjects();
+        // Fetch the first page of projects; the rest load on demand
+        const { results: projectsData, next } = await fetchProjects();
         setProjects(projectsData);
+        setProjectsNext(next);
         
         // Fetch user's projects (both created and participated)
         const userProjectsData = await fetchUserProjects();
@@ -179,6 +184,21 @@ const ProjectCollaboration = () => {
     loadData();
   }, [currentUser]);
 
+  const loadMoreProjects = async () => {
+    if (!projectsNext) return;
+    setLoadingMoreProjects(true);
+    try {
+      const { results, next } = await fetchProjects({}, projectsNext);
+      setProjects(prevProjects => [...prevProjects, ...results]);
+      setProjectsNext(next);
+    } catch (error) {
+      console.error('Error fetching more projects:', error);
+      toast.error('Failed to load more projects');
+    } finally {
+      setLoadingMoreProjects(false);
+    }
+  };
+
   // Fetch user's join requests
   useEffect(() => {
     if (activeTab === 'request-status') {
@@ -750,7 +770,7 @@ const ProjectCollaboration = () => {
     e.preventDefault();
     try {
       setLoading(true);
-      await contributeToFunding(selectedFunding.id, contributionForm);
+      await contributeToFunding(selectedFunding.id, contributionForm, contributionKey.current);
       // Refresh funding requests
       const [allFunding, myFunding] = await Promise.all([
         fetchFundingRequests(),
@@ -1380,6 +1400,19 @@ const ProjectCollaboration = () => {
                       </div>
                     </div>
                     
+                    {projectsNext && (
+                      <div className="flex justify-center mt-6">
+                        <button
+                          type="button"
+                          onClick={loadMoreProjects}
+                          disabled={loadingMoreProjects}
+                          className="px-4 py-2 bg-slate-800 hover:bg-slate-700 text-slate-300 rounded-lg transition-colors disabled:opacity-50"
+                        >
+                          {loadingMoreProjects ? 'Loading...' : 'Load more projects'}
+                        </button>
+                      </div>
+                    )}
+                    
                     {projects.length === 0 && (
                       <div className="text-center text-slate-400 py-12">
                         No projects available.
@@ -2105,7 +2138,10 @@ const ProjectCollaboration = () => {
                         {(selectedFunding.progress_percentage || 0).toFixed(1)}% funded
                       </div>
                       <button
-                        onClick={() => setShowContributionForm(true)}
+                        onClick={() => {
+                          contributionKey.current = crypto.randomUUID();
+                          setShowContributionForm(true);
+                        }}
                         className="w-full bg-blue-600 text-white py-2 px-4 rounded-md hover:bg-blue-700 transition-colors"
                       >
                         Provide
@@ -11,7 +11,7 @@ const UserCard = ({ user: userProfile, onFollowChange }) => {
       <Link to={`/profile/${userProfile.id}`} className="flex items-center space-x-3 flex-1">
         {userProfile.profile_picture ? (
           <img
-            src={userProfile.profile_picture}
+            src={userProfile.avatar_thumbnail || userProfile.profile_picture}
             alt={userProfile.full_name}
             className="h-12 w-12 rounded-full object-cover"
           />
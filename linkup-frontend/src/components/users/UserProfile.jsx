@@ -93,7 +93,7 @@ const UserProfile = () => {
           <div className="flex items-center space-x-4">
             {user.profile_picture ? (
               <img
-                src={user.profile_picture}
+                src={user.avatar || user.profile_picture}
                 alt={`${user.first_name} ${user.last_name}`}
                 className="w-32 h-32 rounded-full object-cover border-4 border-blue-600"
               />
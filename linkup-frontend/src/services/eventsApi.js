@@ -1,45 +1,39 @@
 import { api } from './api';
 
 export const eventsAPI = {
-    // Get all events with optional filters
-    getEvents: async (filters = {}) => {
+    // Get one page of events with optional filters; pass `next` to fetch the following page
+    getEvents: async (filters = {}, next = null) => {
         try {
-            console.log('getEvents called with filters:', filters);
-            const queryParams = new URLSearchParams();
-            
-            // Only add non-empty filters
-            Object.entries(filters).forEach(([key, value]) => {
-                if (value !== null && value !== undefined && value !== '') {
-                    queryParams.append(key, value);
-                }
-            });
+            let url = next;
+            if (!url) {
+                const queryParams = new URLSearchParams();
+
+                // Only add non-empty filters
+                Object.entries(filters).forEach(([key, value]) => {
+                    if (value !== null && value !== undefined && value !== '') {
+                        queryParams.append(key, value);
+                    }
+                });
+
+                const queryString = queryParams.toString();
+                url = `/events/${queryString ? `?${queryString}` : ''}`;
+            }
 
-            const queryString = queryParams.toString();
-            const url = `/events/${queryString ? `?${queryString}` : ''}`;
-            console.log('Making request to:', url);
-            
             const response = await api.get(url);
-            console.log('Raw API response:', response);
-            
+
             // Check if response exists and has data
             if (!response || !response.data) {
                 console.warn('No data in response');
-                return [];
+                return { results: [], next: null };
             }
-            
-            // Handle both array and object responses
-            let events = [];
+
             if (Array.isArray(response.data)) {
-                events = response.data;
-            } else if (response.data.results && Array.isArray(response.data.results)) {
-                events = response.data.results;
-            } else if (typeof response.data === 'object') {
-                // If it's a single event object, wrap it in an array
-                events = [response.data];
+                return { results: response.data, next: null };
             }
-            
-            console.log('Processed events data:', events);
-            return events;
+            return {
+                results: Array.isArray(response.data.results) ? response.data.results : [],
+                next: response.data.next || null,
+            };
         } catch (error) {
             console.error('Error fetching events:', error);
             throw error;
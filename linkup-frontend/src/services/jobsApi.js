@@ -1,14 +1,21 @@
 import { api } from './api';
 
 export const jobsAPI = {
-  // Get all job postings
-  getJobs: async (filters = {}) => {
+  // Get a page of job postings as { results, next }. The list is paginated:
+  // pass the `next` URL of the previous page to load the following one.
+  getJobs: async (filters = {}, next = null) => {
     try {
-      const response = await api.get('/jobs/', { params: filters });
-      return Array.isArray(response.data) ? response.data : [];
+      const response = next
+        ? await api.get(next)
+        : await api.get('/jobs/', { params: filters });
+      if (Array.isArray(response.data)) return { results: response.data, next: null };
+      return {
+        results: Array.isArray(response.data?.results) ? response.data.results : [],
+        next: response.data?.next || null,
+      };
     } catch (error) {
       console.error('Error fetching jobs:', error);
-      return [];
+      return { results: [], next: null };
     }
   },
 
@@ -10,7 +10,8 @@ const getAuthHeader = () => {
 };
 
 // Project API functions
-export const fetchProjects = async (filters = {}) => {
+// Get one page of projects; pass `next` to fetch the following page
+export const fetchProjects = async (filters = {}, next = null) => {
   const queryParams = new URLSearchParams();
   
   // Add filters to query params
@@ -21,10 +22,11 @@ export const fetchProjects = async (filters = {}) => {
   if (filters.search) queryParams.append('search', filters.search);
   
   try {
-    const response = await axios.get(`${API_URL}/?${queryParams.toString()}`, {
+    // The next link already carries the filters of the first page
+    const response = await axios.get(next || `${API_URL}/?${queryParams.toString()}`, {
       headers: getAuthHeader()
     });
-    return response.data;
+    return { results: response.data.results, next: response.data.next || null };
   } catch (error) {
     throw error.response?.data || { detail: 'Failed to fetch projects' };
   }
@@ -120,12 +122,16 @@ export const fetchWorkspaceBySlug = async (workspaceSlug) => {
           // The last part is likely the project ID fragment
           const idFragment = slugParts[slugParts.length - 1];
           
-          // Try to find the full project ID by querying all projects
+          // Try to find the full project ID, stopping at the first page that has it
           try {
-            const projectsResponse = await fetchProjects();
-            const matchingProject = projectsResponse.find(project => 
-              project.id.includes(idFragment)
-            );
+            let matchingProject;
+            let page = { next: null };
+            do {
+              page = await fetchProjects({}, page.next);
+              matchingProject = page.results.find(project => 
+                project.id.includes(idFragment)
+              );
+            } while (!matchingProject && page.next);
             
             if (matchingProject) {
               data.project_id = matchingProject.id;
@@ -462,10 +468,14 @@ export const updateFundingStatus = async (fundingId, status) => {
   return response.data;
 };
 
-export const contributeToFunding = async (fundingId, contributionData) => {
+export const contributeToFunding = async (fundingId, contributionData, idempotencyKey = null) => {
   try {
+    // Replaying a request with the same key credits the funding request once
+    const payload = idempotencyKey
+      ? { ...contributionData, idempotency_key: idempotencyKey }
+      : contributionData;
     const response = await axios.post(`${API_URL}/funding/${fundingId}/contribute/`, 
-      contributionData,
+      payload,
       { headers: getAuthHeader() }
     );
     return response.data;
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from linkup_backend.caching import bump_model_version
+from linkup_backend.tasks import submit_on_commit
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+
+def _load_source(field):
+    largest = max(settings.AVATAR_SIZES)
+    with field.open('rb') as handle:
+        image = Image.open(handle)
+        # Let the JPEG decoder downscale while decoding large photos
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete avatar rendition %s', name)
+
+
+def render_avatar(user_id):
+    """
+    Build square WebP renditions of a user's profile picture, one per size in
+    AVATAR_SIZES, and publish them unless the picture changed meanwhile.
+    """
+    user = CustomUser.objects.filter(pk=user_id).only(
+        'id', 'profile_picture', 'avatar_renditions'
+    ).first()
+    if user is None:
+        return
+
+    storage = user.profile_picture.storage
+    previous = list((user.avatar_renditions or {}).get('sizes', {}).values())
+    source = user.profile_picture.name or ''
+
+    renditions = {}
+    if source:
+        try:
+            image = _load_source(user.profile_picture)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            logger.warning('Could not read profile picture %s for user %s', source, user_id)
+            return
+
+        token = hashlib.sha1(source.encode()).hexdigest()[:12]
+        sizes = {}
+        for size in sorted(settings.AVATAR_SIZES):
+            rendition = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            rendition.save(buffer, 'WEBP', quality=settings.AVATAR_WEBP_QUALITY, method=4)
+            name = f'avatars/{user_id}/{token}-{size}.webp'
+            if storage.exists(name):
+                storage.delete(name)
+            sizes[str(size)] = storage.save(name, ContentFile(buffer.getvalue()))
+        renditions = {'source': source, 'sizes': sizes}
+
+    # Queryset update: no save signals, and a no-op if the upload was replaced
+    current = Q(profile_picture=source)
+    if not source:
+        current |= Q(profile_picture__isnull=True)
+    published = CustomUser.objects.filter(current, pk=user_id).update(
+        avatar_renditions=renditions
+    )
+    new_files = set(renditions.get('sizes', {}).values())
+    if published:
+        # Cached listings embed avatar URLs
+        bump_model_version(CustomUser)
+        _delete_files(storage, [name for name in previous if name not in new_files])
+    else:
+        _delete_files(storage, new_files)
+
+
+def schedule_avatar_rendering(user_id):
+    """Render avatars in the background worker pool after the upload commits"""
+    submit_on_commit(render_avatar, user_id)
+
+
+def needs_rendering(user):
+    """True when the stored renditions were not made from the current picture"""
+    source = user.profile_picture.name or ''
+    renditions = user.avatar_renditions or {}
+    return renditions.get('source', '') != source
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Count, Q, Value
+from django.db.models.functions import Cast
+
+from .models import CustomUser
+
+# Query parameter -> model field for the exact-match directory filters
+DIRECTORY_FILTERS = {
+    'department': 'department',
+    'graduationYear': 'graduation_year',
+    'userType': 'user_type',
+}
+
+# Facet name -> (grouped field, filter parameter it ignores)
+DIRECTORY_FACETS = {
+    'department': ('department', 'department'),
+    'graduation_year': ('graduation_year', 'graduationYear'),
+    'user_type': ('user_type', 'userType'),
+    'skills': ('skills__name', None),
+}
+
+FACET_VERSION_KEY = 'directory:facets:version'
+
+
+def _new_version():
+    # Time based so an evicted version key never reuses old cache entries
+    return int(time.time() * 1000)
+
+
+def filter_directory(queryset, params, ignore=None):
+    """Apply the alumni directory search and filters from the query params"""
+    query = params.get('q', '')
+    if query:
+        queryset = queryset.filter(
+            Q(first_name__icontains=query) |
+            Q(last_name__icontains=query) |
+            Q(email__icontains=query) |
+            Q(username__icontains=query)
+        )
+
+    for param, field in DIRECTORY_FILTERS.items():
+        value = params.get(param, '')
+        # Apply filters only if they are not empty strings
+        if value and param != ignore:
+            queryset = queryset.filter(**{field: value})
+
+    return queryset
+
+
+def _facet_queryset(params, facet, field, ignore, exclude_user_id=None):
+    # Each facet ignores its own filter so the other options stay visible
+    queryset = filter_directory(CustomUser.objects.exclude(pk=exclude_user_id), params, ignore=ignore)
+    return (
+        queryset.filter(**{f'{field}__isnull': False})
+        .order_by()
+        .values_list(Value(facet, output_field=CharField()), Cast(field, CharField()))
+        .annotate(count=Count('id'))
+    )
+
+
+def compute_directory_facets(params, exclude_user_id=None):
+    """
+    Count directory members per department, graduation year, user type and
+    skill, leaving out `exclude_user_id` like the search results do. All
+    facets are grouped aggregates combined into a single query.
+    """
+    querysets = [
+        _facet_queryset(params, facet, field, ignore, exclude_user_id)
+        for facet, (field, ignore) in DIRECTORY_FACETS.items()
+    ]
+    rows = querysets[0].union(*querysets[1:], all=True)
+
+    facets = {facet: [] for facet in DIRECTORY_FACETS}
+    for facet, value, count in rows:
+        if value:
+            facets[facet].append({'value': value, 'count': count})
+
+    for facet, buckets in facets.items():
+        buckets.sort(key=lambda bucket: (-bucket['count'], bucket['value']))
+    facets['skills'] = facets['skills'][:settings.DIRECTORY_TOP_SKILLS]
+    return facets
+
+
+def _cache_key(params, exclude_user_id=None):
+    version = cache.get_or_set(FACET_VERSION_KEY, _new_version, timeout=None)
+    relevant = {
+        param: params.get(param, '')
+        for param in ('q', *DIRECTORY_FILTERS)
+    }
+    relevant['exclude'] = exclude_user_id
+    digest = hashlib.md5(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+    return f'directory:facets:{version}:{digest}'
+
+
+def get_directory_facets(params, exclude_user_id=None):
+    """Return facet counts for a filter combination, cached until users change"""
+    key = _cache_key(params, exclude_user_id)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_directory_facets(params, exclude_user_id)
+        cache.set(key, facets, settings.DIRECTORY_FACET_CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate_directory_facets():
+    """Drop every cached facet combination by moving to a new version"""
+    try:
+        cache.incr(FACET_VERSION_KEY)
+    except ValueError:
+        cache.set(FACET_VERSION_KEY, _new_version(), timeout=None)
@@ -0,0 +1,30 @@
+from linkup_backend.exports import Export
+from .directory import filter_directory
+from .models import CustomUser
+
+
+def directory_export(params):
+    """The member directory, filtered like the directory search (q, department, graduationYear, userType)"""
+    queryset = filter_directory(CustomUser.objects.filter(is_active=True), params)
+    queryset = queryset.order_by('id').only(
+        'id', 'first_name', 'last_name', 'email', 'user_type', 'graduation_year',
+        'department', 'current_position', 'company', 'location', 'linkedin_profile',
+    )
+    return Export(
+        'directory',
+        ['User', 'Name', 'Email', 'Type', 'Graduation year', 'Department',
+         'Position', 'Company', 'Location', 'LinkedIn'],
+        queryset,
+        lambda user: (
+            user.pk,
+            user.get_full_name(),
+            user.email,
+            user.user_type,
+            user.graduation_year,
+            user.department,
+            user.current_position,
+            user.company,
+            user.location,
+            user.linkedin_profile,
+        ),
+    )
@@ -6,10 +6,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from social_django.utils import load_strategy, load_backend
 from social_core.exceptions import MissingBackend, AuthTokenError, AuthForbidden
-from .serializers import UserSerializer
+from .serializers import UserSerializer, CustomTokenObtainPairSerializer
 
 User = get_user_model()
 
@@ -39,7 +38,7 @@ def google_auth(request):
             
             if user:
                 # Generate JWT tokens for the user
-                refresh = RefreshToken.for_user(user)
+                refresh = CustomTokenObtainPairSerializer.get_token(user)
                 user_data = UserSerializer(user).data
                 
                 # Return the tokens and user data
@@ -0,0 +1,39 @@
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenClaimsUser
+
+# Claims embedded at token issue by CustomTokenObtainPairSerializer.get_token
+USER_CLAIMS = ('user_type', 'is_staff')
+
+
+class TokenClaimsUserMixin:
+    """
+    Build request.user from the token claims instead of loading the user row.
+    Tokens issued before the claims existed fall back to the database lookup.
+    The user is not re-checked for is_active, so a deactivated account keeps
+    access until its access token expires.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        claims = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        claims[api_settings.USER_ID_FIELD] = user_id
+        return TokenClaimsUser.from_claims(claims)
+
+
+class ClaimsJWTAuthentication(TokenClaimsUserMixin, JWTAuthentication):
+    pass
+
+
+class ClaimsJWTCookieAuthentication(TokenClaimsUserMixin, JWTCookieAuthentication):
+    pass
@@ -0,0 +1,314 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.validators import validate_email
+from django.db import connections, transaction
+
+from authentication.directory import invalidate_directory_facets
+from authentication.models import CustomUser
+from authentication.skills import UserSkill, clean_skill_names, get_skill_ids
+
+# Optional profile columns copied straight onto the user
+PROFILE_FIELDS = (
+    'first_name', 'last_name', 'bio', 'department', 'current_position',
+    'company', 'location', 'linkedin_profile', 'github_profile', 'website',
+)
+
+MAX_REPORTED_ERRORS = 20
+
+
+def _init_worker():
+    # Spawned workers (macOS/Windows) start without configured apps
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def _split(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class Command(BaseCommand):
+    help = 'Bulk import alumni accounts from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or JSONL file to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (defaults to the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows validated and inserted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes used to hash passwords (default: CPU count)',
+        )
+        parser.add_argument(
+            '--unusable-passwords',
+            action='store_true',
+            help='Ignore supplied passwords and require a password set on first login',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Checkpoint file (defaults to <path>.checkpoint)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the rows already imported according to the checkpoint',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            self.stderr.write(self.style.ERROR(f'File not found: {path}'))
+            return
+
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        chunk_size = max(1, options['chunk_size'])
+        self.unusable_passwords = options['unusable_passwords']
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+
+        start_row = 0
+        if options['resume']:
+            start_row = self.read_checkpoint(path)
+            self.stdout.write(f'Resuming after row {start_row}')
+
+        self.stats = {'rows': start_row, 'created': 0, 'skipped': 0}
+        self.reported_errors = 0
+        started = time.monotonic()
+
+        pool = None
+        if not self.unusable_passwords and options['workers'] > 1:
+            # Forked workers must not inherit open database connections
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker)
+        self.pool = pool
+        self.workers = options['workers']
+
+        try:
+            rows = itertools.islice(self.read_rows(path, fmt), start_row, None)
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                self.stats['rows'] = chunk[-1][0]
+                self.write_checkpoint(path)
+
+                elapsed = time.monotonic() - started
+                processed = self.stats['rows'] - start_row
+                self.stdout.write(
+                    f"{self.stats['rows']} rows read, {self.stats['created']} created, "
+                    f"{self.stats['skipped']} skipped ({processed / elapsed:.0f} rows/s)"
+                )
+        finally:
+            if pool:
+                pool.shutdown()
+            if self.stats['created']:
+                invalidate_directory_facets()
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['created']} alumni in {elapsed:.1f}s "
+            f"({self.stats['created'] / elapsed if elapsed else 0:.0f} users/s), "
+            f"{self.stats['skipped']} rows skipped"
+        ))
+
+    def read_rows(self, path, fmt):
+        """Yield (row number, row dict) pairs without loading the whole file"""
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            if fmt == 'csv':
+                yield from enumerate(csv.DictReader(handle), start=1)
+                return
+
+            row_number = 0
+            for line in handle:
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = None
+                yield row_number, row
+
+    def read_checkpoint(self, path):
+        try:
+            with open(self.checkpoint_path) as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get('source') != os.path.abspath(path):
+            self.stdout.write(self.style.WARNING('Checkpoint belongs to another file, starting over'))
+            return 0
+        return checkpoint.get('rows', 0)
+
+    def write_checkpoint(self, path):
+        checkpoint = {'source': os.path.abspath(path), 'rows': self.stats['rows']}
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(checkpoint, handle)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def skip(self, row_number, reason):
+        self.stats['skipped'] += 1
+        if self.reported_errors < MAX_REPORTED_ERRORS:
+            self.stderr.write(self.style.WARNING(f'Row {row_number}: {reason}'))
+        elif self.reported_errors == MAX_REPORTED_ERRORS:
+            self.stderr.write(self.style.WARNING('Further row errors are not shown'))
+        self.reported_errors += 1
+
+    def validate_row(self, row):
+        """Return (user fields, password, skill names) for a row or raise ValidationError"""
+        if not isinstance(row, dict):
+            raise ValidationError('row is not a JSON object')
+
+        email = CustomUser.objects.normalize_email(str(row.get('email') or '').strip())
+        if not email:
+            raise ValidationError('email is required')
+        validate_email(email)
+
+        fields = {'email': email, 'username': str(row.get('username') or '').strip()}
+        for name in PROFILE_FIELDS:
+            value = str(row.get(name) or '').strip()
+            max_length = CustomUser._meta.get_field(name).max_length
+            if max_length and len(value) > max_length:
+                raise ValidationError(f'{name} is longer than {max_length} characters')
+            fields[name] = value
+
+        user_type = str(row.get('user_type') or CustomUser.UserType.ALUMNI).strip().upper()
+        if user_type not in CustomUser.UserType.values:
+            raise ValidationError(f'unknown user_type "{user_type}"')
+        fields['user_type'] = user_type
+
+        graduation_year = str(row.get('graduation_year') or '').strip()
+        try:
+            fields['graduation_year'] = int(graduation_year) if graduation_year else None
+        except ValueError:
+            raise ValidationError(f'invalid graduation_year "{graduation_year}"')
+
+        skills = row.get('skills') or []
+        if isinstance(skills, str):
+            skills = re.split(r'[;,|]', skills)
+        password = '' if self.unusable_passwords else str(row.get('password') or '')
+        return fields, password, clean_skill_names(skills)
+
+    def import_chunk(self, chunk):
+        valid = []
+        for row_number, row in chunk:
+            try:
+                valid.append((row_number, *self.validate_row(row)))
+            except ValidationError as e:
+                self.skip(row_number, '; '.join(e.messages))
+
+        for _, fields, _, _ in valid:
+            if not fields['username']:
+                fields['username'] = fields['email'].split('@')[0][:140]
+                # Fallback when the derived username is already in use
+                fields['alternate_username'] = '{}-{}'.format(
+                    fields['username'],
+                    hashlib.sha1(fields['email'].encode()).hexdigest()[:8],
+                )
+
+        emails = {fields['email'] for _, fields, _, _ in valid}
+        usernames = set()
+        for _, fields, _, _ in valid:
+            usernames.add(fields['username'])
+            if 'alternate_username' in fields:
+                usernames.add(fields['alternate_username'])
+        taken_emails = set(
+            CustomUser.objects.filter(email__in=emails).values_list('email', flat=True)
+        )
+        taken_usernames = set(
+            CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True)
+        )
+
+        accepted = []
+        for row_number, fields, password, skills in valid:
+            alternate = fields.pop('alternate_username', None)
+            if fields['email'] in taken_emails:
+                self.skip(row_number, f'{fields["email"]} already exists')
+                continue
+            if fields['username'] in taken_usernames and alternate:
+                fields['username'] = alternate
+            if fields['username'] in taken_usernames:
+                self.skip(row_number, f'username {fields["username"]} already exists')
+                continue
+            taken_emails.add(fields['email'])
+            taken_usernames.add(fields['username'])
+            accepted.append((fields, password, skills))
+
+        if not accepted:
+            return
+
+        hashes = self.hash_passwords([password for _, password, _ in accepted])
+        users = [
+            CustomUser(password=password_hash, **fields)
+            for (fields, _, _), password_hash in zip(accepted, hashes)
+        ]
+
+        with transaction.atomic():
+            users = CustomUser.objects.bulk_create(users)
+            if any(user.pk is None for user in users):
+                # Backends that cannot return ids from a bulk insert
+                ids = dict(
+                    CustomUser.objects.filter(email__in=[user.email for user in users])
+                    .values_list('email', 'id')
+                )
+                for user in users:
+                    user.pk = ids[user.email]
+
+            skill_ids = get_skill_ids(
+                itertools.chain.from_iterable(skills for _, _, skills in accepted)
+            )
+            UserSkill.objects.bulk_create(
+                [
+                    UserSkill(customuser_id=user.pk, skill_id=skill_ids[name])
+                    for user, (_, _, skills) in zip(users, accepted)
+                    for name in skills if name in skill_ids
+                ],
+                batch_size=5000,
+                ignore_conflicts=True,
+            )
+
+        self.stats['created'] += len(users)
+
+    def hash_passwords(self, passwords):
+        # Blank passwords become unusable ones, to be set on first login
+        usable = [password for password in passwords if password]
+        if self.pool and len(usable) > 1:
+            hashed = list(itertools.chain.from_iterable(
+                self.pool.map(_hash_passwords, _split(usable, self.workers))
+            ))
+        else:
+            hashed = _hash_passwords(usable)
+
+        hashed = iter(hashed)
+        return [next(hashed) if password else make_password(None) for password in passwords]
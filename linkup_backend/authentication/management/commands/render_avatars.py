@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from authentication.avatars import needs_rendering, render_avatar
+from authentication.models import CustomUser
+
+
+def _render(user_id):
+    try:
+        render_avatar(user_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Generate avatar renditions for profile pictures that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of worker threads (default: 4)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate renditions even when they are up to date',
+        )
+
+    def handle(self, *args, **options):
+        users = (
+            CustomUser.objects.exclude(profile_picture='')
+            .exclude(profile_picture__isnull=True)
+            .only('id', 'profile_picture', 'avatar_renditions')
+        )
+        user_ids = [
+            user.pk for user in users.iterator(chunk_size=2000)
+            if options['all'] or needs_rendering(user)
+        ]
+        if not user_ids:
+            self.stdout.write(self.style.SUCCESS('All avatars are up to date'))
+            return
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for done, _ in enumerate(executor.map(_render, user_ids), start=1):
+                if done % 500 == 0:
+                    self.stdout.write(f'{done}/{len(user_ids)} users processed')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered avatars for {len(user_ids)} users in {elapsed:.1f}s'
+        ))
@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import models, router
 from django.utils.translation import gettext_lazy as _
 
 class CustomUserManager(BaseUserManager):
@@ -59,6 +59,8 @@ class CustomUser(AbstractUser):
     github_profile = models.URLField(max_length=200, blank=True)
     website = models.URLField(max_length=200, blank=True)
     skills = models.ManyToManyField(Skill, related_name='users', blank=True)
+    # WebP renditions of profile_picture: {'source': <upload name>, 'sizes': {'64': <path>, ...}}
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -66,6 +68,60 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.email
 
+    def avatar_url(self, size):
+        """
+        URL of the smallest avatar rendition covering `size` pixels. Falls back
+        to the original upload until the renditions have been generated.
+        """
+        if not self.profile_picture:
+            return None
+
+        renditions = self.avatar_renditions or {}
+        sizes = renditions.get('sizes') or {}
+        if sizes and renditions.get('source') == self.profile_picture.name:
+            available = sorted(int(width) for width in sizes)
+            width = next((width for width in available if width >= size), available[-1])
+            return self.profile_picture.storage.url(sizes[str(width)])
+
+        return self.profile_picture.url
+
+class TokenClaimsUser(CustomUser):
+    """
+    Request user built from signed JWT claims without touching the database.
+    Only the claimed fields are set; reading any other field loads the rest
+    of the row in a single query. Claim values may be older than the row, so
+    saving never writes one back unless it was changed or named in
+    update_fields.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, claims):
+        # from_db expects values in concrete field order
+        fields = [field.attname for field in cls._meta.concrete_fields if field.attname in claims]
+        user = cls.from_db(router.db_for_read(cls), fields, [claims[name] for name in fields])
+        user._claims = dict(claims)
+        return user
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        if update_fields is None and not force_insert:
+            claims = getattr(self, '_claims', {})
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and not (field.attname in claims and getattr(self, field.attname) == claims[field.attname])
+            ]
+        super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.intersection(fields):
+            fields = deferred.union(fields)
+        super().refresh_from_db(using=using, fields=fields)
+
 class UserFollowing(models.Model):
     user = models.ForeignKey(CustomUser, related_name='following_relationships', on_delete=models.CASCADE)
     following_user = models.ForeignKey(CustomUser, related_name='follower_relationships', on_delete=models.CASCADE)
@@ -1,10 +1,43 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import UserFollowing, FollowRequest, CustomUser, Skill, Notification
+from .skills import set_user_skills
 
 User = get_user_model()
 
+# Avatar widths used by the nested user serializers in lists, feeds and chat,
+# and by profile pages; renditions are generated for exactly these
+LIST_AVATAR_SIZE = settings.AVATAR_LIST_SIZE
+PROFILE_AVATAR_SIZE = settings.AVATAR_PROFILE_SIZE
+
+class AvatarField(serializers.Field):
+    """Read-only URL of the user's avatar rendition that best fits `size` pixels"""
+
+    def __init__(self, size, **kwargs):
+        self.size = size
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        url = user.avatar_url(self.size)
+        request = self.context.get('request')
+        if url and request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Claims read by ClaimsJWTAuthentication to build request.user without a query
+        token['user_type'] = user.user_type
+        token['is_staff'] = user.is_staff
+        return token
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
@@ -49,6 +82,9 @@ class UserSerializer(serializers.ModelSerializer):
     following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     follow_request_sent = serializers.SerializerMethodField()
+    # Renditions of profile_picture for the profile page and directory cards
+    avatar = AvatarField(size=PROFILE_AVATAR_SIZE)
+    avatar_thumbnail = AvatarField(size=LIST_AVATAR_SIZE)
     skills = SkillSerializer(many=True, read_only=True)
     skill_names = serializers.ListField(
         child=serializers.CharField(),
@@ -60,7 +96,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = [
             'id', 'email', 'username', 'password', 'first_name', 'last_name',
-            'user_type', 'profile_picture', 'bio', 'graduation_year',
+            'user_type', 'profile_picture', 'avatar', 'avatar_thumbnail', 'bio', 'graduation_year',
             'department', 'current_position', 'company', 'location',
             'linkedin_profile', 'github_profile', 'website', 'skills',
             'skill_names', 'full_name', 'follower_count', 'following_count',
@@ -111,13 +147,8 @@ class UserSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save()
 
-        # Add skills
-        for skill_name in skill_names:
-            skill, _ = Skill.objects.get_or_create(
-                name=skill_name,
-                defaults={'category': 'TECH'}
-            )
-            user.skills.add(skill)
+        if skill_names:
+            set_user_skills(user, skill_names)
 
         return user
 
@@ -131,14 +162,9 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             instance.set_password(password)
 
+        instance.save()
+
         if skill_names is not None:
-            instance.skills.clear()
-            for skill_name in skill_names:
-                skill, _ = Skill.objects.get_or_create(
-                    name=skill_name,
-                    defaults={'category': 'TECH'}
-                )
-                instance.skills.add(skill)
+            set_user_skills(instance, skill_names)
 
-        instance.save()
         return instance
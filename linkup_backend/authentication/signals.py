@@ -0,0 +1,55 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from linkup_backend.caching import bump_model_version
+from .avatars import needs_rendering, schedule_avatar_rendering
+from .directory import invalidate_directory_facets
+from .models import CustomUser, Skill, TokenClaimsUser
+from .skills import invalidate_skill_catalogue
+
+# Fields that never show up in the directory facets or cached listings
+NON_DIRECTORY_FIELDS = {'last_login', 'password'}
+
+
+# Save signals are sent for the instance's own class, and request.user is a
+# TokenClaimsUser on JWT requests, so user receivers listen for both
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=TokenClaimsUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= NON_DIRECTORY_FIELDS:
+        return
+    invalidate_directory_facets()
+    # Names and avatars are embedded in cached catalogue responses; bumped
+    # as CustomUser since proxy saves would otherwise stamp their own label
+    bump_model_version(CustomUser)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=TokenClaimsUser)
+def render_avatar_on_upload(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    # An unloaded picture was not changed by this save
+    if 'profile_picture' in instance.get_deferred_fields():
+        return
+    if needs_rendering(instance):
+        schedule_avatar_rendering(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=TokenClaimsUser)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_directory_facets()
+    bump_model_version(CustomUser)
+
+
+@receiver(m2m_changed, sender=CustomUser.skills.through)
+def user_skills_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_directory_facets()
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    invalidate_skill_catalogue()
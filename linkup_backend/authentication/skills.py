@@ -0,0 +1,103 @@
+import threading
+
+from django.db import IntegrityError, transaction
+
+from .directory import invalidate_directory_facets
+from .models import CustomUser, Skill
+
+UserSkill = CustomUser.skills.through
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_skill_catalogue():
+    """Return the process-wide skill name -> id map, loading it on first use"""
+    global _catalogue
+    catalogue = _catalogue
+    if catalogue is None:
+        with _catalogue_lock:
+            if _catalogue is None:
+                _catalogue = dict(Skill.objects.values_list('name', 'id'))
+            catalogue = _catalogue
+    return catalogue
+
+
+def invalidate_skill_catalogue():
+    global _catalogue
+    with _catalogue_lock:
+        _catalogue = None
+
+
+def clean_skill_names(names):
+    """Strip and de-duplicate skill names, keeping their first-seen order"""
+    cleaned = {}
+    for name in names or []:
+        name = str(name).strip()
+        if name:
+            cleaned.setdefault(name, None)
+    return list(cleaned)
+
+
+def get_skill_ids(names, category='TECH'):
+    """
+    Resolve skill names to ids, creating missing skills with a single
+    bulk insert. Returns a name -> id dict.
+    """
+    names = clean_skill_names(names)
+    catalogue = get_skill_catalogue()
+    missing = [name for name in names if name not in catalogue]
+
+    if missing:
+        # bulk_create skips post_save, so the catalogue is updated here
+        Skill.objects.bulk_create(
+            [Skill(name=name, category=category) for name in missing],
+            ignore_conflicts=True,
+        )
+        created = dict(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+        with _catalogue_lock:
+            if _catalogue is not None:
+                _catalogue.update(created)
+        catalogue = {**catalogue, **created}
+
+    return {name: catalogue[name] for name in names if name in catalogue}
+
+
+def _apply_user_skills(user, names, replace):
+    wanted = set(get_skill_ids(names).values())
+    current = set(
+        UserSkill.objects.filter(customuser_id=user.pk).values_list('skill_id', flat=True)
+    )
+
+    to_add = wanted - current
+    if to_add:
+        UserSkill.objects.bulk_create(
+            [UserSkill(customuser_id=user.pk, skill_id=skill_id) for skill_id in to_add],
+            ignore_conflicts=True,
+        )
+
+    to_remove = current - wanted if replace else set()
+    if to_remove:
+        UserSkill.objects.filter(customuser_id=user.pk, skill_id__in=to_remove).delete()
+
+    return bool(to_add or to_remove)
+
+
+def set_user_skills(user, names, replace=True):
+    """
+    Bring a user's skills in line with the given names using one insert and
+    one delete on the through table, whatever the number of skills.
+    With replace=False existing skills are kept and only new ones are added.
+    """
+    try:
+        with transaction.atomic():
+            changed = _apply_user_skills(user, names, replace)
+    except IntegrityError:
+        # Another process deleted a skill this process still had cached
+        invalidate_skill_catalogue()
+        with transaction.atomic():
+            changed = _apply_user_skills(user, names, replace)
+
+    if changed:
+        # Through-table bulk writes bypass m2m_changed
+        invalidate_directory_facets()
@@ -1,3 +1,406 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import skills
+from .avatars import render_avatar
+from .directory import get_directory_facets
+from .jwt_auth import ClaimsJWTAuthentication
+from .models import Skill, TokenClaimsUser
+from .serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(email=f'{name}@example.com', username=name, password='pass', **fields)
+
+
+def access_token(user):
+    return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+
+def image_upload(name='avatar.png', size=(300, 200)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 40, 40)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+def run_in_foreground(func, *args, **kwargs):
+    # Stands in for linkup_backend.tasks.submit so queued work runs inline
+    func(*args, **kwargs)
+
+
+class TemporaryMediaMixin:
+    """Keep uploads and generated files out of the project's MEDIA_ROOT"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+def buckets(facets, facet):
+    return {bucket['value']: bucket['count'] for bucket in facets[facet]}
+
+
+class DirectoryFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = make_user('viewer', department='CSE', graduation_year=2020)
+        self.python = Skill.objects.create(name='Python', category='TECH')
+        for i, (department, year) in enumerate([('CSE', 2020), ('CSE', 2021), ('ECE', 2021)]):
+            make_user(f'alumnus{i}', department=department, graduation_year=year).skills.add(self.python)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def search(self, **params):
+        return self.client.get('/api/auth/search/', {'facets': '1', **params})
+
+    def test_facets_count_the_directory_without_the_viewer(self):
+        facets = self.search().data['facets']
+
+        self.assertEqual(buckets(facets, 'department'), {'CSE': 2, 'ECE': 1})
+        self.assertEqual(buckets(facets, 'graduation_year'), {'2020': 1, '2021': 2})
+        self.assertEqual(buckets(facets, 'skills'), {'Python': 3})
+
+    def test_facets_ignore_their_own_filter(self):
+        response = self.search(department='CSE', graduationYear='2021')
+
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(buckets(response.data['facets'], 'department'), {'CSE': 1, 'ECE': 1})
+        self.assertEqual(buckets(response.data['facets'], 'graduation_year'), {'2020': 1, '2021': 1})
+
+    def test_facets_are_served_from_the_cache(self):
+        get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+        with self.assertNumQueries(0):
+            get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+    def test_user_changes_invalidate_the_facets(self):
+        get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+        make_user('newcomer', department='MECH')
+
+        facets = get_directory_facets({}, exclude_user_id=self.viewer.pk)
+        self.assertEqual(buckets(facets, 'department'), {'CSE': 2, 'ECE': 1, 'MECH': 1})
+
+    def test_skill_changes_invalidate_the_facets(self):
+        get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+        User.objects.get(username='alumnus0').skills.remove(self.python)
+
+        facets = get_directory_facets({}, exclude_user_id=self.viewer.pk)
+        self.assertEqual(buckets(facets, 'skills'), {'Python': 2})
+
+    def test_logins_keep_the_cached_facets(self):
+        get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+        self.viewer.save(update_fields=['last_login'])
+
+        with self.assertNumQueries(0):
+            get_directory_facets({}, exclude_user_id=self.viewer.pk)
+
+
+class ClaimsAuthenticationTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = make_user('member', user_type='STUDENT', department='CSE')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(self.user)}')
+
+    def test_user_is_built_from_the_claims(self):
+        token = AccessToken(access_token(self.user))
+
+        with self.assertNumQueries(0):
+            user = ClaimsJWTAuthentication().get_user(token)
+            self.assertEqual((user.pk, user.user_type, user.is_staff), (self.user.pk, 'STUDENT', False))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.department, 'CSE')
+            self.assertEqual(user.email, self.user.email)
+        self.assertIsInstance(user, TokenClaimsUser)
+
+    def test_tokens_without_claims_load_the_user(self):
+        token = AccessToken.for_user(self.user)
+
+        user = ClaimsJWTAuthentication().get_user(token)
+
+        self.assertNotIsInstance(user, TokenClaimsUser)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_stale_claims_are_never_written_back(self):
+        user = ClaimsJWTAuthentication().get_user(AccessToken(access_token(self.user)))
+        User.objects.filter(pk=self.user.pk).update(user_type='ALUMNI')
+
+        user.first_name = 'Asha'
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.user_type), ('Asha', 'ALUMNI'))
+
+    def test_profile_update_refreshes_the_directory_facets(self):
+        viewer = make_user('viewer')
+        get_directory_facets({}, exclude_user_id=viewer.pk)
+
+        response = self.client.patch('/api/auth/me/', {'department': 'ECE'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        facets = get_directory_facets({}, exclude_user_id=viewer.pk)
+        self.assertEqual(buckets(facets, 'department'), {'ECE': 1})
+
+    def test_profile_picture_upload_queues_avatar_rendering(self):
+        with mock.patch('linkup_backend.tasks.submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    '/api/auth/me/', {'profile_picture': image_upload()}, format='multipart'
+                )
+
+        self.assertEqual(response.status_code, 200)
+        submit.assert_called_once()
+        self.assertEqual(submit.call_args.args[1], self.user.pk)
+
+
+class SkillCatalogueTests(TestCase):
+    def setUp(self):
+        # The catalogue outlives each test's rolled back transaction
+        skills.invalidate_skill_catalogue()
+        self.addCleanup(skills.invalidate_skill_catalogue)
+        cache.clear()
+        self.user = make_user('member')
+        Skill.objects.create(name='Python', category='TECH')
+
+    def user_skills(self):
+        return sorted(self.user.skills.values_list('name', flat=True))
+
+    def test_names_are_cleaned_in_order(self):
+        self.assertEqual(skills.clean_skill_names([' Go ', 'Rust', '', 'Go', None]), ['Go', 'Rust', 'None'])
+
+    def test_missing_skills_are_created_in_bulk(self):
+        ids = skills.get_skill_ids(['Python', 'Go', ' Rust ', 'Go'])
+
+        self.assertEqual(list(ids), ['Python', 'Go', 'Rust'])
+        self.assertEqual(ids, dict(Skill.objects.values_list('name', 'id')))
+
+    def test_known_skills_resolve_from_the_catalogue(self):
+        skills.get_skill_ids(['Python', 'Go'])
+
+        with self.assertNumQueries(0):
+            ids = skills.get_skill_ids(['Go', 'Python'])
+        self.assertEqual(set(ids), {'Go', 'Python'})
+
+    def test_saving_a_skill_reloads_the_catalogue(self):
+        skills.get_skill_catalogue()
+
+        Skill.objects.create(name='Go', category='TECH')
+
+        self.assertIn('Go', skills.get_skill_catalogue())
+
+    def test_set_user_skills_replaces_or_adds(self):
+        skills.set_user_skills(self.user, ['Python', 'Go'])
+        skills.set_user_skills(self.user, ['Go', 'Rust'])
+        self.assertEqual(self.user_skills(), ['Go', 'Rust'])
+
+        skills.set_user_skills(self.user, ['Python'], replace=False)
+        self.assertEqual(self.user_skills(), ['Go', 'Python', 'Rust'])
+
+    def test_set_user_skills_cost_does_not_grow_with_the_skills(self):
+        other = make_user('other')
+        for user in (self.user, other):
+            skills.set_user_skills(user, ['Python'])
+        few = [f'Skill {i}' for i in range(3)]
+        many = [f'Skill {i}' for i in range(3, 40)]
+        skills.get_skill_ids(few + many)
+
+        # Read the current skills, insert the new ones and delete the rest, in a savepoint
+        with self.assertNumQueries(3 + 2):
+            skills.set_user_skills(self.user, few)
+        with self.assertNumQueries(3 + 2):
+            skills.set_user_skills(other, many)
+        self.assertEqual(other.skills.count(), len(many))
+
+    def test_skill_changes_refresh_the_directory_facets(self):
+        viewer = make_user('viewer')
+        get_directory_facets({}, exclude_user_id=viewer.pk)
+
+        skills.set_user_skills(self.user, ['Python'])
+
+        facets = get_directory_facets({}, exclude_user_id=viewer.pk)
+        self.assertEqual(buckets(facets, 'skills'), {'Python': 1})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportAlumniTests(TestCase):
+    header = 'email,username,first_name,graduation_year,department,skills,password\n'
+
+    def setUp(self):
+        skills.invalidate_skill_catalogue()
+        self.addCleanup(skills.invalidate_skill_catalogue)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_alumni', path, workers=1, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_rows_become_users_with_skills(self):
+        path = self.write('alumni.csv', self.header + (
+            'asha@example.com,asha,Asha,2019,CSE,"Python; Go",secret-1\n'
+            'ravi@example.com,,Ravi,,ECE,,\n'
+        ))
+
+        self.run_import(path)
+
+        asha = User.objects.get(email='asha@example.com')
+        self.assertEqual((asha.username, asha.graduation_year, asha.user_type), ('asha', 2019, 'ALUMNI'))
+        self.assertTrue(asha.check_password('secret-1'))
+        self.assertEqual(sorted(asha.skills.values_list('name', flat=True)), ['Go', 'Python'])
+        ravi = User.objects.get(email='ravi@example.com')
+        self.assertEqual(ravi.username, 'ravi')
+        self.assertFalse(ravi.has_usable_password())
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_invalid_and_duplicate_rows_are_skipped(self):
+        make_user('taken')
+        path = self.write('alumni.csv', self.header + (
+            'not-an-email,,,,,,\n'
+            'taken@example.com,,,,,,\n'
+            'new@example.com,,,twenty,,,\n'
+            'dup@example.com,,,,,,\n'
+            'dup@example.com,,,,,,\n'
+        ))
+
+        _, errors = self.run_import(path, chunk_size=2)
+
+        self.assertEqual(User.objects.filter(email='dup@example.com').count(), 1)
+        self.assertFalse(User.objects.filter(email='new@example.com').exists())
+        self.assertEqual(errors.count('Row '), 4)
+
+    def test_clashing_derived_username_gets_a_suffix(self):
+        make_user('asha')
+        path = self.write('alumni.csv', self.header + 'asha@alumni.example.com,,,,,,\n')
+
+        self.run_import(path)
+
+        imported = User.objects.get(email='asha@alumni.example.com')
+        self.assertTrue(imported.username.startswith('asha-'))
+
+    def test_json_lines(self):
+        rows = [
+            {'email': 'asha@example.com', 'skills': ['Python'], 'user_type': 'student'},
+            'not an object',
+        ]
+        path = self.write('alumni.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n')
+
+        _, errors = self.run_import(path)
+
+        self.assertEqual(User.objects.get(email='asha@example.com').user_type, 'STUDENT')
+        self.assertEqual(errors.count('Row '), 2)
+
+    def test_resume_skips_the_checkpointed_rows(self):
+        path = self.write('alumni.csv', self.header + ''.join(
+            f'member{i}@example.com,,,,,,\n' for i in range(5)
+        ))
+        self.write('alumni.csv.checkpoint', json.dumps({'source': os.path.abspath(path), 'rows': 3}))
+
+        self.run_import(path, resume=True)
+
+        self.assertEqual(
+            sorted(User.objects.values_list('email', flat=True)),
+            ['member3@example.com', 'member4@example.com']
+        )
+
+    def test_inserts_are_batched_per_chunk(self):
+        path = self.write('alumni.csv', self.header + ''.join(
+            f'member{i}@example.com,,,,,Python,\n' for i in range(40)
+        ))
+        skills.get_skill_ids(['Python'])
+
+        # Per chunk: existing emails, existing usernames, then the user and
+        # skill inserts inside a transaction
+        with self.assertNumQueries(6):
+            self.run_import(path, chunk_size=100)
+        self.assertEqual(User.objects.filter(skills__name='Python').count(), 40)
+
+
+@mock.patch('linkup_backend.tasks.submit', run_in_foreground)
+class AvatarTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('member')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token(self.user)}')
+
+    def upload(self, picture):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch('/api/auth/me/', {'profile_picture': picture}, format='multipart')
+
+    def rendition_size(self, url):
+        self.user.refresh_from_db()
+        name = url.split(settings.MEDIA_URL, 1)[1]
+        with self.user.profile_picture.storage.open(name) as handle:
+            image = Image.open(handle)
+            return image.format, image.size
+
+    def test_upload_is_served_as_profile_and_list_renditions(self):
+        self.upload(image_upload())
+
+        data = self.client.get('/api/auth/me/').data
+        self.assertEqual(self.rendition_size(data['avatar']), ('WEBP', (256, 256)))
+        self.assertEqual(self.rendition_size(data['avatar_thumbnail']), ('WEBP', (64, 64)))
+        self.user.refresh_from_db()
+        self.assertEqual(sorted(self.user.avatar_renditions['sizes']), ['256', '64'])
+
+    def test_replacing_the_picture_drops_the_old_renditions(self):
+        self.upload(image_upload('first.png'))
+        self.user.refresh_from_db()
+        old = list(self.user.avatar_renditions['sizes'].values())
+
+        self.upload(image_upload('second.png', size=(120, 400)))
+
+        self.user.refresh_from_db()
+        storage = self.user.profile_picture.storage
+        self.assertEqual(self.user.avatar_renditions['source'], self.user.profile_picture.name)
+        self.assertFalse(any(storage.exists(name) for name in old))
+
+    def test_original_is_served_until_renditions_exist(self):
+        with mock.patch('linkup_backend.tasks.submit'):
+            self.upload(image_upload())
+
+        data = self.client.get('/api/auth/me/').data
+        self.assertTrue(data['avatar'].endswith('.png'))
+
+    def test_unreadable_picture_is_left_unrendered(self):
+        name = default_storage.save('profile_pictures/broken.png', ContentFile(b'not an image'))
+        User.objects.filter(pk=self.user.pk).update(profile_picture=name)
+
+        render_avatar(self.user.pk)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_renditions, {})
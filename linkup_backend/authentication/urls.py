@@ -14,6 +14,7 @@ from .views import (
     get_notifications,
     mark_notification_read,
     get_follow_request_status,
+    export_directory,
 )
 from .google_auth import google_auth
 
@@ -28,6 +29,7 @@ urlpatterns = [
     path('followers/<int:user_id>/', get_followers, name='user-followers'),
     path('following/<int:user_id>/', get_following, name='user-following'),
     path('search/', SearchUsersView.as_view(), name='search-users'),
+    path('directory/export/', export_directory, name='export-directory'),
     path('follow-request/handle/', handle_follow_request, name='handle-follow-request'),
     path('follow-request/status/<int:user_id>/', get_follow_request_status, name='follow-request-status'),
     path('notifications/', get_notifications, name='get-notifications'),
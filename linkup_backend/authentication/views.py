@@ -1,19 +1,25 @@
+import logging
 from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from .serializers import UserSerializer, UserRegistrationSerializer
+from .serializers import UserSerializer, UserRegistrationSerializer, CustomTokenObtainPairSerializer
 from .models import UserFollowing, FollowRequest, Notification, CustomUser, Skill
+from .directory import filter_directory, get_directory_facets
+from .exports import directory_export
+from linkup_backend.exports import export_response
+from .skills import set_user_skills
 from django.shortcuts import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 import json
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class CustomTokenObtainPairView(TokenObtainPairView):
+    serializer_class = CustomTokenObtainPairSerializer
+
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
         if response.status_code == 200:
@@ -34,17 +40,11 @@ class RegisterView(generics.CreateAPIView):
             skills_data = request.data.get('skills')
             if skills_data:
                 try:
-                    skills_list = json.loads(skills_data)
-                    for skill_name in skills_list:
-                        skill, _ = Skill.objects.get_or_create(
-                            name=skill_name,
-                            defaults={'category': 'TECH'}  # Default category
-                        )
-                        user.skills.add(skill)
+                    set_user_skills(user, json.loads(skills_data))
                 except json.JSONDecodeError:
                     pass  # Skip if skills data is invalid
 
-            refresh = RefreshToken.for_user(user)
+            refresh = CustomTokenObtainPairSerializer.get_token(user)
             return Response({
                 'user': UserSerializer(user).data,
                 'access': str(refresh.access_token),
@@ -138,7 +138,6 @@ def follow_user(request):
             to_user=user_to_follow,
             status='PENDING'
         )
-        print(f"Created follow request: {follow_request.id}")
 
         # Create notification for the target user
         notification = Notification.objects.create(
@@ -146,11 +145,10 @@ def follow_user(request):
             title='New Follow Request',
             message=f'{request.user.get_full_name()} wants to follow you. Request ID: {follow_request.id}'
         )
-        print(f"Created notification: {notification.id} for user: {user_to_follow.id}")
 
         return Response({'status': 'follow_request_sent'})
     except Exception as e:
-        print(f"Error in follow_user: {str(e)}")
+        logger.exception("Error in follow_user")
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
@@ -218,13 +216,7 @@ def handle_follow_request(request):
 @permission_classes([permissions.IsAuthenticated])
 def get_notifications(request):
     try:
-        print(f"Fetching notifications for user: {request.user.id} ({request.user.email})")
         notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-        print(f"Found {notifications.count()} notifications")
-        
-        # Debug: Print each notification
-        for notif in notifications:
-            print(f"Notification {notif.id}: {notif.title} - {notif.message} - Created at: {notif.created_at}")
         
         # Add pagination
         paginator = PageNumberPagination()
@@ -232,7 +224,6 @@ def get_notifications(request):
         paginated_notifications = paginator.paginate_queryset(notifications, request)
         
         if paginated_notifications is None:
-            print("No notifications after pagination")
             return Response({
                 'results': [],
                 'next': None,
@@ -250,15 +241,11 @@ def get_notifications(request):
             } for n in paginated_notifications],
             'next': paginator.get_next_link(),
             'previous': paginator.get_previous_link(),
-            'count': notifications.count()
+            'count': paginator.page.paginator.count
         }
-        print(f"Returning {len(data['results'])} notifications")
-        print(f"Response data: {data}")
-        
         return Response(data)
     except Exception as e:
-        print(f"Error fetching notifications: {str(e)}")
-        print(f"Full error details: ", e.__dict__)
+        logger.exception("Error fetching notifications")
         return Response(
             {'error': f'Failed to fetch notifications: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -336,34 +323,24 @@ class SearchUsersView(generics.ListAPIView):
     pagination_class = PageNumberPagination
 
     def get_queryset(self):
-        query = self.request.query_params.get('q', '')
-        department = self.request.query_params.get('department', '')
-        graduation_year = self.request.query_params.get('graduationYear', '')
-        user_type = self.request.query_params.get('userType', '')
-
         # Start with all users except the current user
         queryset = User.objects.exclude(id=self.request.user.id)
+        queryset = filter_directory(queryset, self.request.query_params)
+        return queryset.order_by('first_name', 'last_name')
 
-        # Apply search query if provided
-        if query:
-            queryset = queryset.filter(
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(email__icontains=query) |
-                Q(username__icontains=query)
-            )
-
-        # Apply filters only if they are not empty strings
-        if department:
-            queryset = queryset.filter(department=department)
-        
-        if graduation_year:
-            queryset = queryset.filter(graduation_year=graduation_year)
-        
-        if user_type:
-            queryset = queryset.filter(user_type=user_type)
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets', '').lower() not in ('1', 'true'):
+            return response
 
-        return queryset.order_by('first_name', 'last_name')
+        # Facet counts cover the whole directory for the active filters,
+        # without the requesting user just like the results
+        facets = get_directory_facets(request.query_params, exclude_user_id=request.user.pk)
+        if isinstance(response.data, list):
+            response.data = {'results': response.data, 'facets': facets}
+        else:
+            response.data['facets'] = facets
+        return response
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -386,3 +363,9 @@ def get_follow_request_status(request, user_id):
         return Response({'status': 'following' if is_following else 'none'})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_directory(request):
+    """Download the member directory as CSV/XLSX, with the directory search filters"""
+    return export_response(request, directory_export, request.query_params.dict())
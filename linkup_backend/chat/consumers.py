@@ -1,3 +1,4 @@
+import logging
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
@@ -7,6 +8,7 @@ from .serializers import MessageSerializer
 import base64
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -14,21 +16,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.room_group_name = f'chat_{self.room_id}'
         self.user = self.scope['user']
 
-        print(f"[WebSocket] Connection attempt from user {self.user} for room {self.room_id}")
-
         if self.user.is_anonymous:
-            print(f"[WebSocket] Anonymous user rejected")
             await self.close()
             return
 
         # Check if user can participate in this chat
         if not await self.can_participate():
-            print(f"[WebSocket] User {self.user.id} cannot participate in room {self.room_id}")
             await self.close()
             return
 
-        print(f"[WebSocket] User {self.user.id} connecting to room {self.room_id}")
-
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -36,10 +32,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
-        print(f"[WebSocket] User {self.user.id} connected to room {self.room_id}")
 
     async def disconnect(self, close_code):
-        print(f"[WebSocket] User {self.user.id} disconnecting from room {self.room_id}, code: {close_code}")
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -52,10 +46,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             message_type = text_data_json.get('type')
             message_data = text_data_json.get('message', {})
             
-            print(f"[WebSocket] Received {message_type} from user {self.user.id} in room {self.room_id}")
-            
             if message_type == 'connection_test':
-                print(f"[WebSocket] Connection test received from user {self.user.id}")
                 await self.send(text_data=json.dumps({
                     'type': 'connection_test_response',
                     'message': {'content': 'Connection successful'}
@@ -65,7 +56,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # Save message to database
             message = await self.save_message(message_data)
             if not message:
-                print(f"[WebSocket] Failed to save message from user {self.user.id}")
+                logger.warning("Failed to save chat message from user %s", self.user.id)
                 await self.send(text_data=json.dumps({
                     'type': 'error',
                     'message': 'Failed to save message'
@@ -74,7 +65,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
             # Get serialized message data
             message_data = await self.get_message_data(message)
-            print(f"[WebSocket] Broadcasting message: {message_data}")
 
             # Send message to room group
             await self.channel_layer.group_send(
@@ -85,13 +75,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 }
             )
         except json.JSONDecodeError:
-            print(f"[WebSocket] Invalid JSON received: {text_data}")
+            logger.info("Invalid JSON received from user %s", self.user.id)
             await self.send(text_data=json.dumps({
                 'type': 'error',
                 'message': 'Invalid message format'
             }))
         except Exception as e:
-            print(f"[WebSocket] Error processing message: {str(e)}")
+            logger.exception("Error processing message")
             await self.send(text_data=json.dumps({
                 'type': 'error',
                 'message': 'Internal server error'
@@ -99,7 +89,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def chat_message(self, event):
         message = event['message']
-        print(f"[WebSocket] Sending message to client: {message}")
 
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
@@ -139,7 +128,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
             return message
         except Exception as e:
-            print(f"[WebSocket] Error saving message: {str(e)}")
+            logger.exception("Error saving message")
             return None
 
     @database_sync_to_async
@@ -1,3 +1,4 @@
+import logging
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -8,10 +9,12 @@ from .models import ChatRoom, Message
 from .serializers import ChatRoomSerializer, MessageSerializer
 from django.contrib.auth import get_user_model
 from authentication.models import UserFollowing
+from authentication.serializers import LIST_AVATAR_SIZE
 from django.http import Http404
 from django.core.exceptions import PermissionDenied
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class MessagePagination(PageNumberPagination):
     page_size = 50
@@ -52,10 +55,6 @@ class ChatRoomListCreateView(generics.ListCreateAPIView):
             if other_user.id == self.request.user.id:
                 raise PermissionDenied("You cannot message yourself")
 
-            # Debug logging
-            print(f"[ChatRoom Debug] Current user: {self.request.user.id} ({self.request.user.email})")
-            print(f"[ChatRoom Debug] Other user: {other_user.id} ({other_user.email})")
-
             # Get or create chat room
             chat_room = ChatRoom.objects.filter(
                 (Q(user1=self.request.user) & Q(user2=other_user)) |
@@ -63,7 +62,6 @@ class ChatRoomListCreateView(generics.ListCreateAPIView):
             ).first()
 
             if chat_room:
-                print(f"[ChatRoom Debug] Found existing chat room: {chat_room.id}")
                 return chat_room
 
             # Check if either user follows the other
@@ -78,12 +76,9 @@ class ChatRoomListCreateView(generics.ListCreateAPIView):
                 ).exists()
             )
 
-            print(f"[ChatRoom Debug] Can message: {can_message}")
-            
             if not can_message:
                 raise PermissionDenied("You can only message users who follow you or who you follow")
 
-            print(f"[ChatRoom Debug] Creating new chat room for users")
             chat_room = ChatRoom.objects.create(
                 user1=self.request.user,
                 user2=other_user
@@ -100,13 +95,13 @@ class ChatRoomListCreateView(generics.ListCreateAPIView):
                 return Response(serializer.data)
             return super().get(request, *args, **kwargs)
         except Http404 as e:
-            print(f"[ChatRoom Error] HTTP 404: {str(e)}")
+            logger.info("Chat room not found: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except PermissionDenied as e:
-            print(f"[ChatRoom Error] Permission Denied: {str(e)}")
+            logger.info("Chat room permission denied: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
         except Exception as e:
-            print(f"[ChatRoom Error] Unexpected error: {str(e)}")
+            logger.exception("Error opening chat room")
             return Response(
                 {"error": "Failed to get chat room: " + str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -144,7 +139,7 @@ class MessageListCreateView(generics.ListCreateAPIView):
                 
             return Message.objects.filter(room=room).order_by('-created_at')
         except Exception as e:
-            print(f"[ChatRoom Error] Error getting messages: {str(e)}")
+            logger.exception("Error getting messages")
             return Message.objects.none()
 
     def perform_create(self, serializer):
@@ -183,7 +178,7 @@ class MessageListCreateView(generics.ListCreateAPIView):
             serializer.save(room=room, sender=self.request.user)
             room.save()  # Update the room's updated_at timestamp
         except Exception as e:
-            print(f"[ChatRoom Error] Error creating message: {str(e)}")
+            logger.exception("Error creating message")
             raise serializers.ValidationError(str(e))
 
     def list(self, request, *args, **kwargs):
@@ -238,7 +233,7 @@ def mark_messages_read(request, room_id):
         return Response({'status': 'success'})
         
     except Exception as e:
-        print(f"[ChatRoom Error] Error marking messages as read: {str(e)}")
+        logger.exception("Error marking messages as read")
         return Response(
             {'error': f'Failed to mark messages as read: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -264,7 +259,7 @@ def get_messageable_users(request):
         'id': user.id,
         'full_name': user.get_full_name(),
         'email': user.email,
-        'profile_picture': user.profile_picture.url if user.profile_picture else None
+        'profile_picture': user.avatar_url(LIST_AVATAR_SIZE)
     } for user in messageable_users]
 
     return Response(data)
@@ -275,5 +270,5 @@ def get_user_data(user):
         'email': user.email,
         'first_name': user.first_name,
         'last_name': user.last_name,
-        'profile_picture': user.profile_picture.url if user.profile_picture else None
+        'profile_picture': user.avatar_url(LIST_AVATAR_SIZE)
     }
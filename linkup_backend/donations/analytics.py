@@ -0,0 +1,188 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Count, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, TruncHour
+from django.utils import timezone
+
+from events.models import Donation as EventDonation
+from .models import CohortRollup, DonationHourlyRollup, DonorTotal, LedgerEntry
+
+# Rollup target id of general donations without a campaign
+GENERAL_FUND = 0
+
+# Cohort of donors without a graduation year
+UNKNOWN_COHORT = 0
+
+
+def increment(model, keys, deltas, values=None):
+    """
+    Add `deltas` to the rollup row identified by `keys`, and set `values` on
+    it, creating the row on first use. Returns True when this call created it.
+    """
+    values = values or {}
+    changes = dict(values, **{field: F(field) + amount for field, amount in deltas.items()})
+    rows = model.objects.filter(**keys)
+    if rows.update(**changes):
+        return False
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas, **values)
+    except IntegrityError:
+        # A concurrent first entry created the row
+        rows.update(**changes)
+        return False
+    return True
+
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_entry(entry, anonymous=False):
+    """
+    Fold a new ledger entry into the hourly, donor and cohort rollups, inside
+    the ledger's transaction. A donor counts towards the cohort of their
+    graduation year at the time of their first donation to the target.
+    """
+    keys = {'source': entry.source, 'target_id': entry.target_id or GENERAL_FUND}
+    increment(DonationHourlyRollup, dict(keys, hour=_hour(entry.created_at)), {'amount': entry.amount, 'count': 1})
+
+    # Opening balances have no contributor to rank
+    if entry.contributor_id is None:
+        return
+    values = {'last_donated_at': entry.created_at}
+    if anonymous:
+        values['anonymous'] = True
+    first = increment(
+        DonorTotal,
+        dict(keys, contributor_id=entry.contributor_id),
+        {'amount': entry.amount, 'count': 1},
+        values,
+    )
+    cohort = get_user_model().objects.filter(pk=entry.contributor_id).values_list('graduation_year', flat=True).first()
+    increment(
+        CohortRollup,
+        dict(keys, graduation_year=cohort or UNKNOWN_COHORT),
+        {'amount': entry.amount, 'count': 1, 'donors': int(first)},
+    )
+
+
+def donor_count(source, target_id):
+    return CohortRollup.objects.filter(source=source, target_id=target_id).aggregate(
+        donors=Sum('donors'))['donors'] or 0
+
+
+def with_donor_counts(queryset, source):
+    """Annotate each target in `queryset` with its `donor_count`, read from the cohort rollups"""
+    donors = (
+        CohortRollup.objects.filter(source=source, target_id=OuterRef('pk'))
+        .values('target_id')
+        .annotate(total=Sum('donors'))
+        .values('total')
+    )
+    return queryset.annotate(donor_count=Coalesce(Subquery(donors), 0))
+
+
+def leaderboard(source, target_id, limit):
+    """The top donors of a target, largest total first"""
+    return (
+        DonorTotal.objects.filter(source=source, target_id=target_id)
+        .select_related('contributor')
+        .order_by('-amount', 'last_donated_at')[:limit]
+    )
+
+
+def prune_hourly(before):
+    """Drop hourly rollups older than `before`; the daily rollups keep the history"""
+    return DonationHourlyRollup.objects.filter(hour__lt=before).delete()[0]
+
+
+def _start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_hourly(since=None, until=None):
+    """Recompute the hourly rollups of days in [since, until), within the retention period, from the ledger"""
+    horizon = timezone.localdate() - timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+    since = horizon if since is None else max(since, horizon)
+    entries = LedgerEntry.objects.filter(created_at__gte=_start(since))
+    rollups = DonationHourlyRollup.objects.filter(hour__gte=_start(since))
+    if until is not None:
+        entries = entries.filter(created_at__lt=_start(until))
+        rollups = rollups.filter(hour__lt=_start(until))
+
+    rows = (
+        entries.values('source', target=Coalesce('target_id', GENERAL_FUND), slot=TruncHour('created_at'))
+        .annotate(total=Sum('amount'), entries=Count('id'))
+        .order_by()
+    )
+    fresh = [
+        DonationHourlyRollup(
+            source=row['source'], target_id=row['target'], hour=row['slot'],
+            amount=row['total'], count=row['entries'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        DonationHourlyRollup.objects.bulk_create(fresh, batch_size=1000)
+    return len(fresh)
+
+
+def rebuild_donors():
+    """
+    Recompute donor totals and cohort rollups from the whole ledger, placing
+    donors in the cohort of their current graduation year. Credits landing
+    meanwhile may be miscounted, so run it while donations are quiet.
+    """
+    entries = LedgerEntry.objects.filter(contributor__isnull=False)
+    target = Coalesce('target_id', GENERAL_FUND)
+    anonymous_refs = (
+        EventDonation.objects.filter(is_anonymous=True)
+        .annotate(ref=Cast('pk', CharField()))
+        .values('ref')
+    )
+
+    donors = (
+        entries.values('source', 'contributor_id', target=target)
+        .annotate(
+            total=Sum('amount'),
+            entries=Count('id'),
+            last=Max('created_at'),
+            hidden=Max(Case(
+                When(source='event_donation', reference__in=anonymous_refs, then=Value(1)),
+                default=Value(0),
+            )),
+        )
+        .order_by()
+    )
+    cohorts = (
+        entries.values('source', target=target, cohort=Coalesce('contributor__graduation_year', UNKNOWN_COHORT))
+        .annotate(total=Sum('amount'), entries=Count('id'), people=Count('contributor_id', distinct=True))
+        .order_by()
+    )
+
+    fresh_donors = [
+        DonorTotal(
+            source=row['source'], target_id=row['target'], contributor_id=row['contributor_id'],
+            amount=row['total'], count=row['entries'], anonymous=bool(row['hidden']),
+            last_donated_at=row['last'],
+        )
+        for row in donors.iterator(chunk_size=2000)
+    ]
+    fresh_cohorts = [
+        CohortRollup(
+            source=row['source'], target_id=row['target'], graduation_year=row['cohort'],
+            amount=row['total'], count=row['entries'], donors=row['people'],
+        )
+        for row in cohorts
+    ]
+    with transaction.atomic():
+        DonorTotal.objects.all().delete()
+        CohortRollup.objects.all().delete()
+        DonorTotal.objects.bulk_create(fresh_donors, batch_size=1000)
+        CohortRollup.objects.bulk_create(fresh_cohorts, batch_size=1000)
+    return len(fresh_donors), len(fresh_cohorts)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class DonationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'donations'
+
+    def ready(self):
+        try:
+            import donations.signals
+        except ImportError:
+            pass
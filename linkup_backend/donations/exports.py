@@ -0,0 +1,28 @@
+from linkup_backend.exports import Export
+from .models import Donation
+
+
+def donations_export(campaign_id=None, status=None):
+    queryset = Donation.objects.select_related('donor', 'campaign').order_by('id')
+    if campaign_id:
+        queryset = queryset.filter(campaign_id=campaign_id)
+    if status:
+        queryset = queryset.filter(status=status)
+    return Export(
+        'donations',
+        ['Donation', 'Donor', 'Email', 'Campaign', 'Amount', 'Currency', 'Status',
+         'Razorpay order', 'Razorpay payment', 'Created at'],
+        queryset,
+        lambda donation: (
+            donation.pk,
+            donation.donor.get_full_name(),
+            donation.donor.email,
+            donation.campaign.title if donation.campaign else '',
+            donation.amount,
+            donation.currency,
+            donation.status,
+            donation.razorpay_order_id,
+            donation.razorpay_payment_id,
+            donation.created_at,
+        ),
+    )
@@ -0,0 +1,196 @@
+import logging
+import random
+import threading
+import time
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class GatewayError(Exception):
+    """The gateway rejected a request or could not be reached"""
+
+
+class GatewayUnavailable(GatewayError):
+    """The gateway is timing out or failing; callers should answer 503"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds; then lets a single trial call through, closing
+    again when it succeeds.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning('Payment gateway circuit opened after %d failures', self.failures)
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(
+    settings.PAYMENT_GATEWAY_BREAKER_THRESHOLD,
+    settings.PAYMENT_GATEWAY_BREAKER_RESET,
+)
+
+
+class TimeoutSession(requests.Session):
+    """Session applying the gateway timeouts to requests that set none (the SDK never does)"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', (
+            settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT,
+            settings.PAYMENT_GATEWAY_READ_TIMEOUT,
+        ))
+        return super().request(method, url, **kwargs)
+
+
+def build_session():
+    session = TimeoutSession()
+    # Retries are handled per operation below, where idempotency is known
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.PAYMENT_GATEWAY_POOL_SIZE,
+        max_retries=0,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_client():
+    """
+    The Razorpay client shared by every payment view, built on first use
+    rather than at import. Its pooled session enforces connect/read timeouts
+    so a slow gateway cannot hold every request worker.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not settings.RAZORPAY_KEY_ID or not settings.RAZORPAY_KEY_SECRET:
+                    raise GatewayUnavailable('Payment system is not properly configured')
+                _client = razorpay.Client(
+                    session=build_session(),
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    base_url=settings.PAYMENT_GATEWAY_URL,
+                )
+    return _client
+
+
+def reset():
+    """Drop the shared client and close the circuit, e.g. after changing gateway settings"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+    breaker.record_success()
+
+
+def is_configured():
+    return bool(settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET)
+
+
+def _retryable(exc, idempotent):
+    # Connection errors (including connect timeouts) mean the gateway almost
+    # certainly never processed the call; an unpaid duplicate order is harmless
+    # anyway. Read timeouts and server errors are retried only when idempotent.
+    if isinstance(exc, requests.ConnectionError):
+        return True
+    return idempotent and isinstance(exc, (requests.Timeout, razorpay.errors.ServerError))
+
+
+def _call(operation, func, *args, idempotent=False, **kwargs):
+    if not breaker.allow():
+        raise GatewayUnavailable('Payment gateway is temporarily unavailable')
+
+    attempts = 1 + settings.PAYMENT_GATEWAY_RETRIES
+    for attempt in range(attempts):
+        try:
+            result = func(*args, **kwargs)
+        except (razorpay.errors.BadRequestError, razorpay.errors.GatewayError) as e:
+            # The gateway answered and declined; retrying would not help
+            breaker.record_success()
+            raise GatewayError(str(e)) from e
+        except (requests.RequestException, razorpay.errors.ServerError) as e:
+            if attempt + 1 < attempts and _retryable(e, idempotent):
+                # Full jitter keeps retries from many workers from arriving in lockstep
+                time.sleep(random.uniform(0, settings.PAYMENT_GATEWAY_BACKOFF * 2 ** attempt))
+                continue
+            breaker.record_failure()
+            logger.warning('Payment gateway %s failed after %d attempts: %s', operation, attempt + 1, e)
+            raise GatewayUnavailable('Payment gateway did not respond') from e
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+
+def create_order(amount, currency, receipt=None, notes=None, **extra):
+    """Create an order for `amount` in the currency's smallest unit"""
+    data = dict(extra, amount=amount, currency=currency, notes=notes or {})
+    if receipt:
+        data['receipt'] = receipt
+    return _call('order.create', get_client().order.create, data=data)
+
+
+def fetch_payment(payment_id):
+    return _call('payment.fetch', get_client().payment.fetch, payment_id, idempotent=True)
+
+
+def fetch_order_payments(order_id):
+    """Every payment attempt made against an order"""
+    return _call('order.payments', get_client().order.payments, order_id, idempotent=True)
+
+
+def verify_payment_signature(params):
+    """
+    Check the checkout signature locally (HMAC, no network call). Raises
+    razorpay.errors.SignatureVerificationError when it does not match.
+    """
+    return get_client().utility.verify_payment_signature(params)
@@ -0,0 +1,199 @@
+import hashlib
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGateway(ThreadingHTTPServer):
+    """
+    In-memory stand-in for the Razorpay orders and payments API, with
+    configurable latency and failure rate. `POST /v1/stub/pay` plays the
+    checkout: it pays an order and returns the ids and signature the frontend
+    would post to verify_payment. With `webhook_url` set it also delivers a
+    signed `payment.captured` webhook there, as the dashboard webhook would.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, key_secret, latency=0.0, jitter=0.0, error_rate=0.0,
+                 webhook_url=None, webhook_secret=''):
+        super().__init__(address, _StubHandler)
+        self.key_secret = key_secret
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.orders = {}
+        self.payments = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def sign(self, order_id, payment_id):
+        message = f'{order_id}|{payment_id}'.encode()
+        return hmac.new(self.key_secret.encode(), message, hashlib.sha256).hexdigest()
+
+    def send_webhook(self, event, payment):
+        """POST a signed webhook for `payment`; returns the HTTP status, or None when it could not be sent"""
+        body = json.dumps({
+            'entity': 'event',
+            'event': event,
+            'contains': ['payment'],
+            'payload': {'payment': {'entity': payment}},
+            'created_at': int(time.time()),
+        }).encode()
+        request = urllib.request.Request(self.webhook_url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'X-Razorpay-Event-Id': f'evt_{uuid.uuid4().hex[:14]}',
+            'X-Razorpay-Signature': hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest(),
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return None
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up after their read timeout are part of the simulation
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def start(self):
+        """Serve from a daemon thread; returns the thread"""
+        thread = threading.Thread(target=self.serve_forever, name='gateway-stub', daemon=True)
+        thread.start()
+        return thread
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients reuse pooled connections as they would with Razorpay
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, code, description):
+        self._send(status, {'error': {'code': code, 'description': description}})
+
+    def _simulate(self):
+        """Apply the configured latency; returns False when this call should fail"""
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            self._error(503, 'SERVER_ERROR', 'Simulated gateway failure')
+            return False
+        return True
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_POST(self):
+        body = self._body()
+        if self.path.rstrip('/') == '/v1/stub/pay':
+            return self._pay(body)
+        if self.path.rstrip('/') != '/v1/orders':
+            return self._error(404, 'BAD_REQUEST_ERROR', 'The requested URL was not found on the server.')
+        if not self._simulate():
+            return
+        amount = body.get('amount')
+        if not isinstance(amount, int) or amount < 100:
+            return self._error(400, 'BAD_REQUEST_ERROR', 'Order amount less than minimum amount allowed')
+
+        order = {
+            'id': f'order_{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': amount,
+            'amount_paid': 0,
+            'amount_due': amount,
+            'currency': body.get('currency', 'INR'),
+            'receipt': body.get('receipt'),
+            'status': 'created',
+            'attempts': 0,
+            'notes': body.get('notes') or {},
+            'created_at': int(time.time()),
+        }
+        with self.server.lock:
+            self.server.orders[order['id']] = order
+        self._send(200, order)
+
+    def _pay(self, body):
+        with self.server.lock:
+            order = self.server.orders.get(body.get('order_id'))
+            if order is None:
+                return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+            payment = {
+                'id': f'pay_{uuid.uuid4().hex[:14]}',
+                'entity': 'payment',
+                'amount': order['amount'],
+                'currency': order['currency'],
+                'status': 'captured',
+                'order_id': order['id'],
+                'method': body.get('method', 'upi'),
+                'email': body.get('email', 'donor@example.com'),
+                'contact': body.get('contact', '+919999999999'),
+                'created_at': int(time.time()),
+            }
+            self.server.payments[payment['id']] = payment
+            order.update(status='paid', amount_paid=order['amount'], amount_due=0, attempts=1)
+        if self.server.webhook_url:
+            # Delivered after the response, like the real gateway's async webhooks
+            threading.Thread(
+                target=self.server.send_webhook, args=('payment.captured', dict(payment)), daemon=True
+            ).start()
+        self._send(200, {
+            'razorpay_order_id': order['id'],
+            'razorpay_payment_id': payment['id'],
+            'razorpay_signature': self.server.sign(order['id'], payment['id']),
+        })
+
+    def do_GET(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if parts[:2] == ['v1', 'orders'] and len(parts) == 4 and parts[3] == 'payments':
+            return self._order_payments(parts[2])
+        if len(parts) != 3 or parts[0] != 'v1' or parts[1] not in ('orders', 'payments'):
+            return self._error(404, 'BAD_REQUEST_ERROR', 'The requested URL was not found on the server.')
+        if not self._simulate():
+            return
+        store = self.server.orders if parts[1] == 'orders' else self.server.payments
+        with self.server.lock:
+            entity = store.get(parts[2])
+        if entity is None:
+            return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+        self._send(200, entity)
+
+    def _order_payments(self, order_id):
+        if not self._simulate():
+            return
+        with self.server.lock:
+            if order_id not in self.server.orders:
+                return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+            items = [payment for payment in self.server.payments.values() if payment['order_id'] == order_id]
+        self._send(200, {'entity': 'collection', 'count': len(items), 'items': items})
@@ -0,0 +1,168 @@
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from events.models import DonationCampaign as EventDonationCampaign
+from linkup_backend.caching import bump_model_version
+from projects.models import Funding
+from . import analytics
+from .analytics import GENERAL_FUND
+from .models import DonationCampaign, DonationRollup, LedgerEntry
+
+# Ledger source -> (credited model, total field, field capping the total or None)
+TARGETS = {
+    'donation': (DonationCampaign, 'current_amount', None),
+    'event_donation': (EventDonationCampaign, 'current_amount', None),
+    'funding': (Funding, 'collected_amount', 'amount'),
+}
+
+class LedgerError(Exception):
+    """Raised when an entry cannot be credited to its target"""
+
+
+def _roll_up(source, target_id, day, amount, count=1):
+    analytics.increment(
+        DonationRollup,
+        {'source': source, 'target_id': target_id or GENERAL_FUND, 'day': day},
+        {'amount': amount, 'count': count},
+    )
+
+
+def recorded(source, reference):
+    """Whether a payment was already credited, e.g. for a replayed request"""
+    return LedgerEntry.objects.filter(source=source, reference=reference).exists()
+
+
+def record(source, target_id, amount, reference, contributor_id=None, currency='INR', anonymous=False):
+    """
+    Append a ledger entry and credit its target with a single F() update,
+    inside the caller's transaction, then fold it into the rollups. Returns
+    the entry, or None when the reference was already recorded. Raises
+    LedgerError when the target is gone or the amount would exceed its cap.
+    `anonymous` keeps the contributor off public leaderboards.
+    """
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise LedgerError('Amount must be greater than 0')
+
+    model, field, cap = TARGETS[source]
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                entry = LedgerEntry.objects.create(
+                    source=source,
+                    target_id=target_id,
+                    contributor_id=contributor_id,
+                    amount=amount,
+                    currency=currency,
+                    reference=reference,
+                )
+        except IntegrityError:
+            return None
+
+        if target_id is not None:
+            targets = model.objects.filter(pk=target_id)
+            if cap:
+                targets = targets.filter(**{f'{field}__lte': F(cap) - amount})
+            if not targets.update(**{field: F(field) + amount}):
+                raise LedgerError(
+                    'Amount exceeds the remaining target' if cap and model.objects.filter(pk=target_id).exists()
+                    else 'Target not found'
+                )
+
+        _roll_up(source, target_id, timezone.localdate(entry.created_at), amount)
+        analytics.add_entry(entry, anonymous=anonymous)
+        # Queryset updates send no post_save; refresh cached catalogues by hand
+        bump_model_version(model)
+    return entry
+
+
+def ledger_totals(source):
+    """{target_id: total} summed from the ledger itself"""
+    rows = (
+        LedgerEntry.objects.filter(source=source, target_id__isnull=False)
+        .values('target_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+        .values_list('target_id', 'total')
+    )
+    return dict(rows)
+
+
+def drifted_targets(source):
+    """(target_id, stored total, ledger total) for every target whose total disagrees with the ledger"""
+    model, field, _ = TARGETS[source]
+    totals = ledger_totals(source)
+    drifted = []
+    for target_id, stored in model.objects.values_list('pk', field).iterator(chunk_size=2000):
+        expected = totals.get(target_id, Decimal('0'))
+        if stored != expected:
+            drifted.append((target_id, stored, expected))
+    return drifted
+
+
+def reconcile_target(source, target_id):
+    """
+    Reset one target's total to the sum of its ledger entries, under a row
+    lock so credits landing meanwhile are not overwritten. Returns the
+    (previous, corrected) totals, or None when it already agreed.
+    """
+    model, field, _ = TARGETS[source]
+    with transaction.atomic():
+        stored = model.objects.select_for_update().filter(pk=target_id).values_list(field, flat=True).first()
+        if stored is None:
+            return None
+        expected = (
+            LedgerEntry.objects.filter(source=source, target_id=target_id)
+            .aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        )
+        if stored == expected:
+            return None
+        model.objects.filter(pk=target_id).update(**{field: expected})
+        bump_model_version(model)
+    return stored, expected
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_rollups(since=None, until=None):
+    """
+    Recompute the per-day rollups from the ledger for days in [since, until),
+    unbounded when omitted. Leave the current day out while donations are
+    coming in, since live credits update its rows concurrently.
+    """
+    entries = LedgerEntry.objects.all()
+    rollups = DonationRollup.objects.all()
+    if since is not None:
+        entries = entries.filter(created_at__gte=_day_start(since))
+        rollups = rollups.filter(day__gte=since)
+    if until is not None:
+        entries = entries.filter(created_at__lt=_day_start(until))
+        rollups = rollups.filter(day__lt=until)
+
+    rows = (
+        entries.annotate(day=TruncDate('created_at'))
+        .values('source', 'target_id', 'day')
+        .annotate(total=Sum('amount'), entries=Count('id'))
+        .order_by()
+    )
+    fresh = [
+        DonationRollup(
+            source=row['source'],
+            target_id=row['target_id'] or GENERAL_FUND,
+            day=row['day'],
+            amount=row['total'],
+            count=row['entries'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        DonationRollup.objects.bulk_create(fresh, batch_size=1000)
+    return len(fresh)
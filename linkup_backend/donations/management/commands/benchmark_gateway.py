@@ -0,0 +1,117 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from donations import gateway
+from donations.gateway_stub import StubGateway
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive order creation through donations.gateway from simulated request '
+        'workers and report latency and worker occupancy. By default runs against '
+        'an in-process stub gateway with the given latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent request workers')
+        parser.add_argument('--latency', type=int, default=200, help='Stub latency in milliseconds')
+        parser.add_argument('--jitter', type=int, default=50, help='Extra random stub latency in milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of stub calls that fail')
+        parser.add_argument('--read-timeout', type=float, help='Override PAYMENT_GATEWAY_READ_TIMEOUT (seconds)')
+        parser.add_argument('--url', help='Benchmark a running gateway instead of the in-process stub')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+
+        overrides = {}
+        server = None
+        if options['url']:
+            overrides['PAYMENT_GATEWAY_URL'] = options['url']
+        else:
+            server = StubGateway(
+                ('127.0.0.1', 0),
+                settings.RAZORPAY_KEY_SECRET or 'stub-secret',
+                latency=options['latency'] / 1000,
+                jitter=options['jitter'] / 1000,
+                error_rate=options['error_rate'],
+            )
+            server.start()
+            overrides.update(
+                PAYMENT_GATEWAY_URL=server.url,
+                RAZORPAY_KEY_ID=settings.RAZORPAY_KEY_ID or 'rzp_test_stub',
+                RAZORPAY_KEY_SECRET=server.key_secret,
+            )
+        if options['read_timeout']:
+            overrides['PAYMENT_GATEWAY_READ_TIMEOUT'] = options['read_timeout']
+        if not overrides.get('RAZORPAY_KEY_ID', settings.RAZORPAY_KEY_ID):
+            raise CommandError('RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET must be set')
+
+        try:
+            with override_settings(**overrides):
+                gateway.reset()
+                results, wall = self.run(options['requests'], max(1, options['workers']))
+                circuit = gateway.breaker.state
+        finally:
+            gateway.reset()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        self.report(results, wall, options['workers'], circuit)
+
+    def run(self, total, workers):
+        results = []
+        lock = threading.Lock()
+        remaining = iter(range(total))
+
+        def worker():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                started = time.perf_counter()
+                try:
+                    gateway.create_order(10000, 'INR', notes={'benchmark': '1'})
+                    outcome = 'ok'
+                except gateway.GatewayUnavailable:
+                    outcome = 'unavailable'
+                except gateway.GatewayError:
+                    outcome = 'rejected'
+                elapsed = time.perf_counter() - started
+                with lock:
+                    results.append((outcome, elapsed))
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - started
+
+    def report(self, results, wall, workers, circuit):
+        durations = sorted(elapsed for _, elapsed in results)
+        outcomes = {}
+        for outcome, _ in results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        # Share of worker time spent waiting on the gateway
+        occupancy = sum(durations) / (workers * wall) if wall else 0
+
+        def percentile(fraction):
+            return durations[min(len(durations) - 1, int(len(durations) * fraction))] * 1000
+
+        self.stdout.write(f'calls: {len(results)} in {wall:.2f}s ({len(results) / wall:.1f}/s)')
+        self.stdout.write('outcomes: ' + ', '.join(f'{name}={count}' for name, count in sorted(outcomes.items())))
+        self.stdout.write(
+            f'latency ms: p50={statistics.median(durations) * 1000:.0f} '
+            f'p95={percentile(0.95):.0f} max={durations[-1] * 1000:.0f}'
+        )
+        self.stdout.write(f'circuit: {circuit}')
+        self.stdout.write(self.style.SUCCESS(f'worker occupancy: {occupancy:.0%}'))
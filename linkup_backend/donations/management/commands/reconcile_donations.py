@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from donations import analytics
+from donations.ledger import TARGETS, drifted_targets, rebuild_rollups, reconcile_target
+
+
+class Command(BaseCommand):
+    help = (
+        'Check campaign and funding totals against the donation ledger, correct any '
+        'drift, and rebuild the daily and hourly donation rollups of the last days '
+        'from it. --full also rebuilds donor leaderboards and cohort totals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Completed days of rollups to rebuild (default: 2)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the rollups of every completed day, and every donor and cohort total',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted totals; change nothing',
+        )
+
+    def handle(self, *args, **options):
+        corrected = 0
+        for source in TARGETS:
+            for target_id, stored, expected in drifted_targets(source):
+                if options['dry_run']:
+                    self.stdout.write(f'{source} #{target_id}: {stored} != ledger {expected}')
+                    corrected += 1
+                    continue
+                result = reconcile_target(source, target_id)
+                if result:
+                    previous, total = result
+                    self.stdout.write(f'{source} #{target_id}: {previous} -> {total}')
+                    corrected += 1
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'{corrected} totals disagree with the ledger'))
+            return
+
+        # Today's rollups are live; only completed days are rebuilt
+        today = timezone.localdate()
+        since = None if options['full'] else today - timedelta(days=max(1, options['days']))
+        rebuilt = rebuild_rollups(since=since, until=today)
+        hourly = analytics.rebuild_hourly(since=since, until=today)
+        pruned = analytics.prune_hourly(
+            timezone.now() - timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+        )
+        summary = (
+            f'Corrected {corrected} totals; rebuilt {rebuilt} daily and {hourly} hourly rollups, '
+            f'pruned {pruned} expired hours'
+        )
+        if options['full']:
+            donors, cohorts = analytics.rebuild_donors()
+            summary += f'; rebuilt {donors} donor totals and {cohorts} cohort rollups'
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from donations import gateway, payments
+from donations.models import PaymentWebhookEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Resolve payments the checkout never confirmed: retry stored webhook events '
+        'that failed, then ask the gateway about pending donations in chunks, '
+        'settling paid orders and failing abandoned ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=15,
+            help='Only check donations pending for at least this many minutes (default: 15)',
+        )
+        parser.add_argument(
+            '--give-up-after',
+            type=int,
+            default=24,
+            help='Mark unpaid donations failed after this many hours (default: 24)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Pending donations loaded per query (default: 100)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without changing it',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        retried = 0
+        open_events = (
+            PaymentWebhookEvent.objects
+            .filter(status__in=['received', 'failed'], attempts__lt=payments.MAX_WEBHOOK_ATTEMPTS)
+            .order_by('received_at')
+            .values_list('pk', flat=True)
+        )
+        for event_pk in open_events.iterator(chunk_size=options['chunk_size']):
+            if not dry_run:
+                payments.process_webhook_event(event_pk)
+            retried += 1
+
+        now = timezone.now()
+        checked_before = now - timedelta(minutes=options['min_age'])
+        give_up_before = now - timedelta(hours=options['give_up_after'])
+        settled = failed = checked = 0
+
+        try:
+            for model, status_field, source, _ in payments.PAYABLES:
+                for donation in self._pending(model, status_field, checked_before, options['chunk_size']):
+                    checked += 1
+                    captured = self._captured_payment(donation.razorpay_order_id)
+                    if captured:
+                        self.stdout.write(f'{source} #{donation.pk}: paid by {captured}')
+                        if not dry_run:
+                            payments.settle(donation.razorpay_order_id, captured)
+                        settled += 1
+                    elif donation.created_at < give_up_before:
+                        self.stdout.write(f'{source} #{donation.pk}: abandoned')
+                        if not dry_run:
+                            payments.fail(donation.razorpay_order_id)
+                        failed += 1
+        except gateway.GatewayUnavailable as e:
+            # Pending donations stay pending; the next run picks up where this one stopped
+            self.stderr.write(self.style.WARNING(f'Stopped early: {e}'))
+
+        outcome = f'settle {settled}, mark {failed} failed' if dry_run else f'settled {settled}, marked {failed} failed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Retried {retried} webhook events; checked {checked} pending donations; '
+            f'{"would " if dry_run else ""}{outcome}'
+        ))
+
+    def _pending(self, model, status_field, created_before, chunk_size):
+        """Pending donations with an order, walked by id so each chunk is one indexed query"""
+        last_id = 0
+        while True:
+            chunk = list(
+                model.objects
+                .filter(**{status_field: 'pending'}, pk__gt=last_id, created_at__lt=created_before)
+                .exclude(razorpay_order_id='')
+                .only('pk', 'razorpay_order_id', 'created_at')
+                .order_by('pk')[:chunk_size]
+            )
+            if not chunk:
+                return
+            yield from chunk
+            last_id = chunk[-1].pk
+
+    def _captured_payment(self, order_id):
+        try:
+            attempts = gateway.fetch_order_payments(order_id)
+        except gateway.GatewayUnavailable:
+            raise
+        except gateway.GatewayError as e:
+            # Declined lookups (e.g. an order from another account) are not outages
+            self.stderr.write(f'Order {order_id}: {e}')
+            return None
+        for payment in attempts.get('items', []):
+            if payment.get('status') == 'captured':
+                return payment['id']
+        return None
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from donations.models import DonationReceipt
+from donations.receipts import SOURCES, paid_donations, render_receipt
+
+
+def _render(job):
+    source, donation_id = job
+    try:
+        return render_receipt(source, donation_id) is not None
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Render receipts for successful donations, e.g. a whole campaign after its '
+        'details changed, in parallel worker threads'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=sorted(SOURCES),
+            default='donation',
+            help='Kind of donation (default: donation)',
+        )
+        parser.add_argument('--campaign', type=int, help='Only donations to this campaign')
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only render donations that have no receipt yet',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of worker threads (default: 4)',
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        donations = paid_donations(source).select_related(None)
+        if options['campaign']:
+            donations = donations.filter(campaign_id=options['campaign'])
+        if options['missing']:
+            donations = donations.exclude(pk__in=DonationReceipt.objects.filter(source=source).values('donation_id'))
+        jobs = [(source, pk) for pk in donations.values_list('pk', flat=True).iterator(chunk_size=2000)]
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('No receipts to render'))
+            return
+
+        rendered = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for done, ok in enumerate(executor.map(_render, jobs), start=1):
+                rendered += ok
+                if done % 500 == 0:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f'{done}/{len(jobs)} donations processed ({done / elapsed:.0f}/s)')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} receipts in {elapsed:.1f}s '
+            f'({rendered / elapsed:.0f} receipts/s with {options["workers"]} workers)'
+        ))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.gateway_stub import StubGateway
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve a local stand-in for the Razorpay API so payments work offline. '
+        'Point PAYMENT_GATEWAY_URL at it; orders are paid with POST /v1/stub/pay.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=int, default=0, help='Milliseconds added to every API call')
+        parser.add_argument('--jitter', type=int, default=0, help='Up to this many extra random milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with 503')
+        parser.add_argument(
+            '--webhook-url',
+            help='Deliver payment.captured webhooks here, e.g. http://127.0.0.1:8000/api/donations/webhook/',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.RAZORPAY_KEY_SECRET:
+            raise CommandError('RAZORPAY_KEY_SECRET must be set so checkout signatures can be verified')
+        if options['webhook_url'] and not settings.RAZORPAY_WEBHOOK_SECRET:
+            raise CommandError('RAZORPAY_WEBHOOK_SECRET must be set to sign webhooks')
+
+        server = StubGateway(
+            (options['host'], options['port']),
+            settings.RAZORPAY_KEY_SECRET,
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            webhook_url=options['webhook_url'],
+            webhook_secret=settings.RAZORPAY_WEBHOOK_SECRET,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Stub payment gateway listening on {server.url}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
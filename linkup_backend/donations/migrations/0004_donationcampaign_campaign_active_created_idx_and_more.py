@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0003_donation_currency_donation_notes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationcampaign',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='campaign_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationcampaign',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['end_date'], name='campaign_active_end_idx'),
+        ),
+    ]
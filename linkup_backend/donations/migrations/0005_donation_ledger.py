@@ -0,0 +1,135 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import django.utils.timezone
+
+# Ledger source -> (app, model, total field) of the credited targets
+TARGETS = {
+    'donation': ('donations', 'DonationCampaign', 'current_amount'),
+    'event_donation': ('events', 'DonationCampaign', 'current_amount'),
+    'funding': ('projects', 'Funding', 'collected_amount'),
+}
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Seed the ledger from verified donations, plus one opening balance entry
+    wherever a stored total is not explained by them (funding contributions
+    were never recorded), then build the daily rollups from it.
+    """
+    LedgerEntry = apps.get_model('donations', 'LedgerEntry')
+    DonationRollup = apps.get_model('donations', 'DonationRollup')
+    Donation = apps.get_model('donations', 'Donation')
+    EventDonation = apps.get_model('events', 'Donation')
+
+    paid = [
+        ('donation', Donation.objects.filter(status='successful').values_list(
+            'pk', 'campaign_id', 'donor_id', 'amount', 'currency', 'updated_at')),
+        ('event_donation', EventDonation.objects.filter(payment_status='successful').values_list(
+            'pk', 'campaign_id', 'donor_id', 'amount', 'created_at')),
+    ]
+    for source, rows in paid:
+        entries = []
+        for row in rows.iterator(chunk_size=2000):
+            pk, target_id, donor_id, amount = row[:4]
+            currency = row[4] if len(row) == 6 else 'INR'
+            entries.append(LedgerEntry(
+                source=source, target_id=target_id, contributor_id=donor_id, amount=amount,
+                currency=currency, reference=str(pk), created_at=row[-1],
+            ))
+            if len(entries) == 1000:
+                LedgerEntry.objects.bulk_create(entries)
+                entries = []
+        LedgerEntry.objects.bulk_create(entries)
+
+    for source, (app_label, model_name, field) in TARGETS.items():
+        totals = dict(
+            LedgerEntry.objects.filter(source=source, target_id__isnull=False)
+            .values('target_id').annotate(total=Sum('amount')).order_by()
+            .values_list('target_id', 'total')
+        )
+        openings = [
+            LedgerEntry(
+                source=source, target_id=pk, amount=stored - totals.get(pk, 0),
+                reference=f'opening-balance:{pk}', created_at=created_at,
+            )
+            for pk, stored, created_at in apps.get_model(app_label, model_name).objects.values_list(
+                'pk', field, 'created_at').iterator(chunk_size=2000)
+            if stored != totals.get(pk, 0)
+        ]
+        LedgerEntry.objects.bulk_create(openings, batch_size=1000)
+
+    rows = (
+        LedgerEntry.objects.annotate(day=TruncDate('created_at'))
+        .values('source', 'target_id', 'day')
+        .annotate(total=Sum('amount'), entries=Count('id'))
+        .order_by()
+    )
+    DonationRollup.objects.bulk_create(
+        [
+            DonationRollup(source=row['source'], target_id=row['target_id'] or 0, day=row['day'],
+                           amount=row['total'], count=row['entries'])
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('donations', '0004_donationcampaign_campaign_active_created_idx_and_more'),
+        ('events', '0007_eventregistration_checked_in_at'),
+        ('projects', '0011_funding_deadline_funding_funding_active_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation campaign'), ('event_donation', 'Event donation campaign'), ('funding', 'Project funding request')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('day', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation campaign'), ('event_donation', 'Event donation campaign'), ('funding', 'Project funding request')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('currency', models.CharField(default='INR', max_length=3)),
+                ('reference', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('contributor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donationrollup',
+            constraint=models.UniqueConstraint(fields=('source', 'target_id', 'day'), name='donations_rollup_day'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['source', 'target_id', 'created_at'], name='donations_ledger_target_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(fields=('source', 'reference'), name='donations_ledger_once'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,154 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:01
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, CharField, Count, Max, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, TruncHour
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_analytics(apps, schema_editor):
+    """Build the hourly rollups of the retention period and every donor and cohort total from the ledger"""
+    LedgerEntry = apps.get_model('donations', 'LedgerEntry')
+    DonationHourlyRollup = apps.get_model('donations', 'DonationHourlyRollup')
+    DonorTotal = apps.get_model('donations', 'DonorTotal')
+    CohortRollup = apps.get_model('donations', 'CohortRollup')
+    EventDonation = apps.get_model('events', 'Donation')
+    target = Coalesce('target_id', 0)
+
+    since = timezone.now() - timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+    hours = (
+        LedgerEntry.objects.filter(created_at__gte=since)
+        .values('source', target=target, slot=TruncHour('created_at'))
+        .annotate(total=Sum('amount'), entries=Count('id'))
+        .order_by()
+    )
+    DonationHourlyRollup.objects.bulk_create(
+        [
+            DonationHourlyRollup(source=row['source'], target_id=row['target'], hour=row['slot'],
+                                 amount=row['total'], count=row['entries'])
+            for row in hours
+        ],
+        batch_size=1000,
+    )
+
+    entries = LedgerEntry.objects.filter(contributor__isnull=False)
+    anonymous_refs = (
+        EventDonation.objects.filter(is_anonymous=True)
+        .annotate(ref=Cast('pk', CharField()))
+        .values('ref')
+    )
+    donors = (
+        entries.values('source', 'contributor_id', target=target)
+        .annotate(
+            total=Sum('amount'),
+            entries=Count('id'),
+            last=Max('created_at'),
+            hidden=Max(Case(
+                When(source='event_donation', reference__in=anonymous_refs, then=Value(1)),
+                default=Value(0),
+            )),
+        )
+        .order_by()
+    )
+    DonorTotal.objects.bulk_create(
+        [
+            DonorTotal(source=row['source'], target_id=row['target'], contributor_id=row['contributor_id'],
+                       amount=row['total'], count=row['entries'], anonymous=bool(row['hidden']),
+                       last_donated_at=row['last'])
+            for row in donors
+        ],
+        batch_size=1000,
+    )
+
+    cohorts = (
+        entries.values('source', target=target, cohort=Coalesce('contributor__graduation_year', 0))
+        .annotate(total=Sum('amount'), entries=Count('id'), people=Count('contributor_id', distinct=True))
+        .order_by()
+    )
+    CohortRollup.objects.bulk_create(
+        [
+            CohortRollup(source=row['source'], target_id=row['target'], graduation_year=row['cohort'],
+                         amount=row['total'], count=row['entries'], donors=row['people'])
+            for row in cohorts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('donations', '0006_payment_webhooks'),
+        ('events', '0008_donation_pending_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation campaign'), ('event_donation', 'Event donation campaign'), ('funding', 'Project funding request')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('graduation_year', models.PositiveSmallIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('donors', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['graduation_year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DonorTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation campaign'), ('event_donation', 'Event donation campaign'), ('funding', 'Project funding request')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('anonymous', models.BooleanField(default=False)),
+                ('last_donated_at', models.DateTimeField()),
+                ('contributor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donor_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-amount'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DonationHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation campaign'), ('event_donation', 'Event donation campaign'), ('funding', 'Project funding request')], max_length=20)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('hour', models.DateTimeField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['hour'],
+                'indexes': [models.Index(fields=['hour'], name='donations_rollup_hour_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donationhourlyrollup',
+            constraint=models.UniqueConstraint(fields=('source', 'target_id', 'hour'), name='donations_rollup_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='cohortrollup',
+            constraint=models.UniqueConstraint(fields=('source', 'target_id', 'graduation_year'), name='donations_rollup_cohort'),
+        ),
+        migrations.AddIndex(
+            model_name='donortotal',
+            index=models.Index(fields=['source', 'target_id', '-amount'], name='donations_leaderboard_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='donortotal',
+            constraint=models.UniqueConstraint(fields=('source', 'target_id', 'contributor'), name='donations_donor_total'),
+        ),
+        migrations.RunPython(backfill_analytics, migrations.RunPython.noop),
+    ]
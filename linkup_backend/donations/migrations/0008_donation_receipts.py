@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('donations', '0007_donation_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('donation', 'Donation'), ('event_donation', 'Event donation')], max_length=20)),
+                ('donation_id', models.PositiveBigIntegerField()),
+                ('number', models.CharField(max_length=30, unique=True)),
+                ('file', models.FileField(upload_to='receipts/')),
+                ('generated_at', models.DateTimeField()),
+                ('donor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donation_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-generated_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donationreceipt',
+            constraint=models.UniqueConstraint(fields=('source', 'donation_id'), name='donations_receipt_once'),
+        ),
+    ]
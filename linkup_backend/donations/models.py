@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
 class DonationCampaign(models.Model):
     title = models.CharField(max_length=200)
@@ -30,6 +32,10 @@ class DonationCampaign(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(is_active=True), name='campaign_active_created_idx'),
+            models.Index(fields=['end_date'], condition=Q(is_active=True), name='campaign_active_end_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -69,6 +75,207 @@ class Donation(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pending donations walked by reconcile_payments
+            models.Index(fields=['id'], condition=Q(status='pending'), name='donations_pending_idx'),
+        ]
 
     def __str__(self):
-        return f"Donation of {self.currency} {self.amount} by {self.donor.get_full_name()}" 
\ No newline at end of file
+        return f"Donation of {self.currency} {self.amount} by {self.donor.get_full_name()}" 
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only record of money credited to a campaign or funding request.
+    Totals on the targets are maintained from it by donations.ledger and can
+    always be rebuilt from it with reconcile_donations.
+    """
+    SOURCE_CHOICES = [
+        ('donation', 'Donation campaign'),
+        ('event_donation', 'Event donation campaign'),
+        ('funding', 'Project funding request'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # Id of the credited campaign or funding request; null for general donations.
+    # Not a foreign key so the history outlives deleted targets.
+    target_id = models.PositiveBigIntegerField(null=True, blank=True)
+    contributor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3, default='INR')
+    # Payment this entry records, unique per source so a replayed verification never credits twice
+    reference = models.CharField(max_length=100)
+    # Not auto_now_add, so backfilled entries keep the time of their payment
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'reference'], name='donations_ledger_once'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'target_id', 'created_at'], name='donations_ledger_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.target_id}: {self.currency} {self.amount}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Ledger entries are append-only')
+        super().save(*args, **kwargs)
+
+
+class DonationRollup(models.Model):
+    """Per-day totals of the ledger for one target, kept current by donations.ledger"""
+    source = models.CharField(max_length=20, choices=LedgerEntry.SOURCE_CHOICES)
+    # 0 collects general donations without a campaign
+    target_id = models.PositiveBigIntegerField()
+    day = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'target_id', 'day'], name='donations_rollup_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.target_id} on {self.day}: {self.amount}"
+
+
+class DonationHourlyRollup(models.Model):
+    """Per-hour totals of the ledger for one target, kept for ANALYTICS_HOURLY_RETENTION_DAYS"""
+    source = models.CharField(max_length=20, choices=LedgerEntry.SOURCE_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    hour = models.DateTimeField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['hour']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'target_id', 'hour'], name='donations_rollup_hour'),
+        ]
+        indexes = [
+            # Pruning of expired hours
+            models.Index(fields=['hour'], name='donations_rollup_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.target_id} at {self.hour}: {self.amount}"
+
+
+class DonorTotal(models.Model):
+    """
+    What one contributor has given to one target. One row per donor makes
+    the leaderboard an index scan and unique donor counts a sum.
+    """
+    source = models.CharField(max_length=20, choices=LedgerEntry.SOURCE_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    contributor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='donor_totals')
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+    # Set once any of the donations asked not to be named
+    anonymous = models.BooleanField(default=False)
+    last_donated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-amount']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'target_id', 'contributor'], name='donations_donor_total'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'target_id', '-amount'], name='donations_leaderboard_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contributor_id} to {self.source} #{self.target_id}: {self.amount}"
+
+
+class CohortRollup(models.Model):
+    """Totals per graduation year of the donors to one target"""
+    source = models.CharField(max_length=20, choices=LedgerEntry.SOURCE_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    # 0 collects donors without a graduation year
+    graduation_year = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+    donors = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['graduation_year']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'target_id', 'graduation_year'], name='donations_rollup_cohort'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.target_id}, class of {self.graduation_year}: {self.amount}"
+
+
+class PaymentWebhookEvent(models.Model):
+    """A gateway webhook delivery, stored once per event id and applied by a worker"""
+    STATUS_CHOICES = [
+        ('received', 'Received'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    # X-Razorpay-Event-Id, or a hash of the body when absent; redeliveries share it
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='received')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['received_at'], condition=Q(status__in=['received', 'failed']), name='donations_webhook_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id})"
+
+
+class DonationReceipt(models.Model):
+    """Rendered receipt of a successful donation of either kind, written by donations.receipts"""
+    SOURCE_CHOICES = [
+        ('donation', 'Donation'),
+        ('event_donation', 'Event donation'),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # Not a foreign key: the two donation models share this table
+    donation_id = models.PositiveBigIntegerField()
+    donor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='donation_receipts'
+    )
+    # Stable across regenerations
+    number = models.CharField(max_length=30, unique=True)
+    file = models.FileField(upload_to='receipts/')
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-generated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'donation_id'], name='donations_receipt_once'),
+        ]
+
+    def __str__(self):
+        return f"Receipt {self.number}"
@@ -0,0 +1,134 @@
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from events.models import Donation as EventDonation
+from . import ledger, receipts
+from .models import Donation, PaymentWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+# Donation models paid through razorpay orders:
+# (model, status field, ledger source, fields touched when settling)
+PAYABLES = (
+    (Donation, 'status', 'donation', ['updated_at']),
+    (EventDonation, 'payment_status', 'event_donation', []),
+)
+
+# Webhook events that settle an order, and those reporting a failed attempt
+SETTLING_EVENTS = ('payment.captured', 'order.paid')
+FAILING_EVENTS = ('payment.failed',)
+
+MAX_WEBHOOK_ATTEMPTS = 5
+
+
+def settle(order_id, payment_id, signature=''):
+    """
+    Mark the donation for a paid order successful, credit its campaign and
+    queue its receipt. Idempotent: verify_payment, the webhook worker and reconcile_payments may
+    all report the same payment, and the ledger credits it once. Returns the
+    donation, or None when no donation has this order.
+    """
+    if not order_id:
+        return None
+    for model, status_field, source, extra_fields in PAYABLES:
+        with transaction.atomic():
+            donation = model.objects.select_for_update().filter(razorpay_order_id=order_id).first()
+            if donation is None:
+                continue
+            if getattr(donation, status_field) != 'successful':
+                setattr(donation, status_field, 'successful')
+                donation.razorpay_payment_id = payment_id or donation.razorpay_payment_id
+                donation.razorpay_signature = signature or donation.razorpay_signature
+                donation.save(update_fields=[
+                    status_field, 'razorpay_payment_id', 'razorpay_signature', *extra_fields
+                ])
+                # Rendered off the checkout path, after the payment commits
+                receipts.schedule_receipt(source, donation.pk)
+            ledger.record(
+                source,
+                donation.campaign_id,
+                donation.amount,
+                reference=str(donation.pk),
+                contributor_id=donation.donor_id,
+                currency=getattr(donation, 'currency', 'INR'),
+                anonymous=getattr(donation, 'is_anonymous', False),
+            )
+        return donation
+    return None
+
+
+def fail(order_id):
+    """Mark an order's donation failed, never undoing a successful one. Returns rows changed."""
+    changed = 0
+    for model, status_field, _, _ in PAYABLES:
+        changed += (
+            model.objects.filter(razorpay_order_id=order_id)
+            .exclude(**{status_field: 'successful'})
+            .update(**{status_field: 'failed'})
+        )
+    return changed
+
+
+def webhook_signature_valid(body, signature):
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def store_webhook(event_id, payload):
+    """Save a delivery once per event id. Returns (event, created)."""
+    try:
+        with transaction.atomic():
+            event = PaymentWebhookEvent.objects.create(
+                event_id=event_id,
+                event_type=str(payload.get('event', ''))[:50],
+                payload=payload,
+            )
+    except IntegrityError:
+        return PaymentWebhookEvent.objects.get(event_id=event_id), False
+    return event, True
+
+
+def _apply(event_type, payload):
+    entities = payload.get('payload') or {}
+    payment = (entities.get('payment') or {}).get('entity') or {}
+    order = (entities.get('order') or {}).get('entity') or {}
+    order_id = payment.get('order_id') or order.get('id')
+
+    if event_type in SETTLING_EVENTS:
+        return 'processed' if settle(order_id, payment.get('id')) else 'ignored'
+    if event_type in FAILING_EVENTS:
+        # A later attempt on the same order can still settle it
+        return 'processed' if order_id and fail(order_id) else 'ignored'
+    return 'ignored'
+
+
+def process_webhook_event(event_pk):
+    """Apply one stored webhook event; runs on the worker pool and in reconcile_payments"""
+    with transaction.atomic():
+        event = (
+            PaymentWebhookEvent.objects.select_for_update()
+            .filter(pk=event_pk, status__in=['received', 'failed'])
+            .first()
+        )
+        if event is None:
+            return None
+        event.attempts += 1
+        try:
+            with transaction.atomic():
+                event.status = _apply(event.event_type, event.payload)
+            event.error = ''
+            event.processed_at = timezone.now()
+        except Exception as e:
+            logger.exception('Webhook event %s failed', event.event_id)
+            event.status = 'failed'
+            event.error = str(e)
+        event.save(update_fields=['status', 'attempts', 'error', 'processed_at'])
+    return event.status
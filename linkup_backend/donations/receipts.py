@@ -0,0 +1,99 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Donation as EventDonation
+from linkup_backend.tasks import submit_on_commit
+from .models import Donation, DonationReceipt
+
+logger = logging.getLogger(__name__)
+
+# Receipt source -> (donation model, status field, receipt number prefix)
+SOURCES = {
+    'donation': (Donation, 'status', 'D'),
+    'event_donation': (EventDonation, 'payment_status', 'E'),
+}
+
+
+def receipt_number(source, donation_id):
+    return f"{settings.RECEIPT_NUMBER_PREFIX}-{SOURCES[source][2]}-{donation_id:08d}"
+
+
+def receipt_url(source, donation_id, request=None):
+    url = reverse('donation-receipt', args=[source, donation_id])
+    return request.build_absolute_uri(url) if request else url
+
+
+def paid_donations(source):
+    """Successful donations of a source, with what their receipts show"""
+    model, status_field, _ = SOURCES[source]
+    return model.objects.filter(**{status_field: 'successful'}).select_related('donor', 'campaign')
+
+
+def _context(source, donation):
+    donor = donation.donor
+    return {
+        'issuer': settings.RECEIPT_ISSUER,
+        'number': receipt_number(source, donation.pk),
+        'issued_on': timezone.localdate(),
+        'donated_at': timezone.localtime(getattr(donation, 'updated_at', None) or donation.created_at),
+        'donor_name': (donor.get_full_name() or donor.username) if donor else '',
+        'donor_email': donor.email if donor else '',
+        'amount': donation.amount,
+        'currency': getattr(donation, 'currency', 'INR'),
+        'campaign': donation.campaign.title if donation.campaign else 'General fund',
+        'payment_id': donation.razorpay_payment_id or '',
+        'order_id': donation.razorpay_order_id or '',
+        'message': donation.message or '',
+    }
+
+
+def render_receipt(source, donation_id):
+    """
+    Render the receipt of a successful donation into media storage and point
+    its DonationReceipt at it; rerunning replaces the previous file. Returns
+    the receipt, or None when the donation is not (or no longer) paid.
+    """
+    donation = paid_donations(source).filter(pk=donation_id).first()
+    if donation is None:
+        return None
+
+    html = render_to_string('donations/receipt.html', _context(source, donation))
+    content = html.encode('utf-8')
+    # Named after the content, so a regenerated receipt never overwrites the one being served
+    token = hashlib.sha1(content).hexdigest()[:12]
+    number = receipt_number(source, donation_id)
+
+    receipt = DonationReceipt.objects.filter(source=source, donation_id=donation_id).first()
+    previous = receipt.file.name if receipt else ''
+    if receipt is None:
+        receipt = DonationReceipt(source=source, donation_id=donation_id, number=number)
+    if not previous.endswith(f'{token}.html'):
+        receipt.file.save(f'{number}-{token}.html', ContentFile(content), save=False)
+    receipt.donor_id = donation.donor_id
+    receipt.generated_at = timezone.now()
+    try:
+        with transaction.atomic():
+            receipt.save()
+    except IntegrityError:
+        # Rendered concurrently by another worker; keep theirs
+        receipt.file.delete(save=False)
+        return DonationReceipt.objects.get(source=source, donation_id=donation_id)
+
+    if previous and previous != receipt.file.name:
+        try:
+            receipt.file.storage.delete(previous)
+        except OSError:
+            logger.warning('Could not delete replaced receipt %s', previous)
+    return receipt
+
+
+def schedule_receipt(source, donation_id):
+    """Render the receipt in the background worker pool once the payment commits"""
+    submit_on_commit(render_receipt, source, donation_id)
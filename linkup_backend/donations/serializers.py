@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import Donation, DonationCampaign
+from .receipts import receipt_url
 
 class DonationSerializer(serializers.ModelSerializer):
     donor_name = serializers.SerializerMethodField()
+    receipt_url = serializers.SerializerMethodField()
     campaign = serializers.PrimaryKeyRelatedField(
         queryset=DonationCampaign.objects.filter(is_active=True),
         required=False,
@@ -14,7 +16,7 @@ class DonationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'donor', 'donor_name', 'amount', 'currency', 'razorpay_order_id',
             'razorpay_payment_id', 'status', 'message', 'created_at', 'campaign',
-            'notes'
+            'notes', 'receipt_url'
         ]
         read_only_fields = [
             'donor', 'razorpay_order_id', 'razorpay_payment_id',
@@ -24,6 +26,11 @@ class DonationSerializer(serializers.ModelSerializer):
     def get_donor_name(self, obj):
         return obj.donor.get_full_name()
 
+    def get_receipt_url(self, obj):
+        if obj.status != 'successful':
+            return None
+        return receipt_url('donation', obj.pk, self.context.get('request'))
+
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than 0")
@@ -0,0 +1,583 @@
+import hashlib
+import hmac
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from donations import analytics, gateway, ledger, payments, receipts
+from donations.gateway_stub import StubGateway
+from donations.models import (
+    CohortRollup, Donation, DonationCampaign, DonationHourlyRollup, DonationReceipt, DonationRollup, DonorTotal,
+    LedgerEntry, PaymentWebhookEvent,
+)
+from projects.models import Funding, Project
+
+User = get_user_model()
+
+
+def make_user(name):
+    return User.objects.create_user(email=f'{name}@example.com', username=name, password='pass')
+
+
+def make_campaign(organizer):
+    return DonationCampaign.objects.create(
+        title='Scholarship fund',
+        description='Scholarships for students',
+        goal_amount=Decimal('10000'),
+        start_date=timezone.now(),
+        end_date=timezone.now() + timedelta(days=30),
+        organizer=organizer,
+    )
+
+
+def make_funding(creator, amount='1000'):
+    project = Project.objects.create(
+        title='Campus app',
+        short_description='An app for the campus',
+        detailed_description='An app for the campus',
+        project_type='Startup',
+        creator=creator,
+    )
+    return Funding.objects.create(
+        project=project, title='Servers', description='Hosting costs', amount=Decimal(amount)
+    )
+
+
+def run_in_foreground(func, *args, **kwargs):
+    # Stands in for linkup_backend.tasks.submit so queued work runs inline
+    func(*args, **kwargs)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.donor = make_user('donor')
+        self.campaign = make_campaign(self.donor)
+
+    def test_record_credits_the_target(self):
+        entry = ledger.record('donation', self.campaign.pk, '250', reference='order-1', contributor_id=self.donor.pk)
+
+        self.assertIsNotNone(entry)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.current_amount, Decimal('250'))
+        rollup = DonationRollup.objects.get(source='donation', target_id=self.campaign.pk)
+        self.assertEqual((rollup.amount, rollup.count), (Decimal('250'), 1))
+
+    def test_same_reference_is_credited_once(self):
+        ledger.record('donation', self.campaign.pk, '250', reference='order-1', contributor_id=self.donor.pk)
+
+        replay = ledger.record('donation', self.campaign.pk, '250', reference='order-1', contributor_id=self.donor.pk)
+
+        self.assertIsNone(replay)
+        self.assertTrue(ledger.recorded('donation', 'order-1'))
+        self.assertEqual(LedgerEntry.objects.filter(source='donation').count(), 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.current_amount, Decimal('250'))
+        self.assertEqual(DonationRollup.objects.get(source='donation', target_id=self.campaign.pk).count, 1)
+
+    def test_non_positive_amount_is_rejected(self):
+        with self.assertRaises(ledger.LedgerError):
+            ledger.record('donation', self.campaign.pk, '0', reference='order-1')
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_funding_cap_is_enforced(self):
+        funding = make_funding(self.donor, amount='500')
+        ledger.record('funding', funding.pk, '400', reference='f-1')
+
+        with self.assertRaises(ledger.LedgerError):
+            ledger.record('funding', funding.pk, '200', reference='f-2')
+
+        funding.refresh_from_db()
+        self.assertEqual(funding.collected_amount, Decimal('400'))
+        self.assertFalse(ledger.recorded('funding', 'f-2'))
+
+    def test_reconcile_restores_the_ledger_total(self):
+        ledger.record('donation', self.campaign.pk, '250', reference='order-1')
+        DonationCampaign.objects.filter(pk=self.campaign.pk).update(current_amount=Decimal('999'))
+
+        self.assertEqual(ledger.drifted_targets('donation'), [(self.campaign.pk, Decimal('999'), Decimal('250'))])
+        ledger.reconcile_target('donation', self.campaign.pk)
+
+        self.assertEqual(ledger.drifted_targets('donation'), [])
+
+
+class FundingContributionTests(TestCase):
+    def setUp(self):
+        self.donor = make_user('donor')
+        self.funding = make_funding(self.donor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.donor)
+        self.url = f'/api/projects/funding/{self.funding.pk}/contribute/'
+
+    def test_retried_contribution_is_credited_once(self):
+        data = {'amount': '300', 'idempotency_key': 'attempt-1'}
+
+        first = self.client.post(self.url, data, format='json')
+        retry = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.collected_amount, Decimal('300'))
+        self.assertEqual(LedgerEntry.objects.filter(source='funding').count(), 1)
+
+    def test_contributions_without_a_key_are_separate(self):
+        self.client.post(self.url, {'amount': '300'}, format='json')
+        self.client.post(self.url, {'amount': '300'}, format='json')
+
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.collected_amount, Decimal('600'))
+
+    def test_retrying_the_completing_contribution_succeeds(self):
+        data = {'amount': '1000', 'idempotency_key': 'attempt-1'}
+        self.client.post(self.url, data, format='json')
+
+        retry = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['status'], 'completed')
+        self.assertEqual(LedgerEntry.objects.filter(source='funding').count(), 1)
+        self.assertEqual(self.client.post(self.url, {**data, 'idempotency_key': 'attempt-2'}, format='json').status_code, 404)
+
+    def test_reaching_the_target_completes_the_request(self):
+        response = self.client.post(self.url, {'amount': '1000'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.status, 'completed')
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.organizer = make_user('organizer')
+        self.campaign = make_campaign(self.organizer)
+        self.donors = []
+        for name, year in (('ada', 2015), ('bob', 2015), ('cy', None)):
+            donor = make_user(name)
+            donor.first_name = name.title()
+            donor.graduation_year = year
+            donor.save()
+            self.donors.append(donor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.references = iter(range(1000))
+
+    def give(self, donor, amount, anonymous=False, target=None):
+        return ledger.record(
+            'donation', target or self.campaign.pk, amount, reference=f'order-{next(self.references)}',
+            contributor_id=donor.pk, anonymous=anonymous,
+        )
+
+    def get(self, path, **params):
+        return self.client.get(f'/api/donations/{path}/', {'target': self.campaign.pk, **params})
+
+    def test_stats_sum_the_target(self):
+        ada, bob, _ = self.donors
+        self.give(ada, '100')
+        self.give(ada, '50')
+        self.give(bob, '25')
+
+        data = self.get('stats').data
+
+        self.assertEqual((data['amount'], data['count'], data['donors']), (Decimal('175'), 3, 2))
+        self.assertEqual(data['daily'], [{'day': timezone.localdate(), 'amount': Decimal('175'), 'count': 3}])
+        hourly = self.get('stats', interval='hour').data['hourly']
+        self.assertEqual([(row['amount'], row['count']) for row in hourly], [(Decimal('175'), 3)])
+
+    def test_stats_list_every_target_of_a_source(self):
+        other = make_campaign(self.organizer)
+        self.give(self.donors[0], '10')
+        self.give(self.donors[0], '90', target=other.pk)
+
+        targets = self.client.get('/api/donations/stats/').data['targets']
+
+        self.assertEqual([row['target_id'] for row in targets], [other.pk, self.campaign.pk])
+
+    def test_leaderboard_ranks_donors_and_hides_anonymous_ones(self):
+        ada, bob, cy = self.donors
+        self.give(ada, '100')
+        self.give(bob, '60')
+        self.give(bob, '60')
+        self.give(cy, '500', anonymous=True)
+
+        donors = self.get('leaderboard').data['donors']
+
+        self.assertEqual([(d['rank'], d['name'], d['amount']) for d in donors], [
+            (1, 'Anonymous', Decimal('500')), (2, 'Bob', Decimal('120')), (3, 'Ada', Decimal('100')),
+        ])
+        self.assertIsNone(donors[0]['donor'])
+        self.assertEqual(donors[1]['count'], 2)
+        self.assertEqual(len(self.get('leaderboard', limit=1).data['donors']), 1)
+
+    def test_bad_queries_are_rejected(self):
+        self.assertEqual(self.get('leaderboard', limit='all').status_code, 400)
+        self.assertEqual(self.get('leaderboard', source='bitcoin').status_code, 400)
+        self.assertEqual(self.client.get('/api/donations/cohorts/').status_code, 400)
+        self.assertEqual(self.get('stats', days='week').status_code, 400)
+
+    def test_cohorts_count_each_donor_once(self):
+        ada, bob, cy = self.donors
+        self.give(ada, '100')
+        self.give(ada, '100')
+        self.give(bob, '10')
+        self.give(cy, '5')
+
+        cohorts = {row['graduation_year']: row for row in self.get('cohorts').data['cohorts']}
+
+        self.assertEqual((cohorts[2015]['amount'], cohorts[2015]['count'], cohorts[2015]['donors']), (Decimal('210'), 3, 2))
+        self.assertEqual(cohorts[None]['donors'], 1)
+
+    def test_rebuilding_matches_the_live_rollups(self):
+        ada, bob, cy = self.donors
+        self.give(ada, '100')
+        self.give(bob, '40', anonymous=True)
+        self.give(cy, '5')
+        self.give(ada, '1')
+
+        def snapshot():
+            return (
+                sorted(DonorTotal.objects.values_list('contributor_id', 'amount', 'count')),
+                sorted(CohortRollup.objects.values_list('graduation_year', 'amount', 'count', 'donors')),
+                sorted(DonationHourlyRollup.objects.values_list('target_id', 'amount', 'count')),
+            )
+        live = snapshot()
+        DonorTotal.objects.update(amount=0)
+        DonationHourlyRollup.objects.all().delete()
+
+        analytics.rebuild_donors()
+        analytics.rebuild_hourly()
+
+        self.assertEqual(snapshot(), live)
+
+    def test_reconcile_command_repairs_drift(self):
+        self.give(self.donors[0], '100')
+        DonationCampaign.objects.filter(pk=self.campaign.pk).update(current_amount=Decimal('1'))
+        DonorTotal.objects.update(amount=0)
+        out = StringIO()
+
+        call_command('reconcile_donations', '--dry-run', stdout=out)
+        self.assertIn('1 totals disagree with the ledger', out.getvalue())
+        call_command('reconcile_donations', '--full', stdout=out)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.current_amount, Decimal('100'))
+        self.assertEqual(DonorTotal.objects.get().amount, Decimal('100'))
+        self.assertIn('Corrected 1 totals', out.getvalue())
+
+
+@mock.patch('linkup_backend.tasks.submit', run_in_foreground)
+class ReceiptTests(TestCase):
+    def setUp(self):
+        # Receipts hold donor names and emails; keep them out of the project's MEDIA_ROOT
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.donor = make_user('donor')
+        self.donor.first_name, self.donor.last_name = 'Ada', 'Lovelace'
+        self.donor.save()
+        self.campaign = make_campaign(self.donor)
+        self.donation = Donation.objects.create(
+            donor=self.donor, campaign=self.campaign, amount=Decimal('500'), razorpay_order_id='order_1',
+            message='For the library',
+        )
+        self.url = f'/api/donations/receipts/donation/{self.donation.pk}/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.donor)
+
+    def pay(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payments.settle('order_1', 'pay_1')
+        return DonationReceipt.objects.get(source='donation', donation_id=self.donation.pk)
+
+    def download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_payment_renders_the_receipt(self):
+        receipt = self.pay()
+
+        number = f'LU-D-{self.donation.pk:08d}'
+        self.assertEqual((receipt.number, receipt.donor_id), (number, self.donor.pk))
+        with receipt.file.open('rb') as rendered:
+            html = rendered.read().decode()
+        for shown in (number, 'Ada Lovelace', 'donor@example.com', 'INR 500.00', 'Scholarship fund', 'pay_1',
+                      'For the library'):
+            self.assertIn(shown, html)
+
+    def test_receipt_numbers_name_their_source(self):
+        self.assertEqual(receipts.receipt_number('donation', 42), 'LU-D-00000042')
+        self.assertEqual(receipts.receipt_number('event_donation', 42), 'LU-E-00000042')
+
+    def test_unpaid_donations_have_no_receipt(self):
+        self.assertIsNone(receipts.render_receipt('donation', self.donation.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertFalse(DonationReceipt.objects.exists())
+
+    def test_donor_downloads_the_receipt(self):
+        receipt = self.pay()
+
+        response, html = self.download()
+
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{receipt.number}.html"')
+        self.assertIn(receipt.number, html)
+
+    def test_receipts_are_private_to_the_donor_and_staff(self):
+        self.pay()
+
+        self.client.force_authenticate(make_user('other'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_authenticate(User.objects.create_user(
+            email='staff@example.com', username='staff', password='pass', is_staff=True
+        ))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/donations/receipts/crypto/{self.donation.pk}/').status_code, 404)
+
+    def test_missing_receipt_is_queued(self):
+        Donation.objects.filter(pk=self.donation.pk).update(status='successful')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertTrue(DonationReceipt.objects.filter(donation_id=self.donation.pk).exists())
+        self.download()
+
+    def test_rerendering_replaces_only_a_changed_file(self):
+        first = self.pay().file.name
+
+        self.assertEqual(receipts.render_receipt('donation', self.donation.pk).file.name, first)
+        Donation.objects.filter(pk=self.donation.pk).update(message='For the lab')
+        changed = receipts.render_receipt('donation', self.donation.pk).file.name
+
+        self.assertNotEqual(changed, first)
+        self.assertFalse(default_storage.exists(first))
+        self.assertIn('For the lab', self.download()[1])
+
+
+WEBHOOK_SECRET = 'webhook-secret'
+
+
+def sign(body, secret=WEBHOOK_SECRET):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class WebhookTests(TestCase):
+    url = '/api/donations/webhook/'
+
+    def setUp(self):
+        self.donor = make_user('donor')
+        self.campaign = make_campaign(self.donor)
+        self.donation = Donation.objects.create(
+            donor=self.donor, campaign=self.campaign, amount=Decimal('500'), razorpay_order_id='order_1'
+        )
+        self.client = APIClient()
+
+    def payload(self, event='payment.captured'):
+        return {
+            'event': event,
+            'payload': {'payment': {'entity': {'id': 'pay_1', 'order_id': 'order_1'}}},
+        }
+
+    def deliver(self, payload, event_id='evt_1', signature=None):
+        body = json.dumps(payload).encode()
+        headers = {'HTTP_X_RAZORPAY_SIGNATURE': signature if signature is not None else sign(body)}
+        if event_id:
+            headers['HTTP_X_RAZORPAY_EVENT_ID'] = event_id
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def test_signature_is_checked(self):
+        body = json.dumps(self.payload()).encode()
+
+        self.assertTrue(payments.webhook_signature_valid(body, sign(body)))
+        self.assertFalse(payments.webhook_signature_valid(body, sign(body, 'other-secret')))
+        self.assertFalse(payments.webhook_signature_valid(body, ''))
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.deliver(self.payload(), signature=sign(b'tampered'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentWebhookEvent.objects.exists())
+
+    @override_settings(RAZORPAY_WEBHOOK_SECRET='')
+    def test_unconfigured_webhooks_are_refused(self):
+        self.assertEqual(self.deliver(self.payload()).status_code, 503)
+
+    def test_redelivery_is_stored_and_queued_once(self):
+        with self.captureOnCommitCallbacks() as first_queued:
+            first = self.deliver(self.payload())
+        with self.captureOnCommitCallbacks() as retry_queued:
+            retry = self.deliver(self.payload())
+
+        self.assertEqual(first.data['status'], 'queued')
+        self.assertEqual(retry.data['status'], 'duplicate')
+        self.assertEqual(len(first_queued), 1)
+        self.assertEqual(len(retry_queued), 0)
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+
+    def test_deliveries_without_an_event_id_dedup_on_the_body(self):
+        self.deliver(self.payload(), event_id=None)
+        retry = self.deliver(self.payload(), event_id=None)
+
+        self.assertEqual(retry.data['status'], 'duplicate')
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+
+    def test_captured_payment_settles_the_donation_once(self):
+        event, _ = payments.store_webhook('evt_1', self.payload())
+        other, _ = payments.store_webhook('evt_2', self.payload('order.paid'))
+
+        self.assertEqual(payments.process_webhook_event(event.pk), 'processed')
+        self.assertIsNone(payments.process_webhook_event(event.pk))
+        self.assertEqual(payments.process_webhook_event(other.pk), 'processed')
+
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, 'successful')
+        self.assertEqual(self.donation.razorpay_payment_id, 'pay_1')
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.current_amount, Decimal('500'))
+        self.assertEqual(LedgerEntry.objects.filter(source='donation').count(), 1)
+
+    def test_failure_never_undoes_a_settled_payment(self):
+        payments.settle('order_1', 'pay_1')
+        event, _ = payments.store_webhook('evt_1', self.payload('payment.failed'))
+
+        self.assertEqual(payments.process_webhook_event(event.pk), 'ignored')
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, 'successful')
+
+    def test_unknown_order_is_ignored(self):
+        payload = self.payload()
+        payload['payload']['payment']['entity']['order_id'] = 'order_unknown'
+        event, _ = payments.store_webhook('evt_1', payload)
+
+        self.assertEqual(payments.process_webhook_event(event.pk), 'ignored')
+        self.assertFalse(LedgerEntry.objects.exists())
+
+
+class GatewayTests(SimpleTestCase):
+    read_timeout = 0.2
+
+    def setUp(self):
+        self.stub = StubGateway(('127.0.0.1', 0), 'stub-secret')
+        self.stub.start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+
+        stub_settings = override_settings(
+            PAYMENT_GATEWAY_URL=self.stub.url,
+            RAZORPAY_KEY_ID='rzp_test_stub',
+            RAZORPAY_KEY_SECRET='stub-secret',
+            PAYMENT_GATEWAY_READ_TIMEOUT=self.read_timeout,
+            PAYMENT_GATEWAY_BACKOFF=0,
+        )
+        stub_settings.enable()
+        self.addCleanup(stub_settings.disable)
+        breaker = mock.patch.object(gateway, 'breaker', gateway.CircuitBreaker(threshold=2, reset_timeout=0.5))
+        self.breaker = breaker.start()
+        self.addCleanup(breaker.stop)
+        gateway.reset()
+        self.addCleanup(gateway.reset)
+
+    def slow_down(self):
+        self.stub.latency = self.read_timeout * 2
+        # Let the stub finish the requests it is still sleeping on
+        self.addCleanup(time.sleep, self.stub.latency)
+
+    def test_orders_are_created(self):
+        order = gateway.create_order(10000, 'INR', receipt='r-1')
+
+        self.assertEqual(order['amount'], 10000)
+        self.assertIn(order['id'], self.stub.orders)
+
+    def test_declined_requests_do_not_trip_the_breaker(self):
+        for _ in range(3):
+            with self.assertRaises(gateway.GatewayError) as raised:
+                gateway.create_order(10, 'INR')
+            self.assertNotIsInstance(raised.exception, gateway.GatewayUnavailable)
+
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_slow_gateway_raises_unavailable(self):
+        self.slow_down()
+        started = time.monotonic()
+
+        with self.assertRaises(gateway.GatewayUnavailable):
+            gateway.create_order(10000, 'INR')
+
+        self.assertLess(time.monotonic() - started, self.stub.latency)
+
+    def test_order_creation_is_not_retried_after_a_read_timeout(self):
+        self.slow_down()
+
+        with self.assertRaises(gateway.GatewayUnavailable):
+            gateway.create_order(10000, 'INR')
+        time.sleep(self.stub.latency)
+
+        # The gateway may have created the order; a retry would create another
+        self.assertEqual(len(self.stub.orders), 1)
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        self.slow_down()
+        for _ in range(2):
+            with self.assertRaises(gateway.GatewayUnavailable):
+                gateway.create_order(10000, 'INR')
+        self.assertEqual(self.breaker.state, 'open')
+
+        started = time.monotonic()
+        with self.assertRaises(gateway.GatewayUnavailable):
+            gateway.create_order(10000, 'INR')
+        self.assertLess(time.monotonic() - started, self.read_timeout)
+
+        time.sleep(self.breaker.reset_timeout)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.stub.latency = 0
+        gateway.create_order(10000, 'INR')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_failed_trial_reopens_the_breaker(self):
+        self.slow_down()
+        for _ in range(2):
+            with self.assertRaises(gateway.GatewayUnavailable):
+                gateway.create_order(10000, 'INR')
+        time.sleep(self.breaker.reset_timeout)
+
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, 'open')
+
+
+class BenchmarkGatewayTests(SimpleTestCase):
+    def test_request_count_must_be_positive(self):
+        for count in ('0', '-3'):
+            with self.assertRaises(CommandError):
+                call_command('benchmark_gateway', '--requests', count)
+
+    def test_benchmark_reports_against_the_stub(self):
+        out = StringIO()
+
+        call_command(
+            'benchmark_gateway', '--requests', '6', '--workers', '2', '--latency', '0', '--jitter', '0',
+            stdout=out,
+        )
+
+        self.assertIn('calls: 6', out.getvalue())
+        self.assertIn('outcomes: ok=6', out.getvalue())
@@ -9,5 +9,11 @@ urlpatterns = [
     # Donation endpoints
     path('', views.DonationListCreateView.as_view(), name='donation-list-create'),
     path('verify/', views.verify_payment, name='verify-payment'),
+    path('webhook/', views.razorpay_webhook, name='razorpay-webhook'),
+    path('receipts/<str:source>/<int:donation_id>/', views.donation_receipt, name='donation-receipt'),
     path('key/', views.get_razorpay_key, name='get-razorpay-key'),
+    path('export/', views.export_donations, name='export-donations'),
+    path('stats/', views.donation_stats, name='donation-stats'),
+    path('leaderboard/', views.donation_leaderboard, name='donation-leaderboard'),
+    path('cohorts/', views.donation_cohorts, name='donation-cohorts'),
 ] 
\ No newline at end of file
@@ -1,24 +1,29 @@
-import razorpay
+import logging
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.http import FileResponse
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from .models import Donation, DonationCampaign
+from .models import CohortRollup, Donation, DonationCampaign, DonationHourlyRollup, DonationReceipt, DonationRollup
 from .serializers import DonationSerializer, DonationCampaignSerializer
 from .permissions import IsAdminUser
+from linkup_backend.caching import CatalogueCacheMixin
+from linkup_backend.exports import export_response
+from linkup_backend.tasks import submit_on_commit
+from .exports import donations_export
+from . import analytics, gateway, ledger, payments, receipts
 import json
 import hmac
 import hashlib
 import time
 
-# Initialize Razorpay client with proper error handling
-try:
-    razorpay_client = razorpay.Client(
-        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-    )
-except Exception as e:
-    print(f"Failed to initialize Razorpay client: {str(e)}")
-    razorpay_client = None
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -45,7 +50,7 @@ class DonationListCreateView(generics.ListCreateAPIView):
     def create(self, request, *args, **kwargs):
         try:
             # Check if Razorpay is properly configured
-            if not razorpay_client:
+            if not gateway.is_configured():
                 return Response({
                     'error': 'Payment system error',
                     'message': 'Payment system is not properly configured'
@@ -98,7 +103,7 @@ class DonationListCreateView(generics.ListCreateAPIView):
                     }
                 }
                 
-                order = razorpay_client.order.create(data=order_data)
+                order = gateway.create_order(**order_data)
                 
                 # Save the donation
                 donation = serializer.save(
@@ -116,7 +121,12 @@ class DonationListCreateView(generics.ListCreateAPIView):
                     'notes': order_data['notes']
                 })
                 
-            except razorpay.errors.BadRequestError as e:
+            except gateway.GatewayUnavailable as e:
+                return Response({
+                    'error': 'Payment system error',
+                    'message': str(e)
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '30'})
+            except gateway.GatewayError as e:
                 return Response({
                     'error': 'Razorpay error',
                     'message': str(e)
@@ -140,42 +150,32 @@ def verify_payment(request):
         }
 
         try:
-            # Verify signature
-            razorpay_client.utility.verify_payment_signature(params_dict)
-            
-            # Get payment details from Razorpay
-            payment = razorpay_client.payment.fetch(params_dict['razorpay_payment_id'])
-            
-            # Update donation status
-            donation = Donation.objects.get(razorpay_order_id=params_dict['razorpay_order_id'])
-            donation.razorpay_payment_id = params_dict['razorpay_payment_id']
-            donation.razorpay_signature = params_dict['razorpay_signature']
-            donation.status = 'successful'
-            donation.save()
-
-            # Update campaign amount if this donation is for a campaign
-            if donation.campaign:
-                campaign = donation.campaign
-                campaign.current_amount += donation.amount
-                campaign.save()
+            # Verify signature; a valid one proves the payment without calling the gateway
+            gateway.verify_payment_signature(params_dict)
+
+            # Marks the donation paid and credits its campaign once, however often it is verified
+            donation = payments.settle(
+                params_dict['razorpay_order_id'],
+                params_dict['razorpay_payment_id'],
+                params_dict['razorpay_signature'],
+            )
+            if donation is None:
+                raise Donation.DoesNotExist('Donation not found')
 
             return Response({
                 'status': 'success',
-                'payment_id': payment['id'],
-                'order_id': payment['order_id'],
-                'method': payment.get('method', ''),
-                'amount': float(payment['amount']) / 100,  # Convert from smallest currency unit
-                'currency': payment['currency'],
-                'email': payment['email'],
-                'contact': payment.get('contact', ''),
+                'payment_id': donation.razorpay_payment_id,
+                'order_id': donation.razorpay_order_id,
+                'amount': float(donation.amount),
+                'currency': donation.currency,
+                'email': request.user.email,
+                'receipt_url': receipts.receipt_url('donation', donation.pk, request),
                 'message': 'Payment verified successfully'
             })
-            
+
         except Exception as e:
-            # Update donation status to failed
-            donation = Donation.objects.get(razorpay_order_id=params_dict['razorpay_order_id'])
-            donation.status = 'failed'
-            donation.save()
+            # Update donation status to failed, never undoing a verified payment
+            payments.fail(params_dict['razorpay_order_id'])
             
             return Response({
                 'status': 'failed',
@@ -190,12 +190,202 @@ def verify_payment(request):
             'message': 'Invalid payment verification request'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-class DonationCampaignListCreateView(generics.ListCreateAPIView):
+class DonationCampaignListCreateView(CatalogueCacheMixin, generics.ListCreateAPIView):
     queryset = DonationCampaign.objects.filter(is_active=True)
+    cache_models = (DonationCampaign, User)
     serializer_class = DonationCampaignSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class DonationCampaignDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DonationCampaignDetailView(CatalogueCacheMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = DonationCampaign.objects.all()
+    cache_models = (DonationCampaign, User)
     serializer_class = DonationCampaignSerializer
-    permission_classes = [permissions.IsAuthenticated, IsAdminUser] 
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated, IsAdminUser]
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_donations(request):
+    """Download donations as CSV/XLSX, optionally for one campaign or status"""
+    return export_response(
+        request,
+        donations_export,
+        request.query_params.get('campaign'),
+        request.query_params.get('status'),
+    )
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def donation_stats(request):
+    """
+    Donation totals from the materialized daily rollups. With `target`, the
+    totals and unique donors of that campaign or funding request, with its
+    daily series over the last `days`, or with `interval=hour` its hourly
+    series over the last `hours`; otherwise the totals of every target of
+    the `source`.
+    """
+    source = request.query_params.get('source', 'donation')
+    if source not in ledger.TARGETS:
+        return _bad_source()
+    rollups = DonationRollup.objects.filter(source=source)
+
+    target = request.query_params.get('target')
+    if not target:
+        totals = (
+            rollups.values('target_id')
+            .annotate(amount=Sum('amount'), count=Sum('count'))
+            .order_by('-amount')
+        )
+        return Response({'source': source, 'targets': list(totals)})
+
+    try:
+        target = int(target)
+        days = min(int(request.query_params.get('days', 30)), 366)
+        hours = min(int(request.query_params.get('hours', 48)), 24 * settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+    except ValueError:
+        return Response({'detail': 'target, days and hours must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    rollups = rollups.filter(target_id=target)
+
+    totals = rollups.aggregate(amount=Sum('amount'), count=Sum('count'))
+    data = {
+        'source': source,
+        'target': target,
+        'amount': totals['amount'] or 0,
+        'count': totals['count'] or 0,
+        'donors': analytics.donor_count(source, target),
+    }
+    if request.query_params.get('interval') == 'hour':
+        since = timezone.now() - timedelta(hours=hours)
+        data['hourly'] = list(
+            DonationHourlyRollup.objects.filter(source=source, target_id=target, hour__gt=since)
+            .values('hour', 'amount', 'count')
+        )
+    else:
+        since = timezone.localdate() - timedelta(days=days - 1)
+        data['daily'] = list(rollups.filter(day__gte=since).values('day', 'amount', 'count'))
+    return Response(data)
+
+
+def _bad_source():
+    return Response(
+        {'detail': f"source must be one of: {', '.join(ledger.TARGETS)}"},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _rollup_target(request):
+    """(source, target id) named by the query, or an error response"""
+    source = request.query_params.get('source', 'donation')
+    if source not in ledger.TARGETS:
+        return None, _bad_source()
+    try:
+        return (source, int(request.query_params['target'])), None
+    except (KeyError, ValueError):
+        return None, Response({'detail': 'target must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def donation_leaderboard(request):
+    """Top donors of a campaign or funding request, from the donor totals; anonymous givers stay unnamed"""
+    target, error = _rollup_target(request)
+    if error:
+        return error
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), settings.DONATION_LEADERBOARD_MAX))
+    except ValueError:
+        return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    donors = []
+    for rank, total in enumerate(analytics.leaderboard(*target, limit), start=1):
+        donors.append({
+            'rank': rank,
+            'donor': None if total.anonymous else total.contributor_id,
+            'name': 'Anonymous' if total.anonymous else (
+                total.contributor.get_full_name() or total.contributor.username
+            ),
+            'amount': total.amount,
+            'count': total.count,
+        })
+    return Response({'source': target[0], 'target': target[1], 'donors': donors})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def donation_cohorts(request):
+    """Amount, donations and unique donors of a campaign or funding request per graduation year"""
+    target, error = _rollup_target(request)
+    if error:
+        return error
+
+    cohorts = CohortRollup.objects.filter(source=target[0], target_id=target[1])
+    return Response({
+        'source': target[0],
+        'target': target[1],
+        'cohorts': [
+            {
+                'graduation_year': cohort.graduation_year or None,
+                'amount': cohort.amount,
+                'count': cohort.count,
+                'donors': cohort.donors,
+            }
+            for cohort in cohorts
+        ],
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def razorpay_webhook(request):
+    """
+    Payment events pushed by the gateway, so donations settle even when the
+    donor's browser never calls verify. Stored once per event id and applied
+    by a worker; the gateway only waits for the insert.
+    """
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        return Response({'detail': 'Webhooks are not configured'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    body = request.body
+    if not payments.webhook_signature_valid(body, request.headers.get('X-Razorpay-Signature', '')):
+        return Response({'detail': 'Invalid signature'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return Response({'detail': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+    event_id = request.headers.get('X-Razorpay-Event-Id') or hashlib.sha256(body).hexdigest()
+    event, created = payments.store_webhook(event_id, payload)
+    if created:
+        submit_on_commit(payments.process_webhook_event, event.pk)
+    return Response({'status': 'queued' if created else 'duplicate'})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def donation_receipt(request, source, donation_id):
+    """
+    Download the receipt of a successful donation; donors get their own,
+    staff any. Receipts are rendered in the background after payment, so one
+    still being rendered (or never rendered) answers 202 and is queued.
+    """
+    if source not in receipts.SOURCES:
+        return Response({'detail': 'Receipt not found'}, status=status.HTTP_404_NOT_FOUND)
+    donation = receipts.paid_donations(source).select_related(None).filter(pk=donation_id).only('pk', 'donor').first()
+    if donation is None or not (request.user.is_staff or donation.donor_id == request.user.pk):
+        return Response({'detail': 'Receipt not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    receipt = DonationReceipt.objects.filter(source=source, donation_id=donation_id).first()
+    if receipt is None:
+        receipts.schedule_receipt(source, donation_id)
+        return Response(
+            {'status': 'pending', 'detail': 'The receipt is being generated'},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Retry-After': '5'}
+        )
+
+    return FileResponse(
+        receipt.file.open('rb'),
+        as_attachment=True,
+        filename=f'{receipt.number}.html',
+        content_type='text/html; charset=utf-8',
+    )
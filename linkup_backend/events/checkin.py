@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from linkup_backend.caching import bump_model_version
+from .models import Event, EventRegistration
+
+CHECK_IN_SALT = 'events.check-in'
+
+# Outcomes reported per scanned code
+CHECKED_IN = 'checked_in'
+ALREADY_CHECKED_IN = 'already_checked_in'
+NOT_REGISTERED = 'not_registered'
+INVALID = 'invalid'
+INVALID_TIME = 'invalid_time'
+
+_signer = signing.Signer(salt=CHECK_IN_SALT)
+
+
+class CheckInError(Exception):
+    """Raised when a batch of scans is malformed as a whole"""
+
+
+def check_in_code(registration):
+    """Signed code for the registration's QR ticket: '<event>-<registration>:<signature>'"""
+    return _signer.sign(f'{registration.event_id}-{registration.pk}')
+
+
+def registration_id_for_code(code, event_id):
+    """
+    Return the registration id carried by a code issued for this event, or
+    None when the code is forged or belongs to another event. Needs no query.
+    """
+    try:
+        value = _signer.unsign(code)
+    except (signing.BadSignature, TypeError):
+        return None
+    code_event, _, registration_id = value.partition('-')
+    if code_event != str(event_id) or not registration_id.isdigit():
+        return None
+    return int(registration_id)
+
+
+def _scan_time(value, now):
+    """
+    Device timestamp of an offline scan, never later than the upload itself;
+    None when it is malformed, so only that scan is rejected
+    """
+    try:
+        scanned_at = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        # Well formed but impossible, e.g. month 13
+        return None
+    if scanned_at is None:
+        return None
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return min(scanned_at, now)
+
+
+def normalize_scans(data):
+    """
+    Accept either live scans (`codes`: [code, ...], stamped now) or an offline
+    queue uploaded by a door device (`scans`: [{code, scanned_at}, ...]).
+    Returns a list of (code, scanned_at); scanned_at is None for scans with
+    an unreadable time.
+    """
+    now = timezone.now()
+    if 'scans' in data:
+        scans = data['scans']
+        if not isinstance(scans, list) or not all(isinstance(scan, dict) for scan in scans):
+            raise CheckInError('scans must be a list of {code, scanned_at} objects')
+        normalized = [(scan.get('code'), _scan_time(scan.get('scanned_at'), now)) for scan in scans]
+    else:
+        codes = data.get('codes')
+        if not isinstance(codes, list):
+            raise CheckInError('Provide codes or scans')
+        normalized = [(code, now) for code in codes]
+
+    if not normalized:
+        raise CheckInError('No scans to check in')
+    if len(normalized) > settings.CHECK_IN_MAX_BATCH:
+        raise CheckInError(f'At most {settings.CHECK_IN_MAX_BATCH} scans per request')
+    return normalized
+
+
+def check_in(event, scans):
+    """
+    Mark the registrations behind a batch of scans as attended. Signatures are
+    verified in memory, the registrations are loaded with one query and written
+    back with one bulk_update. Scanning a ticket twice, online or from several
+    offline devices, keeps the earliest check-in time.
+    Returns a list of {code, result} in the order of the scans.
+    """
+    earliest = {}
+    registration_ids = []
+    for code, scanned_at in scans:
+        registration_id = registration_id_for_code(code, event.pk)
+        registration_ids.append(registration_id)
+        if registration_id is not None and scanned_at is not None:
+            previous = earliest.get(registration_id)
+            if previous is None or scanned_at < previous:
+                earliest[registration_id] = scanned_at
+
+    registrations = EventRegistration.objects.filter(event=event, id__in=list(earliest)).only(
+        'id', 'status', 'checked_in_at'
+    )
+    outcomes = {}
+    changed = []
+    now = timezone.now()
+    for registration in registrations:
+        scanned_at = earliest[registration.pk]
+        if registration.status not in EventRegistration.SEATED_STATUSES:
+            outcomes[registration.pk] = NOT_REGISTERED
+        elif registration.checked_in_at is not None and registration.checked_in_at <= scanned_at:
+            outcomes[registration.pk] = ALREADY_CHECKED_IN
+        else:
+            outcomes[registration.pk] = (
+                CHECKED_IN if registration.checked_in_at is None else ALREADY_CHECKED_IN
+            )
+            registration.status = 'attended'
+            registration.checked_in_at = scanned_at
+            registration.updated_at = now
+            changed.append(registration)
+
+    if changed:
+        EventRegistration.objects.bulk_update(changed, ['status', 'checked_in_at', 'updated_at'], batch_size=500)
+        # Attendance shows up as the viewer's status in cached event listings
+        bump_model_version(Event)
+
+    results = []
+    reported = set()
+    for (code, scanned_at), registration_id in zip(scans, registration_ids):
+        if registration_id is None:
+            result = INVALID
+        elif scanned_at is None:
+            result = INVALID_TIME
+        elif registration_id not in outcomes:
+            result = NOT_REGISTERED
+        elif registration_id in reported:
+            result = ALREADY_CHECKED_IN
+        else:
+            result = outcomes[registration_id]
+            reported.add(registration_id)
+        results.append({'code': code, 'result': result})
+    return results
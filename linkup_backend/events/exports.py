@@ -0,0 +1,33 @@
+from linkup_backend.exports import Export
+from .models import Event, EventRegistration
+
+
+def registrations_export(event_id):
+    event = Event.objects.only('id', 'title').get(pk=event_id)
+    queryset = (
+        EventRegistration.objects.filter(event_id=event_id)
+        .select_related('participant')
+        .only(
+            'id', 'status', 'registration_date', 'checked_in_at', 'notes',
+            'participant__first_name', 'participant__last_name', 'participant__email',
+            'participant__graduation_year', 'participant__department',
+        )
+        .order_by('id')
+    )
+    return Export(
+        f'event-{event.pk}-registrations',
+        ['Registration', 'Name', 'Email', 'Graduation year', 'Department',
+         'Status', 'Registered at', 'Checked in at', 'Notes'],
+        queryset,
+        lambda registration: (
+            registration.pk,
+            registration.participant.get_full_name(),
+            registration.participant.email,
+            registration.participant.graduation_year,
+            registration.participant.department,
+            registration.status,
+            registration.registration_date,
+            registration.checked_in_at,
+            registration.notes,
+        ),
+    )
@@ -0,0 +1,190 @@
+import hashlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from linkup_backend.caching import model_versions
+from mentorship.models import Meeting
+from .models import Event, EventRegistration
+
+FEED_SALT = 'events.calendar-feed'
+RENDERING_KEY = 'calendar:feed:{}'
+
+PRODID = '-//LinkUp//Alumni Calendar//EN'
+
+
+def feed_token(user):
+    """Signed, URL-safe token identifying a user's calendar feed"""
+    return signing.dumps(user.pk, salt=FEED_SALT)
+
+
+def user_for_token(token):
+    """Return the user id in a feed token, or None when it was tampered with"""
+    try:
+        return signing.loads(token, salt=FEED_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def _user_stamp(user_id):
+    """
+    (token, last modified) of a user's own registrations and meetings, read
+    from the database so every process sees a change at once. Counts catch
+    deletions, the latest updated_at catches in-place edits.
+    """
+    registrations = EventRegistration.objects.filter(participant_id=user_id).aggregate(
+        count=Count('id'), last=Max('updated_at')
+    )
+    meetings = Meeting.objects.filter(
+        Q(meeting_request__mentor_id=user_id) | Q(meeting_request__mentee_id=user_id)
+    ).aggregate(count=Count('id'), last=Max('updated_at'))
+    token = f"{registrations['count']}-{registrations['last']}-{meetings['count']}-{meetings['last']}"
+    last = [stats['last'].timestamp() for stats in (registrations, meetings) if stats['last']]
+    return token, int(max(last, default=0))
+
+
+def feed_state(user_id):
+    """
+    (etag, last modified) for a feed: the user's own stamp plus the shared
+    event and meeting stamps, since edits to an event reach every attendee.
+    """
+    user_token, user_modified = _user_stamp(user_id)
+    shared = model_versions([Event, Meeting])
+    parts = [str(user_id), user_token] + [token for token, _ in shared]
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    last_modified = max([user_modified] + [modified for _, modified in shared])
+    return etag, datetime.fromtimestamp(last_modified, tz=dt_timezone.utc)
+
+
+def _escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # RFC 5545: content lines are folded at 75 octets
+    data = line.encode()
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        chunk = data[:limit]
+        # Never split a multi-byte character
+        while chunk and (data[len(chunk):len(chunk) + 1] or b'\x00')[0] & 0xC0 == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode())
+        data = data[len(chunk):]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _vevent(uid, start, end, summary, description='', location='', url='', status='CONFIRMED', stamp=None):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{_utc(stamp or timezone.now())}',
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(end)}',
+        f'SUMMARY:{_escape(summary)}',
+        f'STATUS:{status}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{_escape(description)}')
+    if location:
+        lines.append(f'LOCATION:{_escape(location)}')
+    if url:
+        lines.append(f'URL:{url}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def _event_entries(user_id, since):
+    registrations = (
+        EventRegistration.objects.filter(
+            participant_id=user_id,
+            status__in=['registered', 'attended', 'waitlisted'],
+            event__end_date__gte=since,
+        )
+        .select_related('event')
+        .order_by('event__start_date')
+    )
+    for registration in registrations.iterator(chunk_size=500):
+        event = registration.event
+        yield _vevent(
+            f'event-{event.pk}@linkup',
+            event.start_date,
+            event.end_date,
+            event.title,
+            description=event.description,
+            location=event.location,
+            url=event.meeting_link if event.is_virtual else '',
+            status='TENTATIVE' if registration.status == 'waitlisted' else 'CONFIRMED',
+            stamp=event.updated_at,
+        )
+
+
+def _meeting_entries(user_id, since):
+    meetings = (
+        Meeting.objects.filter(
+            Q(meeting_request__mentor_id=user_id) | Q(meeting_request__mentee_id=user_id),
+            scheduled_date__gte=since.date(),
+        )
+        .exclude(status='cancelled')
+        .select_related('meeting_request__mentor', 'meeting_request__mentee')
+        .order_by('scheduled_date', 'scheduled_time')
+    )
+    for meeting in meetings.iterator(chunk_size=500):
+        request = meeting.meeting_request
+        other = request.mentee if request.mentor_id == user_id else request.mentor
+        start = timezone.make_aware(datetime.combine(meeting.scheduled_date, meeting.scheduled_time))
+        yield _vevent(
+            f'meeting-{meeting.pk}@linkup',
+            start,
+            start + timedelta(minutes=meeting.duration_minutes),
+            f'Mentorship: {request.topic} with {other.get_full_name() or other.username}',
+            description=request.description,
+            location=meeting.meeting_link,
+            url=meeting.meeting_link,
+            stamp=meeting.updated_at,
+        )
+
+
+def iter_feed(user_id):
+    """Yield the iCalendar document for a user piece by piece"""
+    since = timezone.now() - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:LinkUp',
+        'X-PUBLISHED-TTL:PT1H',
+    ])
+    yield from _event_entries(user_id, since)
+    yield from _meeting_entries(user_id, since)
+    yield 'END:VCALENDAR\r\n'
+
+
+def cached_feed(etag):
+    return cache.get(RENDERING_KEY.format(etag))
+
+
+def stream_and_cache(user_id, etag):
+    """Stream the feed while collecting it, then cache the full rendering"""
+    chunks = []
+    for chunk in iter_feed(user_id):
+        chunks.append(chunk)
+        yield chunk
+    cache.set(RENDERING_KEY.format(etag), ''.join(chunks), settings.CALENDAR_FEED_CACHE_TIMEOUT)
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from events import registration as registration_engine
+from events.models import Event, EventRegistration
+
+# Retries for backends that report lock contention as an error (SQLite)
+MAX_ATTEMPTS = 200
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent registrations (and optionally cancellations) at one '
+        'event and check that it is never overbooked'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Simultaneous registrants (default: 2000)')
+        parser.add_argument('--capacity', type=int, default=500, help='Event capacity (default: 500)')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent threads (default: 32)')
+        parser.add_argument(
+            '--cancel-ratio',
+            type=float,
+            default=0.2,
+            help='Share of registrants who cancel while sign-ups are still running (default: 0.2)',
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark event and users')
+
+    def handle(self, *args, **options):
+        users_count, capacity = options['users'], options['capacity']
+        if users_count < 1 or capacity < 1:
+            raise CommandError('--users and --capacity must be positive')
+
+        run = uuid.uuid4().hex[:8]
+        now = timezone.now()
+        unusable = make_password(None)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench-{run}-{i}', email=f'bench-{run}-{i}@example.invalid', password=unusable)
+            for i in range(users_count)
+        ])
+        users = list(CustomUser.objects.filter(username__startswith=f'bench-{run}-'))
+        event = Event.objects.create(
+            title=f'Registration benchmark {run}',
+            description='Concurrency benchmark',
+            start_date=now + timedelta(days=30),
+            end_date=now + timedelta(days=31),
+            max_participants=capacity,
+            organizer=users[0],
+        )
+
+        cancelling = set(random.sample(range(users_count), int(users_count * options['cancel_ratio'])))
+        self.retries = 0
+        self.lock = threading.Lock()
+
+        def attempt(func, *args):
+            for _ in range(MAX_ATTEMPTS):
+                try:
+                    return func(*args)
+                except OperationalError:
+                    with self.lock:
+                        self.retries += 1
+                    time.sleep(random.uniform(0.001, 0.02))
+                finally:
+                    connections.close_all()
+            raise CommandError('Gave up after repeated lock errors')
+
+        def participant(index):
+            user = users[index]
+            attempt(registration_engine.register, event, user)
+            if index in cancelling:
+                attempt(registration_engine.cancel, event, user)
+
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                list(pool.map(participant, range(users_count)))
+            elapsed = time.monotonic() - started
+
+            ok = self.verify(event, capacity, users_count, len(cancelling))
+            operations = users_count + len(cancelling)
+            self.stdout.write(
+                f'{operations} operations in {elapsed:.2f}s ({operations / elapsed:.0f}/s), '
+                f'{self.retries} lock retries'
+            )
+        finally:
+            if not options['keep']:
+                event.delete()
+                CustomUser.objects.filter(username__startswith=f'bench-{run}-').delete()
+
+        if not ok:
+            raise CommandError('Registration invariants violated')
+        self.stdout.write(self.style.SUCCESS('No overbooking: all registration invariants hold'))
+
+    def verify(self, event, capacity, users_count, cancelled):
+        event.refresh_from_db()
+        counts = {status: 0 for status, _ in EventRegistration.STATUS_CHOICES}
+        for status in EventRegistration.objects.filter(event=event).values_list('status', flat=True):
+            counts[status] += 1
+        seated = counts['registered'] + counts['attended']
+        expected_seated = min(capacity, users_count - cancelled)
+
+        self.stdout.write(
+            f"capacity {capacity}, counter {event.registered_count}, registered {counts['registered']}, "
+            f"waitlisted {counts['waitlisted']}, cancelled {counts['cancelled']}"
+        )
+        checks = [
+            (seated <= capacity, 'more seated registrations than capacity'),
+            (event.registered_count == seated, 'stored counter differs from seated registrations'),
+            (seated == expected_seated, 'free seats left while participants wait'),
+            (counts['cancelled'] == cancelled, 'cancellations lost'),
+        ]
+        for passed, message in checks:
+            if not passed:
+                self.stderr.write(self.style.ERROR(message))
+        return all(passed for passed, _ in checks)
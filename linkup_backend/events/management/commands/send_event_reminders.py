@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events.notifications import deliver_pending, due_reminders, schedule_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        'Create reminder notifications for events starting within the configured '
+        'EVENT_REMINDER_WINDOWS and deliver any unfinished reminder or announcement '
+        'batches. Safe to rerun; meant to run from cron every few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.EVENT_NOTIFICATION_CHUNK_SIZE,
+            help='Registrations notified per bulk insert (default: EVENT_NOTIFICATION_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the reminders that are due',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            due = 0
+            for label, event in due_reminders():
+                self.stdout.write(f'{label} reminder due for "{event.title}" (#{event.pk})')
+                due += 1
+            self.stdout.write(self.style.SUCCESS(f'{due} reminders due'))
+            return
+
+        scheduled = schedule_reminders()
+        batches, sent = deliver_pending(max(1, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scheduled {len(scheduled)} reminders; delivered {batches} batches '
+            f'({sent} notifications)'
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_alter_donationcampaign_organizer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationcampaign',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='evcampaign_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationcampaign',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['end_date'], name='evcampaign_active_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='events_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['end_date'], name='events_active_end_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_seats(apps, schema_editor):
+    """Initialise the stored seat counter from existing registrations"""
+    Event = apps.get_model('events', 'Event')
+    EventRegistration = apps.get_model('events', 'EventRegistration')
+    seated = (
+        EventRegistration.objects.filter(event=OuterRef('pk'), status__in=['registered', 'attended'])
+        .order_by()
+        .values('event')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Event.objects.update(registered_count=Coalesce(Subquery(seated), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_donationcampaign_evcampaign_active_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_seats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(fields=['event', 'status', 'registration_date', 'id'], name='events_reg_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0005_event_registered_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventNotificationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('reminder', 'Reminder'), ('announcement', 'Announcement')], max_length=20)),
+                ('window', models.CharField(blank=True, max_length=20)),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('last_registration_id', models.PositiveBigIntegerField(default=0)),
+                ('recipient_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_date'], name='events_active_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventregistration',
+            index=models.Index(fields=['event', 'id'], name='events_reg_event_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='eventnotificationbatch',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='event_announcements', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='eventnotificationbatch',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_batches', to='events.event'),
+        ),
+        migrations.AddIndex(
+            model_name='eventnotificationbatch',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['created_at'], name='events_batch_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventnotificationbatch',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'reminder')), fields=('event', 'window'), name='events_reminder_once'),
+        ),
+    ]
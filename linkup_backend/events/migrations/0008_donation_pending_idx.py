@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_eventregistration_checked_in_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(condition=models.Q(('payment_status', 'pending')), fields=['id'], name='evdonation_pending_idx'),
+        ),
+    ]
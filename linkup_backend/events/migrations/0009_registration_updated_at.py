@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_donation_pending_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventregistration',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,9 +1,24 @@
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery, Value
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
 # Create your models here.
 
+class EventQuerySet(models.QuerySet):
+    def with_registration_stats(self, user=None):
+        """
+        Annotate the `viewer_status` of the given user's own registration, so
+        listing events needs no per-row queries. Seat counts are stored on the
+        event itself (`registered_count`).
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(viewer_status=Value(None, output_field=models.CharField()))
+        own_registration = EventRegistration.objects.filter(
+            event=OuterRef('pk'), participant=user
+        ).values('status')[:1]
+        return self.annotate(viewer_status=Subquery(own_registration))
+
 class Event(models.Model):
     EVENT_TYPE_CHOICES = [
         ('webinar', 'Webinar'),
@@ -23,6 +38,8 @@ class Event(models.Model):
     is_virtual = models.BooleanField(default=False)
     max_participants = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum number of participants allowed (leave empty for unlimited)")
     registration_deadline = models.DateTimeField(null=True, blank=True)
+    # Seats taken by registered and attended participants; maintained by events.registration
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
     organizer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='organized_events')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,8 +51,15 @@ class Event(models.Model):
     meeting_id = models.CharField(max_length=100, blank=True, null=True, help_text="Meeting ID (for virtual events)")
     meeting_password = models.CharField(max_length=100, blank=True, null=True, help_text="Meeting password (for virtual events)")
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(is_active=True), name='events_active_created_idx'),
+            models.Index(fields=['end_date'], condition=Q(is_active=True), name='events_active_end_idx'),
+            models.Index(fields=['start_date'], condition=Q(is_active=True), name='events_active_start_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -49,7 +73,7 @@ class Event(models.Model):
     def is_full(self):
         if self.max_participants is None:
             return False
-        return self.registrations.count() >= self.max_participants
+        return self.registered_count >= self.max_participants
 
 class EventRegistration(models.Model):
     STATUS_CHOICES = [
@@ -64,19 +88,63 @@ class EventRegistration(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='registered')
     registration_date = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, help_text="Any special requirements or notes")
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    # Read by the participant's calendar feed to tell when it changed
+    updated_at = models.DateTimeField(auto_now=True)
     
+    # Statuses holding one of the event's seats
+    SEATED_STATUSES = ('registered', 'attended')
+
     class Meta:
         ordering = ['registration_date']
         unique_together = ['event', 'participant']
+        indexes = [
+            # Waitlist queue, oldest first
+            models.Index(fields=['event', 'status', 'registration_date', 'id'], name='events_reg_queue_idx'),
+            # Keyset walk over an event's registrations for batched notifications
+            models.Index(fields=['event', 'id'], name='events_reg_event_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.participant.get_full_name()} - {self.event.title}"
 
-    def save(self, *args, **kwargs):
-        # If the event is full, automatically set status to waitlisted
-        if not self.pk and self.event.is_full and self.status == 'registered':
-            self.status = 'waitlisted'
-        super().save(*args, **kwargs)
+class EventNotificationBatch(models.Model):
+    KIND_CHOICES = [
+        ('reminder', 'Reminder'),
+        ('announcement', 'Announcement'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='notification_batches')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Reminder window label from EVENT_REMINDER_WINDOWS; blank for announcements
+    window = models.CharField(max_length=20, blank=True)
+    title = models.CharField(max_length=100)
+    message = models.TextField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='event_announcements'
+    )
+    # Highest registration id already notified, so an interrupted batch resumes where it stopped
+    last_registration_id = models.PositiveBigIntegerField(default=0)
+    recipient_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Each reminder window is sent at most once per event
+            models.UniqueConstraint(fields=['event', 'window'], condition=Q(kind='reminder'), name='events_reminder_once'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], condition=Q(completed_at__isnull=True), name='events_batch_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.event.title}"
 
 class DonationCampaign(models.Model):
     title = models.CharField(max_length=200)
@@ -106,6 +174,10 @@ class DonationCampaign(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(is_active=True), name='evcampaign_active_created_idx'),
+            models.Index(fields=['end_date'], condition=Q(is_active=True), name='evcampaign_active_end_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -148,6 +220,10 @@ class Donation(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pending donations walked by reconcile_payments
+            models.Index(fields=['id'], condition=Q(payment_status='pending'), name='evdonation_pending_idx'),
+        ]
 
     def __str__(self):
         donor_name = 'Anonymous' if self.is_anonymous else (
@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from authentication.models import Notification
+from .models import Event, EventNotificationBatch, EventRegistration
+
+# Event fields whose change is announced to registrants automatically
+ANNOUNCED_FIELDS = ('start_date', 'end_date', 'location', 'meeting_link')
+
+# Waitlisted participants hear about changes too, but are not reminded of a seat they lack
+ANNOUNCEMENT_STATUSES = EventRegistration.SEATED_STATUSES + ('waitlisted',)
+
+TITLE_MAX_LENGTH = Notification._meta.get_field('title').max_length
+
+
+def _recipient_statuses(batch):
+    if batch.kind == 'reminder':
+        return EventRegistration.SEATED_STATUSES
+    return ANNOUNCEMENT_STATUSES
+
+
+def deliver_batch(batch_id, chunk_size=None):
+    """
+    Notify the registrants of a batch in chunks of registrations walked by id.
+    Each chunk is one bulk_create committed together with the batch cursor, so
+    memory stays bounded and an interrupted batch resumes without duplicates.
+    Returns the number of notifications created by this call.
+    """
+    chunk_size = chunk_size or settings.EVENT_NOTIFICATION_CHUNK_SIZE
+    sent = 0
+    while True:
+        with transaction.atomic():
+            batch = (
+                EventNotificationBatch.objects.select_for_update()
+                .filter(pk=batch_id, completed_at__isnull=True)
+                .first()
+            )
+            if batch is None:
+                return sent
+
+            rows = list(
+                EventRegistration.objects.filter(
+                    event_id=batch.event_id,
+                    status__in=_recipient_statuses(batch),
+                    id__gt=batch.last_registration_id,
+                )
+                .order_by('id')
+                .values_list('id', 'participant_id')[:chunk_size]
+            )
+            if not rows:
+                EventNotificationBatch.objects.filter(pk=batch_id).update(completed_at=timezone.now())
+                return sent
+
+            Notification.objects.bulk_create(
+                [
+                    Notification(user_id=participant_id, title=batch.title, message=batch.message)
+                    for _, participant_id in rows
+                ],
+                batch_size=chunk_size,
+            )
+            EventNotificationBatch.objects.filter(pk=batch_id).update(
+                last_registration_id=rows[-1][0],
+                recipient_count=F('recipient_count') + len(rows),
+            )
+            sent += len(rows)
+
+
+def deliver_pending(chunk_size=None):
+    """Deliver every unfinished batch, oldest first. Returns (batches, notifications)."""
+    pending = (
+        EventNotificationBatch.objects.filter(completed_at__isnull=True)
+        .order_by('created_at')
+        .values_list('id', flat=True)
+    )
+    batches = sent = 0
+    for batch_id in list(pending):
+        sent += deliver_batch(batch_id, chunk_size)
+        batches += 1
+    return batches, sent
+
+
+def create_announcement(event, title, message, created_by=None):
+    return EventNotificationBatch.objects.create(
+        event=event,
+        kind='announcement',
+        title=title[:TITLE_MAX_LENGTH],
+        message=message,
+        created_by=created_by,
+    )
+
+
+def announce_changes(event, previous, created_by=None):
+    """Queue an announcement when an organizer moves or relocates an event"""
+    changed = [
+        field for field in ANNOUNCED_FIELDS
+        if getattr(previous, field) != getattr(event, field)
+    ]
+    if not changed:
+        return None
+
+    start = timezone.localtime(event.start_date)
+    where = event.meeting_link if event.is_virtual and event.meeting_link else event.location
+    return create_announcement(
+        event,
+        f"Event updated: {event.title}",
+        f"{event.title} now takes place on {start:%b %d, %Y at %H:%M %Z} ({where}).",
+        created_by=created_by,
+    )
+
+
+def reminder_windows():
+    """Configured reminder windows as (label, timedelta), narrowest first"""
+    return sorted(
+        ((label, timedelta(minutes=minutes)) for label, minutes in settings.EVENT_REMINDER_WINDOWS.items()),
+        key=lambda window: window[1],
+    )
+
+
+def due_reminders(now=None):
+    """
+    Yield (label, event) for every active event whose start falls inside a
+    reminder window not yet sent. Windows are disjoint: an event starting
+    within the narrowest window only gets that window's reminder.
+    """
+    now = now or timezone.now()
+    lower = now
+    for label, span in reminder_windows():
+        upper = now + span
+        already_sent = EventNotificationBatch.objects.filter(
+            event=OuterRef('pk'), kind='reminder', window=label
+        )
+        events = (
+            Event.objects.filter(is_active=True, start_date__gt=lower, start_date__lte=upper)
+            .exclude(Exists(already_sent))
+            .only('id', 'title', 'start_date', 'location', 'is_virtual', 'meeting_link')
+            .order_by('start_date')
+        )
+        for event in events:
+            yield label, event
+        lower = upper
+
+
+def schedule_reminders(now=None):
+    """Create the reminder batches that are due. Returns the new batches."""
+    created = []
+    for label, event in due_reminders(now):
+        start = timezone.localtime(event.start_date)
+        where = event.meeting_link if event.is_virtual and event.meeting_link else event.location
+        try:
+            with transaction.atomic():
+                batch = EventNotificationBatch.objects.create(
+                    event=event,
+                    kind='reminder',
+                    window=label,
+                    title=f"Reminder: {event.title}"[:TITLE_MAX_LENGTH],
+                    message=f"{event.title} starts on {start:%b %d, %Y at %H:%M %Z} ({where}).",
+                )
+        except IntegrityError:
+            # Another run claimed this window first
+            continue
+        created.append(batch)
+    return created
@@ -0,0 +1,120 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from linkup_backend.caching import bump_model_version
+from .models import Event, EventRegistration
+
+
+class RegistrationError(Exception):
+    """A registration request that cannot be honoured, with a user-facing message"""
+
+
+def _take_seat(event_id):
+    # A single conditional UPDATE: the row lock it takes makes check-and-increment
+    # atomic, so concurrent sign-ups can never push the count past capacity
+    return Event.objects.filter(pk=event_id).filter(
+        Q(max_participants__isnull=True) | Q(registered_count__lt=F('max_participants'))
+    ).update(registered_count=F('registered_count') + 1) == 1
+
+
+def register(event, user, notes=''):
+    """
+    Register a user for an event, or put them on the waitlist when every
+    seat is taken. A previously cancelled registration is reused and joins
+    the back of the queue.
+    """
+    try:
+        with transaction.atomic():
+            registration = (
+                EventRegistration.objects.select_for_update()
+                .filter(event_id=event.pk, participant=user)
+                .first()
+            )
+            if registration is not None and registration.status != 'cancelled':
+                raise RegistrationError('You are already registered for this event')
+
+            status = 'registered' if _take_seat(event.pk) else 'waitlisted'
+            # Seat counts and the viewer's status are part of cached event listings
+            bump_model_version(Event)
+            if registration is None:
+                return EventRegistration.objects.create(
+                    event_id=event.pk, participant=user, status=status, notes=notes
+                )
+
+            registration.status = status
+            registration.notes = notes or registration.notes
+            registration.registration_date = timezone.now()
+            registration.save(update_fields=['status', 'notes', 'registration_date', 'updated_at'])
+            return registration
+    except IntegrityError:
+        # A concurrent request for the same user inserted first; its seat stands
+        raise RegistrationError('You are already registered for this event')
+
+
+def promote_waitlist(event_id):
+    """
+    Hand a free seat to the oldest waitlisted registration. Must run inside
+    the transaction that freed the seat, with the event row locked.
+    """
+    waitlisted = (
+        EventRegistration.objects.select_for_update()
+        .filter(event_id=event_id, status='waitlisted')
+        .order_by('registration_date', 'id')
+        .first()
+    )
+    if waitlisted is None:
+        return None
+    waitlisted.status = 'registered'
+    waitlisted.save(update_fields=['status', 'updated_at'])
+    return waitlisted
+
+
+def cancel(event, user):
+    """
+    Cancel a user's registration. A freed seat goes to the head of the
+    waitlist in the same transaction, or back to the event when nobody waits.
+    """
+    with transaction.atomic():
+        # Serialises cancellations per event so two of them never promote
+        # the same waitlisted registration
+        list(Event.objects.select_for_update().filter(pk=event.pk).values_list('pk', flat=True))
+        registration = (
+            EventRegistration.objects.select_for_update()
+            .filter(event_id=event.pk, participant=user, status__in=['registered', 'waitlisted'])
+            .first()
+        )
+        if registration is None:
+            raise RegistrationError('You are not registered for this event')
+
+        was_seated = registration.status == 'registered'
+        bump_model_version(Event)
+        registration.status = 'cancelled'
+        registration.save(update_fields=['status', 'updated_at'])
+
+        if was_seated and promote_waitlist(event.pk) is None:
+            Event.objects.filter(pk=event.pk, registered_count__gt=0).update(
+                registered_count=F('registered_count') - 1
+            )
+        return registration
+
+
+def recount_seats(event_ids=None):
+    """Rebuild stored seat counts from the registrations, e.g. after manual edits"""
+    events = Event.objects.all()
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+    seated = (
+        EventRegistration.objects.filter(
+            event=OuterRef('pk'), status__in=EventRegistration.SEATED_STATUSES
+        )
+        .order_by()
+        .values('event')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    updated = events.update(registered_count=Coalesce(Subquery(seated), 0))
+    # Queryset updates send no signals
+    bump_model_version(Event)
+    return updated
@@ -2,11 +2,15 @@ from rest_framework import serializers
 from .models import Event, EventRegistration, DonationCampaign, Donation
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from authentication.serializers import AvatarField, LIST_AVATAR_SIZE
+from donations import analytics as donation_analytics
+from donations import receipts as donation_receipts
 
 User = get_user_model()
 
 class UserMinimalSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
+    profile_picture = AvatarField(size=LIST_AVATAR_SIZE)
 
     class Meta:
         model = User
@@ -22,8 +26,8 @@ class EventRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventRegistration
         fields = ['id', 'event', 'participant', 'participant_name', 'participant_email', 
-                 'status', 'registration_date', 'notes']
-        read_only_fields = ['participant', 'status']
+                 'status', 'registration_date', 'notes', 'checked_in_at']
+        read_only_fields = ['participant', 'status', 'checked_in_at']
 
     def get_participant_name(self, obj):
         return obj.participant.get_full_name()
@@ -51,9 +55,12 @@ class EventSerializer(serializers.ModelSerializer):
         return obj.organizer.get_full_name()
 
     def get_registered_participants_count(self, obj):
-        return obj.registrations.filter(status='registered').count()
+        return obj.registered_count
 
     def get_user_registration_status(self, obj):
+        # Annotated by Event.objects.with_registration_stats() in list views
+        if hasattr(obj, 'viewer_status'):
+            return obj.viewer_status
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return None
@@ -133,9 +140,11 @@ class DonationCampaignSerializer(serializers.ModelSerializer):
         return data
 
     def get_total_donors(self, obj):
-        return obj.donations.filter(
-            payment_status='successful'
-        ).values('donor').distinct().count()
+        # Annotated by DonationCampaignViewSet from the donor rollups
+        donors = getattr(obj, 'donor_count', None)
+        if donors is None:
+            donors = donation_analytics.donor_count('event_donation', obj.pk)
+        return donors
 
     def get_time_remaining(self, obj):
         now = timezone.now()
@@ -155,12 +164,14 @@ class DonationCampaignSerializer(serializers.ModelSerializer):
 class DonationSerializer(serializers.ModelSerializer):
     donor = UserMinimalSerializer(read_only=True)
     campaign_title = serializers.CharField(source='campaign.title', read_only=True)
+    receipt_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Donation
         fields = ['id', 'campaign', 'campaign_title', 'donor', 'amount',
                  'payment_status', 'razorpay_payment_id', 'razorpay_order_id',
-                 'razorpay_signature', 'is_anonymous', 'message', 'created_at']
+                 'razorpay_signature', 'is_anonymous', 'message', 'created_at',
+                 'receipt_url']
         read_only_fields = ['payment_status', 'razorpay_payment_id',
                            'razorpay_order_id', 'razorpay_signature']
 
@@ -171,3 +182,8 @@ class DonationSerializer(serializers.ModelSerializer):
                 f"Minimum donation amount is ₹{min_amount}"
             )
         return value
+
+    def get_receipt_url(self, obj):
+        if obj.payment_status != 'successful':
+            return None
+        return donation_receipts.receipt_url('event_donation', obj.pk, self.context.get('request'))
@@ -0,0 +1,6 @@
+from linkup_backend.caching import watch_models
+from .models import DonationCampaign, Event
+
+# Registrations are not watched: every sign-up would bump the shared Event
+# stamp. The registration engine bumps Event itself when seats change.
+watch_models(Event, DonationCampaign)
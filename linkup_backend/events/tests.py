@@ -1,3 +1,587 @@
-from django.test import TestCase
+import threading
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from linkup_backend.caching import model_versions
+
+from authentication.models import Notification
+from mentorship.models import Meeting, MeetingRequest
+from . import checkin, ical, notifications, registration
+from .models import Event, EventNotificationBatch, EventRegistration
+
+User = get_user_model()
+
+
+def make_users(count, prefix='participant'):
+    return [
+        User.objects.create_user(email=f'{prefix}{i}@example.com', username=f'{prefix}{i}', password='pass')
+        for i in range(count)
+    ]
+
+
+def make_event(organizer, max_participants):
+    start = timezone.now() + timedelta(days=7)
+    return Event.objects.create(
+        title='Alumni meetup',
+        description='Meet the alumni',
+        start_date=start,
+        end_date=start + timedelta(hours=2),
+        organizer=organizer,
+        max_participants=max_participants,
+    )
+
+
+def run_in_foreground(func, *args, **kwargs):
+    # Stands in for linkup_backend.tasks.submit so queued work runs inline
+    func(*args, **kwargs)
+
+
+class RegistrationTests(TestCase):
+    def setUp(self):
+        self.organizer, *self.users = make_users(5)
+        self.event = make_event(self.organizer, max_participants=2)
+
+    def statuses(self):
+        return dict(EventRegistration.objects.filter(event=self.event).values_list('participant_id', 'status'))
+
+    def test_seats_fill_up_then_waitlist(self):
+        results = [registration.register(self.event, user).status for user in self.users]
+
+        self.assertEqual(results, ['registered', 'registered', 'waitlisted', 'waitlisted'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 2)
+
+    def test_duplicate_registration_is_rejected(self):
+        registration.register(self.event, self.users[0])
+
+        with self.assertRaises(registration.RegistrationError):
+            registration.register(self.event, self.users[0])
+        self.assertEqual(EventRegistration.objects.filter(event=self.event).count(), 1)
+
+    def test_cancelling_a_seat_promotes_the_oldest_waitlisted(self):
+        for user in self.users:
+            registration.register(self.event, user)
+
+        registration.cancel(self.event, self.users[0])
+
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.users[0].pk], 'cancelled')
+        self.assertEqual(statuses[self.users[2].pk], 'registered')
+        self.assertEqual(statuses[self.users[3].pk], 'waitlisted')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 2)
+
+    def test_cancelling_a_waitlisted_registration_keeps_the_seats(self):
+        for user in self.users:
+            registration.register(self.event, user)
+
+        registration.cancel(self.event, self.users[2])
+
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.users[3].pk], 'waitlisted')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 2)
+
+    def test_cancelling_with_nobody_waiting_frees_the_seat(self):
+        registration.register(self.event, self.users[0])
+
+        registration.cancel(self.event, self.users[0])
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 0)
+        self.assertEqual(registration.register(self.event, self.users[1]).status, 'registered')
+
+    def test_cancelled_registration_rejoins_at_the_back(self):
+        for user in self.users[:3]:
+            registration.register(self.event, user)
+        registration.cancel(self.event, self.users[2])
+
+        self.assertEqual(registration.register(self.event, self.users[2]).status, 'waitlisted')
+        registration.register(self.event, self.users[3])
+        registration.cancel(self.event, self.users[0])
+
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.users[2].pk], 'registered')
+        self.assertEqual(statuses[self.users[3].pk], 'waitlisted')
+
+    def test_recount_seats_matches_the_registrations(self):
+        for user in self.users:
+            registration.register(self.event, user)
+        Event.objects.filter(pk=self.event.pk).update(registered_count=0)
+
+        registration.recount_seats([self.event.pk])
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 2)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentRegistrationTests(TransactionTestCase):
+    seats = 5
+    participants = 20
+
+    def setUp(self):
+        self.organizer, *self.users = make_users(self.participants + 1)
+        self.event = make_event(self.organizer, max_participants=self.seats)
+
+    def run_concurrently(self, func, users):
+        start = threading.Barrier(len(users))
+        errors = []
+
+        def worker(user):
+            try:
+                start.wait()
+                func(self.event, user)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def seated(self):
+        return EventRegistration.objects.filter(event=self.event, status='registered').count()
+
+    def test_concurrent_registrations_never_overbook(self):
+        errors = self.run_concurrently(registration.register, self.users)
+
+        self.assertEqual(errors, [])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, self.seats)
+        self.assertEqual(self.seated(), self.seats)
+        self.assertEqual(
+            EventRegistration.objects.filter(event=self.event, status='waitlisted').count(),
+            self.participants - self.seats
+        )
+
+    def test_concurrent_cancellations_promote_each_waitlisted_once(self):
+        for user in self.users:
+            registration.register(self.event, user)
+        seated = list(
+            EventRegistration.objects.filter(event=self.event, status='registered')
+            .values_list('participant_id', flat=True)
+        )
+
+        errors = self.run_concurrently(registration.cancel, [u for u in self.users if u.pk in seated])
+
+        self.assertEqual(errors, [])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, self.seats)
+        self.assertEqual(self.seated(), self.seats)
+        self.assertEqual(
+            EventRegistration.objects.filter(event=self.event, status='waitlisted').count(),
+            self.participants - 2 * self.seats
+        )
+
+
+class EventListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer, self.viewer, self.other = make_users(3)
+        self.event = make_event(self.organizer, max_participants=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def etag(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertStale(self, etag):
+        self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.etag()
+
+        self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_registration_bumps_the_stamp_after_commit(self):
+        before = model_versions([Event])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            registration.register(self.event, self.other)
+            self.assertEqual(model_versions([Event]), before)
+        for callback in callbacks:
+            callback()
+
+        self.assertNotEqual(model_versions([Event]), before)
+
+    def test_rolled_back_writes_leave_the_stamp(self):
+        before = model_versions([Event])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                registration.register(self.event, self.other)
+                raise RuntimeError('rolled back')
+
+        self.assertEqual(model_versions([Event]), before)
+
+    def test_seat_changes_refresh_the_list(self):
+        etag = self.etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.register(self.event, self.other)
+        self.assertStale(etag)
+        response = self.client.get('/api/events/')
+        self.assertTrue(response.json()['results'][0]['is_full'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.cancel(self.event, self.other)
+        self.assertStale(response['ETag'])
+
+    def test_registrations_are_not_watched_directly(self):
+        [before] = model_versions([EventRegistration])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.register(self.event, self.other)
+
+        self.assertEqual(model_versions([EventRegistration]), [before])
+
+    def test_organizer_changes_refresh_the_list(self):
+        etag = self.etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organizer.first_name = 'Renamed'
+            self.organizer.save()
+
+        self.assertStale(etag)
+        self.assertEqual(self.client.get('/api/events/').json()['results'][0]['organizer_name'], 'Renamed')
+
+    def test_logins_keep_the_list_cached(self):
+        etag = self.etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.organizer)
+
+        self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class EventListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer, self.viewer, self.other = make_users(3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_events_page_through_every_event(self):
+        events = [make_event(self.organizer, max_participants=None) for _ in range(25)]
+
+        first = self.client.get('/api/events/')
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(first.data['count'], 25)
+        self.assertEqual(len(first.data['results']), 20)
+        self.assertIsNone(second.data['next'])
+        seen = [event['id'] for event in first.data['results'] + second.data['results']]
+        self.assertEqual(sorted(seen), sorted(event.pk for event in events))
+
+    def test_page_size_is_capped(self):
+        for _ in range(3):
+            make_event(self.organizer, max_participants=None)
+
+        self.assertEqual(len(self.client.get('/api/events/', {'page_size': 2}).data['results']), 2)
+        self.assertEqual(self.client.get('/api/events/', {'page_size': 500}).data['count'], 3)
+
+    def test_list_carries_seats_and_the_viewers_status(self):
+        full = make_event(self.organizer, max_participants=1)
+        registration.register(full, self.other)
+        registration.register(full, self.viewer)
+
+        [event] = self.client.get('/api/events/').data['results']
+
+        self.assertEqual(event['registered_participants_count'], 1)
+        self.assertTrue(event['is_full'])
+        self.assertEqual(event['user_registration_status'], 'waitlisted')
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        make_event(self.organizer, max_participants=None)
+        # The first request also creates the version stamps
+        self.client.get('/api/events/')
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/events/')
+
+        for user in make_users(5, prefix='organizer'):
+            for _ in range(4):
+                registration.register(make_event(user, max_participants=1), self.viewer)
+        cache.clear()
+
+        with self.assertNumQueries(len(small)):
+            response = self.client.get('/api/events/')
+        self.assertEqual(len(response.data['results']), 20)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer, self.attendee, self.mentor = make_users(3)
+        self.event = make_event(self.organizer, max_participants=1)
+        self.client = APIClient()
+        self.url = f'/api/events/calendar/{ical.feed_token(self.attendee)}.ics'
+
+    def body(self, response):
+        if response.streaming:
+            return b''.join(response.streaming_content).decode()
+        return response.content.decode()
+
+    def feed(self, **headers):
+        response = self.client.get(self.url, **headers)
+        return response, self.body(response) if response.status_code == 200 else ''
+
+    def test_feed_url_is_signed_for_the_user(self):
+        self.client.force_authenticate(self.attendee)
+
+        data = self.client.get('/api/events/calendar/feed-url/').data
+
+        self.assertTrue(data['url'].endswith(self.url))
+        self.assertTrue(data['webcal_url'].startswith('webcal://'))
+        self.assertEqual(ical.user_for_token(ical.feed_token(self.attendee)), self.attendee.pk)
+
+    def test_tampered_tokens_and_inactive_users_get_nothing(self):
+        self.assertEqual(self.client.get('/api/events/calendar/not-a-token.ics').status_code, 404)
+
+        self.attendee.is_active = False
+        self.attendee.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_feed_lists_registrations_and_meetings(self):
+        registration.register(self.event, self.organizer)
+        registration.register(self.event, self.attendee)
+        past = make_event(self.organizer, max_participants=None)
+        Event.objects.filter(pk=past.pk).update(
+            start_date=timezone.now() - timedelta(days=400), end_date=timezone.now() - timedelta(days=399)
+        )
+        registration.register(past, self.attendee)
+        request = MeetingRequest.objects.create(
+            mentor=self.mentor, mentee=self.attendee, topic='Careers', description='Career advice',
+            proposed_date=timezone.localdate(), proposed_time=time(10),
+        )
+        Meeting.objects.create(
+            meeting_request=request, meeting_link='https://meet.example.com/careers', room_name='careers',
+            scheduled_date=timezone.localdate() + timedelta(days=1), scheduled_time=time(10),
+        )
+
+        response, body = self.feed()
+
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn(f'UID:event-{self.event.pk}@linkup', body)
+        self.assertIn('STATUS:TENTATIVE', body)
+        self.assertNotIn(f'UID:event-{past.pk}@linkup', body)
+        self.assertIn('SUMMARY:Mentorship: Careers with participant2', body)
+
+    def test_long_lines_are_folded(self):
+        Event.objects.filter(pk=self.event.pk).update(title='Alumni meetup, café edition ' * 5)
+        registration.register(self.event, self.attendee)
+
+        _, body = self.feed()
+
+        lines = body.split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        unfolded = body.replace('\r\n ', '')
+        self.assertIn('SUMMARY:' + 'Alumni meetup\\, café edition ' * 5, unfolded)
+
+    def test_unchanged_feed_is_not_modified_and_served_from_the_cache(self):
+        registration.register(self.event, self.attendee)
+        first, body = self.feed()
+
+        self.assertTrue(first.streaming)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        second, cached = self.feed()
+        self.assertFalse(second.streaming)
+        self.assertEqual(cached, body)
+
+    def test_registration_changes_refresh_the_feed(self):
+        registration.register(self.event, self.attendee)
+        etag = self.feed()[0]['ETag']
+
+        registration.cancel(self.event, self.attendee)
+        response, body = self.feed(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', body)
+
+
+class EventNotificationTests(TestCase):
+    def setUp(self):
+        self.organizer, *self.users = make_users(5)
+        self.event = make_event(self.organizer, max_participants=3)
+        for user in self.users:
+            registration.register(self.event, user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def starting_in(self, delta):
+        event = make_event(self.organizer, max_participants=None)
+        Event.objects.filter(pk=event.pk).update(start_date=timezone.now() + delta, end_date=timezone.now() + delta * 2)
+        return event
+
+    def notified(self):
+        return sorted(Notification.objects.values_list('user_id', flat=True))
+
+    def test_each_event_gets_its_narrowest_due_window(self):
+        soon = self.starting_in(timedelta(minutes=30))
+        tomorrow = self.starting_in(timedelta(hours=10))
+        self.starting_in(timedelta(days=3))
+
+        batches = notifications.schedule_reminders()
+
+        self.assertEqual(sorted((b.event_id, b.window) for b in batches), sorted([(soon.pk, '1h'), (tomorrow.pk, '24h')]))
+        self.assertEqual(notifications.schedule_reminders(), [])
+
+    def test_reminders_go_to_seated_participants_only(self):
+        batch = EventNotificationBatch.objects.create(event=self.event, kind='reminder', window='1h', title='Soon', message='Soon')
+
+        self.assertEqual(notifications.deliver_batch(batch.pk, chunk_size=2), 3)
+        self.assertEqual(self.notified(), sorted(user.pk for user in self.users[:3]))
+        batch.refresh_from_db()
+        self.assertIsNotNone(batch.completed_at)
+        self.assertEqual(batch.recipient_count, 3)
+        self.assertEqual(notifications.deliver_batch(batch.pk), 0)
+
+    def test_interrupted_batches_resume_after_the_last_notified(self):
+        first = EventRegistration.objects.filter(event=self.event).order_by('id').first()
+        batch = notifications.create_announcement(self.event, 'Moved', 'New room')
+        EventNotificationBatch.objects.filter(pk=batch.pk).update(last_registration_id=first.pk)
+
+        self.assertEqual(notifications.deliver_pending(chunk_size=1), (1, 3))
+        self.assertNotIn(first.participant_id, self.notified())
+
+    def test_moving_an_event_announces_it_to_the_waitlist_too(self):
+        with mock.patch('linkup_backend.tasks.submit', run_in_foreground), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/events/{self.event.pk}/', {'location': 'Main hall'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.notified(), sorted(user.pk for user in self.users))
+        self.assertTrue(Notification.objects.filter(message__contains='Main hall').exists())
+
+    def test_other_edits_announce_nothing(self):
+        self.client.patch(f'/api/events/{self.event.pk}/', {'title': 'Alumni evening'}, format='json')
+
+        self.assertFalse(EventNotificationBatch.objects.exists())
+
+    def test_only_the_organizer_can_announce(self):
+        url = f'/api/events/{self.event.pk}/announce/'
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.post(url, {'title': 'Hi', 'message': 'Hello'}).status_code, 403)
+
+        self.client.force_authenticate(self.organizer)
+        self.assertEqual(self.client.post(url, {'title': 'Hi'}).status_code, 400)
+        with mock.patch('linkup_backend.tasks.submit', run_in_foreground), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url, {'title': 'Hi', 'message': 'Hello'}).status_code, 202)
+        self.assertEqual(len(self.notified()), len(self.users))
+
+    def test_command_schedules_and_delivers(self):
+        soon = self.starting_in(timedelta(minutes=30))
+        registration.register(soon, self.users[0])
+
+        out = StringIO()
+        call_command('send_event_reminders', '--dry-run', stdout=out)
+        self.assertIn('1 reminders due', out.getvalue())
+        self.assertEqual(self.notified(), [])
+
+        call_command('send_event_reminders', stdout=out)
+        self.assertIn('Scheduled 1 reminders; delivered 1 batches (1 notifications)', out.getvalue())
+        self.assertEqual(self.notified(), [self.users[0].pk])
+
+
+class CheckInTests(TestCase):
+    def setUp(self):
+        self.organizer, *self.users = make_users(4)
+        self.event = make_event(self.organizer, max_participants=2)
+        self.seats = [registration.register(self.event, user) for user in self.users]
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.url = f'/api/events/{self.event.pk}/check-in/'
+
+    def code(self, index):
+        return checkin.check_in_code(self.seats[index])
+
+    def scan(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_codes_are_bound_to_the_event(self):
+        other = make_event(self.organizer, max_participants=None)
+
+        self.assertEqual(checkin.registration_id_for_code(self.code(0), self.event.pk), self.seats[0].pk)
+        self.assertIsNone(checkin.registration_id_for_code(self.code(0), other.pk))
+        self.assertIsNone(checkin.registration_id_for_code(self.code(0) + 'x', self.event.pk))
+        self.assertIsNone(checkin.registration_id_for_code(None, self.event.pk))
+
+    def test_ticket_is_issued_for_seated_participants(self):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get(f'/api/events/{self.event.pk}/ticket/')
+        self.assertEqual(response.data['code'], self.code(0))
+
+        self.client.force_authenticate(self.users[2])
+        self.assertEqual(self.client.get(f'/api/events/{self.event.pk}/ticket/').status_code, 404)
+
+    def test_live_scans_report_each_code(self):
+        response = self.scan({'codes': [self.code(0), self.code(0), self.code(2), 'forged']})
+
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            [checkin.CHECKED_IN, checkin.ALREADY_CHECKED_IN, checkin.NOT_REGISTERED, checkin.INVALID]
+        )
+        self.assertEqual(response.data['summary'][checkin.ALREADY_CHECKED_IN], 1)
+        self.seats[0].refresh_from_db()
+        self.assertEqual(self.seats[0].status, 'attended')
+
+    def test_offline_scans_keep_the_earliest_time(self):
+        early = timezone.now() - timedelta(minutes=30)
+        late = early + timedelta(minutes=10)
+        self.scan({'scans': [{'code': self.code(0), 'scanned_at': late.isoformat()}]})
+
+        response = self.scan({'scans': [
+            {'code': self.code(0), 'scanned_at': early.isoformat()},
+            {'code': self.code(1), 'scanned_at': '2024-13-01T10:00:00'},
+            {'code': self.code(1), 'scanned_at': (timezone.now() + timedelta(days=1)).isoformat()},
+        ]})
+
+        results = [item['result'] for item in response.data['results']]
+        self.assertEqual(results, [checkin.ALREADY_CHECKED_IN, checkin.INVALID_TIME, checkin.CHECKED_IN])
+        self.seats[0].refresh_from_db()
+        self.assertEqual(self.seats[0].checked_in_at, early)
+        self.seats[1].refresh_from_db()
+        self.assertLessEqual(self.seats[1].checked_in_at, timezone.now())
+
+    def test_malformed_batches_are_rejected(self):
+        self.assertEqual(self.scan({}).status_code, 400)
+        self.assertEqual(self.scan({'codes': []}).status_code, 400)
+        self.assertEqual(self.scan({'scans': ['code']}).status_code, 400)
+        with self.settings(CHECK_IN_MAX_BATCH=1):
+            self.assertEqual(self.scan({'codes': [self.code(0), self.code(1)]}).status_code, 400)
+
+    def test_only_the_organizer_can_check_in(self):
+        self.client.force_authenticate(self.users[0])
+
+        self.assertEqual(self.scan({'codes': [self.code(0)]}).status_code, 403)
+
+    def test_a_batch_is_loaded_and_written_in_constant_queries(self):
+        users = make_users(30, prefix='guest')
+        event = make_event(self.organizer, max_participants=None)
+        codes = [checkin.check_in_code(registration.register(event, user)) for user in users]
+
+        with self.assertNumQueries(2):
+            results = checkin.check_in(event, checkin.normalize_scans({'codes': codes}))
+
+        self.assertEqual({item['result'] for item in results}, {checkin.CHECKED_IN})
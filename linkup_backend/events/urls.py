@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, EventRegistrationViewSet, DonationCampaignViewSet, DonationViewSet
+from .views import EventViewSet, EventRegistrationViewSet, DonationCampaignViewSet, DonationViewSet, calendar_feed, calendar_feed_url
 
 router = DefaultRouter()
 router.register(r'', EventViewSet, basename='event')
@@ -9,5 +9,7 @@ router.register(r'campaigns', DonationCampaignViewSet, basename='donation-campai
 router.register(r'donations', DonationViewSet, basename='donation')
 
 urlpatterns = [
+    path('calendar/feed-url/', calendar_feed_url, name='calendar-feed-url'),
+    path('calendar/<str:token>.ics', calendar_feed, name='calendar-feed'),
     path('', include(router.urls)),
 ]
@@ -1,12 +1,17 @@
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Q
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
 from django.db import transaction
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.pagination import PageNumberPagination
 import razorpay
 import hmac
 import hashlib
@@ -14,14 +19,23 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+User = get_user_model()
+
 from .models import Event, EventRegistration, DonationCampaign, Donation
 from .serializers import EventSerializer, EventRegistrationSerializer, DonationCampaignSerializer, DonationSerializer
 from .permissions import IsOrganizerOrReadOnly
-
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(
-    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-)
+from . import registration as registration_engine
+from . import checkin as checkin_engine
+from .exports import registrations_export
+from .notifications import announce_changes, create_announcement, deliver_batch
+from .ical import cached_feed, feed_state, feed_token, stream_and_cache, user_for_token
+from linkup_backend.caching import CatalogueCacheMixin
+from donations import gateway
+from donations import analytics as donation_analytics
+from donations import payments as donation_payments
+from donations import receipts as donation_receipts
+from linkup_backend.exports import export_response
+from linkup_backend.tasks import submit_on_commit
 
 # Create your views here.
 
@@ -31,8 +45,18 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return True
         return request.user.is_authenticated and request.user.user_type == 'admin'
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class EventViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     queryset = Event.objects.filter(is_active=True)
+    pagination_class = EventPagination
+    # Registrations bump Event; the organizer's name comes from the user
+    cache_models = (Event, User)
+    # user_registration_status differs per user
+    cache_per_user = True
     serializer_class = EventSerializer
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     http_method_names = ['get', 'post', 'patch', 'delete']
@@ -48,28 +72,14 @@ class EventViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
-    def initial(self, request, *args, **kwargs):
-        """Add debugging information before processing the request"""
-        logger.info(f"Method: {request.method}")
-        logger.info(f"Headers: {dict(request.headers)}")
-        logger.info(f"Action: {self.action}")
-        logger.info(f"Auth: {request.auth}")
-        logger.info(f"User: {request.user}")
-        logger.info(f"User Type: {request.user.user_type if request.user.is_authenticated else 'Anonymous'}")
-        return super().initial(request, *args, **kwargs)
-
     def get_queryset(self):
-        logger.info("\n=== Get Events Query ===")
-        queryset = Event.objects.all().order_by('-created_at')
-        logger.info(f"Initial queryset count: {queryset.count()}")
-        logger.info(f"Query params: {self.request.query_params}")
+        queryset = Event.objects.with_registration_stats(self.request.user).order_by('-created_at')
         
         # Only filter by is_active if specifically requested
         is_active = self.request.query_params.get('is_active')
         if is_active is not None:
             is_active_bool = is_active.lower() == 'true'
             queryset = queryset.filter(is_active=is_active_bool)
-            logger.info(f"After is_active filter count: {queryset.count()}")
         
         # Search functionality
         search = self.request.query_params.get('search', '')
@@ -79,53 +89,44 @@ class EventViewSet(viewsets.ModelViewSet):
                 Q(description__icontains=search) |
                 Q(location__icontains=search)
             )
-            logger.info(f"After search filter count: {queryset.count()}")
 
         # Filter by event type
         event_type = self.request.query_params.get('event_type')
         if event_type:
             queryset = queryset.filter(event_type=event_type)
-            logger.info(f"After event type filter count: {queryset.count()}")
 
         # Filter by date range
         start_after = self.request.query_params.get('start_after')
         start_before = self.request.query_params.get('start_before')
         if start_after:
             queryset = queryset.filter(start_date__gte=start_after)
-            logger.info(f"After start_after filter count: {queryset.count()}")
         if start_before:
             queryset = queryset.filter(start_date__lte=start_before)
-            logger.info(f"After start_before filter count: {queryset.count()}")
 
         # Filter by virtual/physical
         is_virtual = self.request.query_params.get('is_virtual')
         if is_virtual is not None and is_virtual != '':
             is_virtual_bool = is_virtual.lower() == 'true'
             queryset = queryset.filter(is_virtual=is_virtual_bool)
-            logger.info(f"After is_virtual filter count: {queryset.count()}")
 
-        logger.info(f"Final queryset SQL: {queryset.query}")
-        logger.info(f"Final queryset count: {queryset.count()}")
         return queryset.select_related('organizer')
 
     def perform_create(self, serializer):
         try:
             serializer.save(organizer=self.request.user)
         except Exception as e:
-            logger.error(f"Error in perform_create: {str(e)}")
+            logger.exception("Error saving event")
             raise
 
+    def perform_update(self, serializer):
+        previous = Event.objects.get(pk=serializer.instance.pk)
+        event = serializer.save()
+        batch = announce_changes(event, previous, created_by=self.request.user)
+        if batch is not None:
+            submit_on_commit(deliver_batch, batch.id)
+
     def create(self, request, *args, **kwargs):
         try:
-            logger.info("\n=== Debug Information ===")
-            logger.info(f"Request Method: {request.method}")
-            logger.info(f"Request Headers: {dict(request.headers)}")
-            logger.info(f"Request Data: {request.data}")
-            logger.info(f"Request User: {request.user}")
-            logger.info(f"Request Auth: {request.auth}")
-            logger.info(f"Action: {self.action}")
-            logger.info("======================\n")
-            
             if not request.user.is_authenticated:
                 return Response(
                     {'detail': 'Authentication required'},
@@ -134,14 +135,14 @@ class EventViewSet(viewsets.ModelViewSet):
             
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
-                logger.error(f"Serializer Errors: {serializer.errors}")
+                logger.info("Invalid event: %s", serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
                 
             self.perform_create(serializer)
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         except Exception as e:
-            logger.error(f"Error creating event: {str(e)}")
+            logger.exception("Error creating event")
             return Response(
                 {'detail': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -158,20 +159,10 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Check if user is already registered
-        if EventRegistration.objects.filter(event=event, participant=request.user).exists():
-            return Response(
-                {'detail': 'You are already registered for this event'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Create registration
-        registration = EventRegistration(
-            event=event,
-            participant=request.user,
-            status='registered' if not event.is_full else 'waitlisted'
-        )
-        registration.save()
+        try:
+            registration = registration_engine.register(event, request.user, notes=request.data.get('notes', ''))
+        except registration_engine.RegistrationError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             EventRegistrationSerializer(registration).data,
@@ -182,34 +173,14 @@ class EventViewSet(viewsets.ModelViewSet):
     def cancel_registration(self, request, pk=None):
         event = self.get_object()
         try:
-            registration = EventRegistration.objects.get(
-                event=event,
-                participant=request.user
-            )
-            registration.status = 'cancelled'
-            registration.save()
-
-            # If there are waitlisted registrations and this was a confirmed registration,
-            # move the first waitlisted registration to registered
-            if registration.status == 'registered':
-                waitlisted = EventRegistration.objects.filter(
-                    event=event,
-                    status='waitlisted'
-                ).order_by('registration_date').first()
-                
-                if waitlisted:
-                    waitlisted.status = 'registered'
-                    waitlisted.save()
+            registration = registration_engine.cancel(event, request.user)
+        except registration_engine.RegistrationError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response(
-                EventRegistrationSerializer(registration).data,
-                status=status.HTTP_200_OK
-            )
-        except EventRegistration.DoesNotExist:
-            return Response(
-                {'detail': 'You are not registered for this event'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(
+            EventRegistrationSerializer(registration).data,
+            status=status.HTTP_200_OK
+        )
 
     @action(detail=True)
     def registrations(self, request, pk=None):
@@ -220,57 +191,90 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        registrations = event.registrations.all()
+        registrations = event.registrations.select_related('participant')
         serializer = EventRegistrationSerializer(registrations, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, url_path='registrations/export')
+    def export_registrations(self, request, pk=None):
+        event = self.get_object()
+        if request.user != event.organizer and not request.user.is_staff:
+            return Response(
+                {'detail': 'You do not have permission to export registrations'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return export_response(request, registrations_export, event.pk)
+
+    @action(detail=True, methods=['get'])
+    def ticket(self, request, pk=None):
+        event = self.get_object()
+        registration = EventRegistration.objects.filter(
+            event=event,
+            participant=request.user,
+            status__in=EventRegistration.SEATED_STATUSES
+        ).first()
+        if registration is None:
+            return Response(
+                {'detail': 'You do not have a seat at this event'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'registration': registration.id,
+            'code': checkin_engine.check_in_code(registration),
+            'checked_in_at': registration.checked_in_at,
+        })
+
+    @action(detail=True, methods=['post'], url_path='check-in')
+    def check_in(self, request, pk=None):
+        event = self.get_object()
+        if request.user != event.organizer:
+            return Response(
+                {'detail': 'Only the organizer can check in participants'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            scans = checkin_engine.normalize_scans(request.data)
+        except checkin_engine.CheckInError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = checkin_engine.check_in(event, scans)
+        summary = {}
+        for item in results:
+            summary[item['result']] = summary.get(item['result'], 0) + 1
+        return Response({'summary': summary, 'results': results})
+
+    @action(detail=True, methods=['post'])
+    def announce(self, request, pk=None):
+        event = self.get_object()
+        if request.user != event.organizer:
+            return Response(
+                {'detail': 'Only the organizer can announce to registrants'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        title = (request.data.get('title') or '').strip()
+        message = (request.data.get('message') or '').strip()
+        if not title or not message:
+            return Response(
+                {'detail': 'Both title and message are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        batch = create_announcement(event, title, message, created_by=request.user)
+        submit_on_commit(deliver_batch, batch.id)
+        return Response(
+            {'id': batch.id, 'title': batch.title, 'created_at': batch.created_at},
+            status=status.HTTP_202_ACCEPTED
+        )
+
     @action(detail=False, methods=['get'])
     def my_events(self, request):
         events = self.get_queryset()
         serializer = self.get_serializer(events, many=True)
         return Response(serializer.data)
 
-    def list(self, request, *args, **kwargs):
-        try:
-            logger.info("\n=== Fetching events list ===")
-            logger.info(f"Request User: {request.user}")
-            logger.info(f"Request Query Params: {request.query_params}")
-            
-            # Get the base queryset
-            queryset = self.get_queryset()
-            logger.info(f"Base queryset count: {queryset.count()}")
-            logger.info(f"Base queryset SQL: {queryset.query}")
-            
-            # Apply any additional filtering
-            queryset = self.filter_queryset(queryset)
-            logger.info(f"Filtered queryset count: {queryset.count()}")
-            
-            # Get paginated results if pagination is enabled
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                logger.info(f"Returning paginated response with {len(serializer.data)} items")
-                return self.get_paginated_response(serializer.data)
-
-            # If no pagination, serialize all results
-            serializer = self.get_serializer(queryset, many=True)
-            data = serializer.data
-            logger.info(f"Returning full response with {len(data)} items")
-            
-            # Log the first few items for debugging
-            if data:
-                logger.info(f"First event in response: {data[0]}")
-            else:
-                logger.info("No events found in database")
-            
-            return Response(data)
-        except Exception as e:
-            logger.error(f"Error in list view: {str(e)}", exc_info=True)
-            return Response(
-                {'error': 'Failed to fetch events', 'detail': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
 class EventRegistrationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = EventRegistrationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -278,27 +282,21 @@ class EventRegistrationViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return EventRegistration.objects.filter(participant=self.request.user)
 
-class DonationCampaignViewSet(viewsets.ModelViewSet):
+class DonationCampaignViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     queryset = DonationCampaign.objects.all()
+    cache_models = (DonationCampaign, User)
     serializer_class = DonationCampaignSerializer
     permission_classes = [permissions.IsAuthenticated, IsOrganizerOrReadOnly]
 
     def get_queryset(self):
         queryset = DonationCampaign.objects.all()
         
-        # Filter by status (active, ended)
+        # Filter by status (active, ended); ended campaigns are deactivated by expire_listings
         status = self.request.query_params.get('status')
-        now = timezone.now()
         if status == 'active':
-            queryset = queryset.filter(
-                is_active=True,
-                start_date__lte=now,
-                end_date__gt=now
-            )
+            queryset = queryset.filter(is_active=True, start_date__lte=timezone.now())
         elif status == 'ended':
-            queryset = queryset.filter(
-                Q(end_date__lte=now) | Q(is_active=False)
-            )
+            queryset = queryset.filter(is_active=False)
 
         # Filter by organizer
         organizer_id = self.request.query_params.get('organizer')
@@ -313,6 +311,7 @@ class DonationCampaignViewSet(viewsets.ModelViewSet):
                 Q(description__icontains=search)
             )
 
+        queryset = donation_analytics.with_donor_counts(queryset, 'event_donation')
         return queryset.select_related('organizer')
 
     def perform_create(self, serializer):
@@ -365,7 +364,7 @@ class DonationViewSet(viewsets.ModelViewSet):
                 }
             }
             
-            razorpay_order = razorpay_client.order.create(order_data)
+            razorpay_order = gateway.create_order(**order_data)
             logger.info(f"Created Razorpay order: {razorpay_order['id']}")
 
             # Create donation record
@@ -392,6 +391,12 @@ class DonationViewSet(viewsets.ModelViewSet):
             }
             return Response(response_data)
 
+        except gateway.GatewayUnavailable as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
         except Exception as e:
             logger.error(f"Error creating order: {str(e)}")
             return Response(
@@ -429,31 +434,22 @@ class DonationViewSet(viewsets.ModelViewSet):
                     'razorpay_order_id': razorpay_order_id,
                     'razorpay_signature': razorpay_signature
                 }
-                razorpay_client.utility.verify_payment_signature(params_dict)
-
-                # Update donation record
-                with transaction.atomic():
-                    donation.payment_status = 'successful'
-                    donation.razorpay_payment_id = razorpay_payment_id
-                    donation.razorpay_signature = razorpay_signature
-                    donation.save()
+                gateway.verify_payment_signature(params_dict)
 
-                    # Update campaign amount
-                    campaign = donation.campaign
-                    campaign.current_amount += donation.amount
-                    campaign.save()
+                # Settle once, whether verify or the payment webhook gets here first
+                donation = donation_payments.settle(razorpay_order_id, razorpay_payment_id, razorpay_signature)
 
                 logger.info(f"Payment successful for order: {razorpay_order_id}")
                 return Response({
                     'status': 'Payment successful',
                     'donation_id': donation.id,
-                    'amount': donation.amount
+                    'amount': donation.amount,
+                    'receipt_url': donation_receipts.receipt_url('event_donation', donation.id, request),
                 })
 
             except razorpay.errors.SignatureVerificationError:
                 logger.error(f"Signature verification failed for order: {razorpay_order_id}")
-                donation.payment_status = 'failed'
-                donation.save()
+                donation_payments.fail(razorpay_order_id)
                 return Response(
                     {'error': 'Payment verification failed'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -465,3 +461,50 @@ class DonationViewSet(viewsets.ModelViewSet):
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_feed_url(request):
+    """Subscription URL of the user's calendar feed (events and mentorship meetings)"""
+    url = request.build_absolute_uri(reverse('calendar-feed', args=[feed_token(request.user)]))
+    return Response({
+        'url': url,
+        'webcal_url': 'webcal://' + url.split('://', 1)[1],
+    })
+
+
+def _calendar_state(request, token):
+    # Shared by the ETag and Last-Modified callbacks, so computed once per request
+    if not hasattr(request, '_calendar_state'):
+        user_id = user_for_token(token)
+        request._calendar_state = (user_id, *feed_state(user_id)) if user_id else (None, None, None)
+    return request._calendar_state
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, token: _calendar_state(request, token)[1],
+    last_modified_func=lambda request, token: _calendar_state(request, token)[2],
+)
+def calendar_feed(request, token):
+    """
+    iCalendar feed authenticated by the signed token in its URL. Calendar
+    clients poll it, so unchanged feeds are answered with 304 and a changed
+    one is streamed once, then served from the cache.
+    """
+    user_id, etag, _ = _calendar_state(request, token)
+    if user_id is None:
+        raise Http404
+
+    content_type = 'text/calendar; charset=utf-8'
+    cached = cached_feed(etag)
+    if cached is not None:
+        response = HttpResponse(cached, content_type=content_type)
+    else:
+        if not get_user_model().objects.filter(pk=user_id, is_active=True).exists():
+            raise Http404
+        response = StreamingHttpResponse(stream_and_cache(user_id, etag), content_type=content_type)
+    response['Content-Disposition'] = 'inline; filename="linkup.ics"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
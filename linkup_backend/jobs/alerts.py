@@ -0,0 +1,113 @@
+import re
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from authentication.models import Notification
+from .models import JobPosting, SavedJobSearch, SavedSearchTerm
+
+# Keys are prefixed by kind so a query word never matches a filter value
+QUERY_PREFIX = 'q:'
+JOB_TYPE_PREFIX = 'type:'
+EXPERIENCE_PREFIX = 'exp:'
+LOCATION_PREFIX = 'loc:'
+
+# Keeps the candidate lookup within the bound parameter limits of every backend
+MAX_JOB_KEYS = 900
+
+
+def _words(text):
+    return set(re.findall(r'\w+', (text or '').lower()))
+
+
+def search_keys(search):
+    """Keys a posting must all contain to match the saved search"""
+    keys = {QUERY_PREFIX + word for word in _words(search.query)}
+    keys |= {LOCATION_PREFIX + word for word in _words(search.location)}
+    if search.job_type:
+        keys.add(JOB_TYPE_PREFIX + search.job_type)
+    if search.experience_level:
+        keys.add(EXPERIENCE_PREFIX + search.experience_level)
+    return keys
+
+
+def job_keys(job):
+    """Every key a saved search could require of this posting"""
+    text = ' '.join((job.title, job.company, job.requirements, job.description))
+    keys = {
+        JOB_TYPE_PREFIX + job.job_type,
+        EXPERIENCE_PREFIX + job.experience_level,
+    }
+    keys |= {LOCATION_PREFIX + word for word in _words(job.location)}
+    keys |= {QUERY_PREFIX + word for word in _words(text)}
+    return keys
+
+
+def index_saved_search(search):
+    """Rebuild the reverse index rows of one saved search"""
+    keys = search_keys(search)
+    with transaction.atomic():
+        SavedSearchTerm.objects.filter(search=search).delete()
+        SavedSearchTerm.objects.bulk_create(
+            [SavedSearchTerm(search=search, key=key) for key in keys]
+        )
+        if search.term_count != len(keys):
+            search.term_count = len(keys)
+            SavedJobSearch.objects.filter(pk=search.pk).update(term_count=len(keys))
+
+
+def matching_search_ids(job):
+    """
+    Ids of the active saved searches matched by a posting. Only searches that
+    share a key with the posting are considered; a search matches when all of
+    its keys were hit.
+    """
+    keys = sorted(job_keys(job))
+    hits = {}
+    for start in range(0, len(keys), MAX_JOB_KEYS):
+        rows = (
+            SavedSearchTerm.objects.filter(
+                key__in=keys[start:start + MAX_JOB_KEYS], search__is_active=True
+            )
+            .values('search_id', 'search__term_count')
+            .annotate(hits=Count('id'))
+            .values_list('search_id', 'search__term_count', 'hits')
+        )
+        for search_id, term_count, count in rows:
+            total, _ = hits.get(search_id, (0, term_count))
+            hits[search_id] = (total + count, term_count)
+    return [search_id for search_id, (count, term_count) in hits.items() if count == term_count]
+
+
+def send_job_alerts(job_id):
+    """Notify every user with a saved search matching the new posting, once per user"""
+    job = JobPosting.objects.filter(pk=job_id, is_active=True).first()
+    if job is None:
+        return 0
+
+    search_ids = matching_search_ids(job)
+    if not search_ids:
+        return 0
+
+    names_by_user = {}
+    searches = (
+        SavedJobSearch.objects.filter(id__in=search_ids)
+        .exclude(user_id=job.posted_by_id)
+        .values_list('user_id', 'name')
+        .order_by('name')
+    )
+    for user_id, name in searches:
+        names_by_user.setdefault(user_id, []).append(name)
+
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                user_id=user_id,
+                title='New job matching your saved search',
+                message=f"{job.title} at {job.company} matches {', '.join(names)}",
+            )
+            for user_id, names in names_by_user.items()
+        ],
+        batch_size=1000,
+    )
+    return len(names_by_user)
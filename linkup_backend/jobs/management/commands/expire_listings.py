@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from donations.models import DonationCampaign
+from events.models import DonationCampaign as EventDonationCampaign, Event
+from jobs.models import JobPosting
+from linkup_backend.caching import bump_model_version
+from projects.models import Funding
+
+
+def _sweeps(now):
+    """(label, expired queryset, values written) for every listing with an expiry date"""
+    return [
+        ('job postings', JobPosting.objects.filter(is_active=True, deadline__lt=now),
+         {'is_active': False, 'updated_at': now}),
+        ('events', Event.objects.filter(is_active=True, end_date__lt=now),
+         {'is_active': False, 'updated_at': now}),
+        ('event donation campaigns', EventDonationCampaign.objects.filter(is_active=True, end_date__lt=now),
+         {'is_active': False, 'updated_at': now}),
+        ('donation campaigns', DonationCampaign.objects.filter(is_active=True, end_date__lt=now),
+         {'is_active': False, 'updated_at': now}),
+        ('funding requests', Funding.objects.filter(status='active', deadline__lt=now),
+         {'status': 'closed'}),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivate job postings, events, campaigns and funding requests past their '
+        'deadline. Meant to run from cron every few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows updated per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be expired',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        now = timezone.now()
+
+        total = 0
+        for label, expired, values in _sweeps(now):
+            if options['dry_run']:
+                count = expired.count()
+            else:
+                count = self.sweep(expired, values, chunk_size)
+                if count:
+                    # Queryset updates send no signals, so expire cached listings here
+                    bump_model_version(expired.model)
+            total += count
+            if count:
+                self.stdout.write(f'{label}: {count}')
+
+        verb = 'Would expire' if options['dry_run'] else 'Expired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} listings'))
+
+    def sweep(self, expired, values, chunk_size):
+        # Short transactions keep row locks brief while requests keep writing
+        count = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired.order_by().values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    return count
+                count += expired.model.objects.filter(pk__in=ids).update(**values)
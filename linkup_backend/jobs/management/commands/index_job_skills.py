@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from jobs.models import JobPosting
+from jobs.recommendations import index_job_skills
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the job skill index, e.g. after new skills were added to the catalogue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-inactive',
+            action='store_true',
+            help='Also index inactive job postings',
+        )
+
+    def handle(self, *args, **options):
+        jobs = JobPosting.objects.only('id', 'requirements', 'description')
+        if not options['include_inactive']:
+            jobs = jobs.filter(is_active=True)
+
+        count = 0
+        for job in jobs.iterator(chunk_size=500):
+            index_job_skills(job)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed skills for {count} job postings'))
@@ -0,0 +1,93 @@
+from django.db import migrations
+
+# Postgres: weighted tsvector kept in a stored generated column with a GIN index.
+# The column is not declared on the model, so Django never reads or writes it.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE jobs_jobposting ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(company, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(requirements, '')), 'C') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX jobs_jobposting_search_vector_idx ON jobs_jobposting USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS jobs_jobposting_search_vector_idx",
+    "ALTER TABLE jobs_jobposting DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: external-content FTS5 table kept in sync by triggers. Note that a
+# later migration which rebuilds jobs_jobposting on SQLite drops the triggers
+# and has to recreate them.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE jobs_jobposting_fts USING fts5(
+        title, company, requirements, description,
+        content='jobs_jobposting', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER jobs_jobposting_fts_insert AFTER INSERT ON jobs_jobposting BEGIN
+        INSERT INTO jobs_jobposting_fts(rowid, title, company, requirements, description)
+        VALUES (new.id, new.title, new.company, new.requirements, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER jobs_jobposting_fts_delete AFTER DELETE ON jobs_jobposting BEGIN
+        INSERT INTO jobs_jobposting_fts(jobs_jobposting_fts, rowid, title, company, requirements, description)
+        VALUES ('delete', old.id, old.title, old.company, old.requirements, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER jobs_jobposting_fts_update
+    AFTER UPDATE OF title, company, requirements, description ON jobs_jobposting BEGIN
+        INSERT INTO jobs_jobposting_fts(jobs_jobposting_fts, rowid, title, company, requirements, description)
+        VALUES ('delete', old.id, old.title, old.company, old.requirements, old.description);
+        INSERT INTO jobs_jobposting_fts(rowid, title, company, requirements, description)
+        VALUES (new.id, new.title, new.company, new.requirements, new.description);
+    END
+    """,
+    "INSERT INTO jobs_jobposting_fts(jobs_jobposting_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS jobs_jobposting_fts_update",
+    "DROP TRIGGER IF EXISTS jobs_jobposting_fts_delete",
+    "DROP TRIGGER IF EXISTS jobs_jobposting_fts_insert",
+    "DROP TABLE IF EXISTS jobs_jobposting_fts",
+]
+
+STATEMENTS = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_REVERSE),
+    'sqlite': (SQLITE_FORWARD, SQLITE_REVERSE),
+}
+
+
+def _run(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        # Other backends fall back to unindexed substring search
+        return
+    for statement in statements[index]:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_alter_jobposting_application_url_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_customuser_avatar_renditions'),
+        ('jobs', '0003_jobposting_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_index', to='jobs.jobposting')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_index', to='authentication.skill')),
+            ],
+            options={
+                'unique_together': {('skill', 'job')},
+            },
+        ),
+    ]
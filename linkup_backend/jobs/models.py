@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 # Create your models here.
@@ -36,6 +37,65 @@ class JobPosting(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Partial indexes over live postings; expire_listings deactivates the rest
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True), name='jobs_active_created_idx'),
+            models.Index(fields=['deadline'], condition=Q(is_active=True), name='jobs_active_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} at {self.company}"
+
+class JobSkill(models.Model):
+    """
+    Inverted index entry linking a catalogue skill to a job posting that
+    mentions it. Rows are rebuilt from the posting text whenever it changes.
+    """
+    job = models.ForeignKey(JobPosting, on_delete=models.CASCADE, related_name='skill_index')
+    skill = models.ForeignKey('authentication.Skill', on_delete=models.CASCADE, related_name='job_index')
+    # 2 when the skill appears in the requirements, 1 when only in the description
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('skill', 'job')
+
+    def __str__(self):
+        return f"{self.skill_id} -> {self.job_id}"
+
+
+class SavedJobSearch(models.Model):
+    """A job search a user wants to be alerted about when new postings match it"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_job_searches')
+    name = models.CharField(max_length=100)
+    query = models.CharField(max_length=200, blank=True)
+    job_type = models.CharField(max_length=20, choices=JobPosting.JOB_TYPE_CHOICES, blank=True)
+    experience_level = models.CharField(max_length=20, choices=JobPosting.EXPERIENCE_LEVEL_CHOICES, blank=True)
+    location = models.CharField(max_length=200, blank=True)
+    # Number of distinct SavedSearchTerm keys a posting has to contain to match
+    term_count = models.PositiveSmallIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+
+
+class SavedSearchTerm(models.Model):
+    """
+    Reverse index entry: one required key (query word or filter value) of a
+    saved search. New postings look up candidate searches by their own keys.
+    """
+    search = models.ForeignKey(SavedJobSearch, on_delete=models.CASCADE, related_name='terms')
+    key = models.CharField(max_length=220)
+
+    class Meta:
+        unique_together = ('search', 'key')
+        indexes = [
+            models.Index(fields=['key', 'search']),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.search_id}"
@@ -0,0 +1,170 @@
+import re
+import threading
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.utils import timezone
+
+from authentication.skills import get_skill_catalogue
+from .models import JobPosting, JobSkill
+
+REQUIREMENTS_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+MAX_SKILL_WORDS = 4
+
+# Multiplier for matched skills in the category of the user's department
+DEPARTMENT_MATCH_BOOST = 1.5
+EXACT_EXPERIENCE_BONUS = 2.0
+ADJACENT_EXPERIENCE_BONUS = 1.0
+
+EXPERIENCE_LEVELS = ['entry', 'mid', 'senior', 'lead', 'manager']
+
+# Keywords in a free-text department mapped to Skill.category
+DEPARTMENT_CATEGORIES = {
+    'computer': 'TECH', 'cse': 'TECH', 'software': 'TECH', 'information': 'TECH', 'it': 'TECH',
+    'electrical': 'EEE', 'eee': 'EEE',
+    'electronics': 'ECE', 'communication': 'ECE', 'ece': 'ECE',
+    'mechanical': 'MECH', 'mech': 'MECH',
+    'agriculture': 'AGRI', 'agricultural': 'AGRI', 'agri': 'AGRI',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+
+_matcher = (None, 0, {})
+_matcher_lock = threading.Lock()
+
+
+def _tokenize(text):
+    # Keep symbols used in skill names (C++, C#, Node.js) but not sentence dots
+    return [token.rstrip('.') for token in _TOKEN_RE.findall((text or '').lower())]
+
+
+def _get_matcher():
+    """
+    Map token tuples of catalogue skill names to skill ids. The catalogue is
+    replaced when reloaded and only grows in place otherwise, so the matcher
+    is rebuilt whenever the catalogue object or its size changes.
+    """
+    global _matcher
+    catalogue = get_skill_catalogue()
+    if _matcher[0] is not catalogue or _matcher[1] != len(catalogue):
+        with _matcher_lock:
+            skills = list(catalogue.items())
+            phrases = {}
+            for name, skill_id in skills:
+                tokens = tuple(_tokenize(name))
+                if 0 < len(tokens) <= MAX_SKILL_WORDS:
+                    phrases[tokens] = skill_id
+            _matcher = (catalogue, len(skills), phrases)
+    return _matcher[2]
+
+
+def extract_skill_ids(text):
+    """Return the ids of catalogue skills mentioned in the text"""
+    phrases = _get_matcher()
+    tokens = _tokenize(text)
+    found = set()
+    for size in range(1, MAX_SKILL_WORDS + 1):
+        for start in range(len(tokens) - size + 1):
+            skill_id = phrases.get(tuple(tokens[start:start + size]))
+            if skill_id is not None:
+                found.add(skill_id)
+    return found
+
+
+def index_job_skills(job):
+    """Rebuild the inverted index rows for one job posting"""
+    in_requirements = extract_skill_ids(job.requirements)
+    in_description = extract_skill_ids(job.description) - in_requirements
+
+    with transaction.atomic():
+        JobSkill.objects.filter(job=job).delete()
+        JobSkill.objects.bulk_create(
+            [JobSkill(job=job, skill_id=skill_id, weight=REQUIREMENTS_WEIGHT) for skill_id in in_requirements] +
+            [JobSkill(job=job, skill_id=skill_id, weight=DESCRIPTION_WEIGHT) for skill_id in in_description]
+        )
+
+
+def department_category(department):
+    for word in _tokenize(department):
+        if word in DEPARTMENT_CATEGORIES:
+            return DEPARTMENT_CATEGORIES[word]
+    return None
+
+
+def experience_level(user):
+    """Estimate the experience level a user is looking for"""
+    if user.user_type == 'STUDENT':
+        return 'entry'
+    if not user.graduation_year:
+        return None
+    years = timezone.now().year - user.graduation_year
+    if years < 2:
+        return 'entry'
+    if years < 5:
+        return 'mid'
+    if years < 8:
+        return 'senior'
+    if years < 12:
+        return 'lead'
+    return 'manager'
+
+
+def _experience_bonus(level):
+    if level is None:
+        return Value(0.0)
+    index = EXPERIENCE_LEVELS.index(level)
+    adjacent = [EXPERIENCE_LEVELS[i] for i in (index - 1, index + 1) if 0 <= i < len(EXPERIENCE_LEVELS)]
+    return Case(
+        When(job__experience_level=level, then=Value(EXACT_EXPERIENCE_BONUS)),
+        When(job__experience_level__in=adjacent, then=Value(ADJACENT_EXPERIENCE_BONUS)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def recommend_jobs(user, limit=20):
+    """
+    Score open jobs against the user's skills, department and experience.
+    Returns (job, score, matched skill names) tuples, best match first.
+
+    Scoring is a single grouped aggregate over the user's posting lists in
+    JobSkill, so only jobs sharing at least one skill are ever touched.
+    """
+    skill_ids = list(user.skills.values_list('id', flat=True))
+    if not skill_ids:
+        return []
+
+    category = department_category(user.department)
+    skill_weight = F('weight') * Case(
+        When(skill__category=category, then=Value(DEPARTMENT_MATCH_BOOST)),
+        default=Value(1.0),
+        output_field=FloatField(),
+    ) if category else F('weight') * Value(1.0)
+
+    scored = (
+        JobSkill.objects.filter(skill_id__in=skill_ids, job__is_active=True)
+        .values('job_id')
+        .annotate(
+            skill_score=Sum(skill_weight, output_field=FloatField()),
+            matched=Count('skill_id'),
+        )
+        .annotate(score=F('skill_score') + _experience_bonus(experience_level(user)))
+        .order_by('-score', '-matched', '-job_id')
+        .values_list('job_id', 'score')[:limit]
+    )
+    scores = dict(scored)
+    if not scores:
+        return []
+
+    jobs = JobPosting.objects.select_related('posted_by').in_bulk(list(scores))
+    matched = {}
+    for job_id, name in JobSkill.objects.filter(
+        job_id__in=scores, skill_id__in=skill_ids
+    ).values_list('job_id', 'skill__name'):
+        matched.setdefault(job_id, []).append(name)
+
+    return [
+        (jobs[job_id], score, sorted(matched.get(job_id, [])))
+        for job_id, score in scores.items() if job_id in jobs
+    ]
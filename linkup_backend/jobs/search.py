@@ -0,0 +1,71 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# bm25 weight per FTS5 column: title > company > requirements > description
+SQLITE_COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+FTS_TABLE = 'jobs_jobposting_fts'
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _postgres_search(queryset, query):
+    # Imported lazily so non-Postgres setups never need psycopg
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+    # search_vector is a generated column maintained by the database (see migration 0003)
+    vector = RawSQL('"jobs_jobposting"."search_vector"', [], output_field=SearchVectorField())
+    search_query = SearchQuery(query, config='english', search_type='websearch')
+    return (
+        queryset.alias(search_vector=vector)
+        .filter(search_vector=search_query)
+        .annotate(rank=SearchRank(vector, search_query))
+    )
+
+
+def _sqlite_search(queryset, query):
+    terms = _terms(query)
+    if not terms:
+        # Still annotated, since callers order by rank
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    # Quote every term so user input can never form FTS5 syntax; prefix match for type-ahead
+    match = ' '.join(f'"{term}"*' for term in terms)
+    weights = ', '.join(str(weight) for weight in SQLITE_COLUMN_WEIGHTS)
+    matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+    # bm25() is lower-is-better, so negate it to rank like the Postgres backend
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = "jobs_jobposting"."id"',
+        (match,),
+        output_field=FloatField(),
+    )
+    return queryset.filter(id__in=matches).annotate(rank=rank)
+
+
+def _fallback_search(queryset, query):
+    # Unindexed substring match for backends without a full-text engine
+    return queryset.filter(
+        Q(title__icontains=query) | Q(company__icontains=query)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+SEARCH_BACKENDS = {
+    'postgresql': _postgres_search,
+    'sqlite': _sqlite_search,
+}
+
+
+def search_jobs(queryset, query):
+    """
+    Filter a JobPosting queryset to postings matching `query` and annotate
+    each with a relevance `rank` (higher is better).
+    """
+    vendor = connections[queryset.db].vendor
+    backend = SEARCH_BACKENDS.get(vendor, _fallback_search)
+    return backend(queryset, query)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import JobPosting
+from .models import JobPosting, SavedJobSearch
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -34,3 +34,19 @@ class JobPostingSerializer(serializers.ModelSerializer):
         except:
             raise serializers.ValidationError("Please enter a valid URL")
         return value
+
+class SavedJobSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedJobSearch
+        fields = [
+            'id', 'name', 'query', 'job_type', 'experience_level', 'location',
+            'is_active', 'created_at'
+        ]
+        read_only_fields = ['created_at']
+
+    def validate(self, data):
+        criteria = ('query', 'job_type', 'experience_level', 'location')
+        merged = {name: data.get(name, getattr(self.instance, name, '')) for name in criteria}
+        if not any(str(value).strip() for value in merged.values()):
+            raise serializers.ValidationError("Add a search term or at least one filter")
+        return data
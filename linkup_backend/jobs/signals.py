@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from linkup_backend.caching import watch_models
+from .models import JobPosting
+from .recommendations import index_job_skills
+
+INDEXED_FIELDS = {'requirements', 'description'}
+
+watch_models(JobPosting)
+
+
+@receiver(post_save, sender=JobPosting)
+def reindex_job_skills(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_job_skills(instance)
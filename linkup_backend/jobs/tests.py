@@ -1,3 +1,348 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication import skills
+from authentication.models import Notification, Skill
+from events.models import Event
+from linkup_backend.caching import model_versions
+from projects.models import Funding, Project
+from .alerts import matching_search_ids, send_job_alerts
+from .models import JobPosting, JobSkill, SavedJobSearch, SavedSearchTerm
+from .recommendations import extract_skill_ids
+
+User = get_user_model()
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(email=f'{name}@example.com', username=name, password='pass', **fields)
+
+
+def run_in_foreground(func, *args, **kwargs):
+    # Stands in for linkup_backend.tasks.submit so queued work runs inline
+    func(*args, **kwargs)
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.poster = make_user('poster')
+        self.client = APIClient()
+
+    def post_job(self, title, description='Build things', requirements='', **fields):
+        values = {
+            'company': 'Acme',
+            'location': 'Chennai',
+            'job_type': 'full_time',
+            'experience_level': 'mid',
+            'application_url': 'https://example.com/apply',
+            **fields,
+        }
+        return JobPosting.objects.create(
+            title=title, description=description, requirements=requirements, posted_by=self.poster, **values
+        )
+
+    def ids(self, response):
+        return [job['id'] for job in response.data['results']]
+
+
+class JobSearchTests(JobTestCase):
+    def test_title_matches_rank_above_description_matches(self):
+        in_description = self.post_job('Backend Engineer', description='Our stack is Django and Postgres')
+        in_title = self.post_job('Django Developer')
+        self.post_job('Designer')
+
+        response = self.client.get('/api/jobs/', {'search': 'django'})
+
+        self.assertEqual(self.ids(response), [in_title.pk, in_description.pk])
+
+    def test_search_matches_word_prefixes(self):
+        job = self.post_job('Kubernetes Administrator')
+
+        self.assertEqual(self.ids(self.client.get('/api/jobs/', {'search': 'kube'})), [job.pk])
+
+    def test_search_syntax_in_the_query_is_treated_as_text(self):
+        self.post_job('Data Analyst')
+
+        for query in ('"data', 'data OR', 'NEAR(data analyst)', '*', '-data'):
+            response = self.client.get('/api/jobs/', {'search': query})
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_search_combines_with_filters(self):
+        remote = self.post_job('Python Engineer', location='Remote', job_type='contract')
+        self.post_job('Python Engineer', location='Chennai')
+
+        response = self.client.get('/api/jobs/', {'search': 'python', 'job_type': 'contract', 'location': 'remote'})
+
+        self.assertEqual(self.ids(response), [remote.pk])
+
+    def test_edited_and_closed_postings_follow_the_index(self):
+        job = self.post_job('Accountant')
+        closed = self.post_job('Rust Engineer')
+
+        job.title = 'Rust Developer'
+        job.save()
+        closed.is_active = False
+        closed.save()
+
+        self.assertEqual(self.ids(self.client.get('/api/jobs/', {'search': 'rust'})), [job.pk])
+        self.assertEqual(self.ids(self.client.get('/api/jobs/', {'search': 'accountant'})), [])
+
+    def test_search_results_page_by_offset_without_repeats(self):
+        jobs = [self.post_job(f'Go Engineer {i}') for i in range(25)]
+
+        seen = []
+        response = self.client.get('/api/jobs/', {'search': 'go', 'limit': 10})
+        while True:
+            self.assertEqual(response.data['count'], len(jobs))
+            seen += self.ids(response)
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(sorted(seen), sorted(job.pk for job in jobs))
+
+
+class JobListTests(JobTestCase):
+    def test_list_pages_newest_first_by_cursor(self):
+        jobs = [self.post_job(f'Job {i}') for i in range(25)]
+
+        first = self.client.get('/api/jobs/')
+        second = self.client.get(first.data['next'])
+
+        expected = [job.pk for job in reversed(jobs)]
+        self.assertEqual(self.ids(first), expected[:20])
+        self.assertEqual(self.ids(second), expected[20:])
+        self.assertIsNone(second.data['next'])
+
+
+class RecommendationTests(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        # The skill catalogue outlives each test's rolled back transaction
+        skills.invalidate_skill_catalogue()
+        self.addCleanup(skills.invalidate_skill_catalogue)
+        for name in ('Python', 'Django', 'C++', 'Machine Learning'):
+            Skill.objects.create(name=name, category='TECH')
+        self.member = make_user('member', department='Computer Science', graduation_year=2022)
+        self.client.force_authenticate(self.member)
+
+    def recommended(self, **params):
+        response = self.client.get('/api/jobs/for-me/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_skills_are_extracted_from_posting_text(self):
+        found = extract_skill_ids('Ship C++ services and machine learning pipelines. Python.')
+
+        self.assertEqual(found, set(Skill.objects.filter(name__in=['C++', 'Machine Learning', 'Python']).values_list('id', flat=True)))
+
+    def test_postings_are_indexed_with_requirement_weights(self):
+        job = self.post_job('Engineer', description='We like Django', requirements='Python and Django')
+
+        weights = dict(JobSkill.objects.filter(job=job).values_list('skill__name', 'weight'))
+        self.assertEqual(weights, {'Python': 2, 'Django': 2})
+
+    def test_jobs_are_ranked_by_matched_skills(self):
+        skills.set_user_skills(self.member, ['Python', 'Django'])
+        both = self.post_job('Web Engineer', requirements='Python, Django')
+        mentioned = self.post_job('Analyst', description='Some Python scripting')
+        self.post_job('Firmware Engineer', requirements='C++')
+        closed = self.post_job('Old role', requirements='Python, Django', is_active=False)
+
+        results = self.recommended()
+
+        self.assertEqual([job['id'] for job in results], [both.pk, mentioned.pk])
+        self.assertEqual(results[0]['matched_skills'], ['Django', 'Python'])
+        self.assertNotIn(closed.pk, [job['id'] for job in results])
+
+    def test_experience_level_breaks_ties(self):
+        skills.set_user_skills(self.member, ['Python'])
+        senior = self.post_job('Senior Engineer', requirements='Python', experience_level='manager')
+        fitting = self.post_job('Engineer', requirements='Python', experience_level='mid')
+
+        self.assertEqual([job['id'] for job in self.recommended()], [fitting.pk, senior.pk])
+
+    def test_new_skills_are_matched_without_a_restart(self):
+        skills.set_user_skills(self.member, ['Python'])
+        self.post_job('Engineer', requirements='Python')
+
+        # Created through the bulk path, which grows the cached catalogue in place
+        skills.set_user_skills(self.member, ['Elixir'], replace=False)
+        job = self.post_job('Elixir Engineer', requirements='Elixir and Phoenix')
+
+        self.assertIn(job.pk, [job['id'] for job in self.recommended()])
+
+    def test_limit_is_bounded_and_validated(self):
+        skills.set_user_skills(self.member, ['Python'])
+        for i in range(3):
+            self.post_job(f'Engineer {i}', requirements='Python')
+
+        self.assertEqual(len(self.recommended(limit=2)), 2)
+        self.assertEqual(len(self.recommended(limit=-5)), 1)
+        self.assertEqual(self.client.get('/api/jobs/for-me/', {'limit': 'all'}).status_code, 400)
+
+    def test_users_without_skills_get_nothing(self):
+        self.post_job('Engineer', requirements='Python')
+
+        self.assertEqual(self.recommended(), [])
+
+
+class SavedSearchAlertTests(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seeker = make_user('seeker')
+        self.client.force_authenticate(self.seeker)
+
+    def save_search(self, name, user=None, **criteria):
+        self.client.force_authenticate(user or self.seeker)
+        response = self.client.post('/api/jobs/saved-searches/', {'name': name, **criteria}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return SavedJobSearch.objects.get(pk=response.data['id'])
+
+    def alerts(self, user=None):
+        return list(Notification.objects.filter(user=user or self.seeker).values_list('message', flat=True))
+
+    def test_saving_a_search_indexes_its_keys(self):
+        search = self.save_search('Remote Python', query='Python developer', location='Remote', job_type='contract')
+
+        self.assertEqual(
+            set(SavedSearchTerm.objects.filter(search=search).values_list('key', flat=True)),
+            {'q:python', 'q:developer', 'loc:remote', 'type:contract'}
+        )
+        self.assertEqual(search.term_count, 4)
+
+    def test_editing_a_search_reindexes_it(self):
+        search = self.save_search('Python', query='python')
+
+        self.client.patch(f'/api/jobs/saved-searches/{search.pk}/', {'query': 'golang'}, format='json')
+
+        self.assertEqual(list(SavedSearchTerm.objects.filter(search=search).values_list('key', flat=True)), ['q:golang'])
+
+    def test_a_search_without_criteria_is_rejected(self):
+        response = self.client.post('/api/jobs/saved-searches/', {'name': 'Anything', 'query': '  '}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_a_posting_must_contain_every_key(self):
+        both = self.save_search('Remote Python', query='python', location='remote')
+        self.save_search('Rust', query='rust')
+        self.save_search('Contract Python', query='python', job_type='contract')
+
+        job = self.post_job('Python Engineer', location='Remote, India')
+
+        self.assertEqual(matching_search_ids(job), [both.pk])
+
+    def test_paused_searches_are_skipped(self):
+        search = self.save_search('Python', query='python')
+        SavedJobSearch.objects.filter(pk=search.pk).update(is_active=False)
+
+        self.assertEqual(matching_search_ids(self.post_job('Python Engineer')), [])
+
+    def test_each_user_is_notified_once_per_posting(self):
+        self.save_search('Python', query='python')
+        self.save_search('Django', query='django')
+        other = make_user('other')
+        self.save_search('Backend', user=other, query='backend')
+        self.save_search('Own posting', user=self.poster, query='python')
+
+        job = self.post_job('Python Backend Engineer', requirements='Django')
+
+        self.assertEqual(send_job_alerts(job.pk), 2)
+        self.assertEqual(self.alerts(), ['Python Backend Engineer at Acme matches Django, Python'])
+        self.assertEqual(len(self.alerts(other)), 1)
+        self.assertEqual(self.alerts(self.poster), [])
+
+    def test_closed_postings_send_nothing(self):
+        self.save_search('Python', query='python')
+
+        self.assertEqual(send_job_alerts(self.post_job('Python Engineer', is_active=False).pk), 0)
+        self.assertEqual(self.alerts(), [])
+
+    @mock.patch('linkup_backend.tasks.submit', run_in_foreground)
+    def test_posting_a_job_sends_alerts_after_commit(self):
+        self.save_search('Python', query='python')
+        self.poster.user_type = 'ALUMNI'
+        self.poster.save()
+        self.client.force_authenticate(self.poster)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/jobs/', {
+                'title': 'Python Engineer',
+                'company': 'Acme',
+                'location': 'Chennai',
+                'description': 'Build things',
+                'requirements': 'Python',
+                'job_type': 'full_time',
+                'experience_level': 'mid',
+                'application_url': 'https://example.com/apply',
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self.alerts()), 1)
+
+
+class ExpireListingsTests(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.past, self.future = now - timedelta(days=1), now + timedelta(days=1)
+        self.expired_jobs = [self.post_job(f'Expired {i}', deadline=self.past) for i in range(3)]
+        self.open_job = self.post_job('Open', deadline=self.future)
+        self.undated_job = self.post_job('No deadline')
+        self.ended_event = Event.objects.create(
+            title='Reunion', description='Reunion', organizer=self.poster,
+            start_date=self.past - timedelta(hours=2), end_date=self.past,
+        )
+        project = Project.objects.create(
+            title='Campus app', short_description='An app', detailed_description='An app',
+            project_type='Startup', creator=self.poster,
+        )
+        self.funding = Funding.objects.create(
+            project=project, title='Servers', description='Hosting', amount=Decimal('100'), deadline=self.past
+        )
+
+    def expire(self, *args):
+        out = StringIO()
+        call_command('expire_listings', *args, stdout=out)
+        return out.getvalue()
+
+    def active_job_ids(self):
+        return set(JobPosting.objects.filter(is_active=True).values_list('pk', flat=True))
+
+    def test_expired_listings_are_deactivated(self):
+        output = self.expire('--chunk-size', '2')
+
+        self.assertEqual(self.active_job_ids(), {self.open_job.pk, self.undated_job.pk})
+        self.ended_event.refresh_from_db()
+        self.assertFalse(self.ended_event.is_active)
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.status, 'closed')
+        self.assertIn('job postings: 3', output)
+        self.assertIn('Expired 5 listings', output)
+
+    def test_dry_run_changes_nothing(self):
+        output = self.expire('--dry-run')
+
+        self.assertIn('Would expire 5 listings', output)
+        self.assertEqual(len(self.active_job_ids()), 5)
+
+    def test_expiring_invalidates_cached_listings(self):
+        [before] = model_versions([JobPosting])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expire()
+        [after] = model_versions([JobPosting])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expire()
 
-# Create your tests here.
+        self.assertNotEqual(after, before)
+        self.assertEqual(model_versions([JobPosting]), [after])
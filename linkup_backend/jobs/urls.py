@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import JobPostingViewSet
+from .views import JobPostingViewSet, SavedJobSearchViewSet
 
 router = DefaultRouter()
+# Registered before the catch-all job routes
+router.register(r'saved-searches', SavedJobSearchViewSet, basename='saved-searches')
 router.register(r'', JobPostingViewSet, basename='jobs')
 
 urlpatterns = [
@@ -2,24 +2,46 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import JobPosting
-from .serializers import JobPostingSerializer
-from django.utils import timezone
-from django.db.models import Q
+from .models import JobPosting, SavedJobSearch
+from .serializers import JobPostingSerializer, SavedJobSearchSerializer
 import logging
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from django.contrib.auth import get_user_model
+from .search import search_jobs
+from .recommendations import recommend_jobs
+from .alerts import index_saved_search, send_job_alerts
+from linkup_backend.caching import CatalogueCacheMixin
+from linkup_backend.tasks import submit_on_commit
 
 logger = logging.getLogger(__name__)
 
+User = get_user_model()
+
 class IsAdminOrAlumniOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
         return request.user.is_authenticated and request.user.user_type.upper() in ['ADMIN', 'ALUMNI']
 
-class JobPostingViewSet(viewsets.ModelViewSet):
+class JobCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+class JobSearchPagination(LimitOffsetPagination):
+    # Relevance ranks are floats that would lose precision in a cursor, so
+    # ranked searches page by offset; they stop at the last match anyway
+    default_limit = 20
+    max_limit = 100
+
+class JobPostingViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     queryset = JobPosting.objects.filter(is_active=True)
+    # Postings embed the poster's profile
+    cache_models = (JobPosting, User)
     serializer_class = JobPostingSerializer
+    pagination_class = JobCursorPagination
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['get', 'post', 'patch', 'delete']
     parser_classes = (MultiPartParser, FormParser, JSONParser)
@@ -31,27 +53,19 @@ class JobPostingViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated, IsAdminOrAlumniOrReadOnly]
         return [permission() for permission in permission_classes]
 
-    def initial(self, request, *args, **kwargs):
-        """Add debugging information before processing the request"""
-        logger.info(f"Request Method: {request.method}")
-        logger.info(f"Request User: {request.user}")
-        logger.info(f"Request Data: {request.data}")
-        logger.info(f"User Type: {request.user.user_type if request.user.is_authenticated else 'Anonymous'}")
-        logger.info(f"Action: {self.action}")
-        return super().initial(request, *args, **kwargs)
+    @property
+    def paginator(self):
+        if getattr(self, 'search_query', '') and not hasattr(self, '_paginator'):
+            self._paginator = JobSearchPagination()
+        return super().paginator
 
     def get_queryset(self):
-        queryset = JobPosting.objects.filter(is_active=True)
+        queryset = JobPosting.objects.filter(is_active=True).select_related('posted_by')
         if self.action == 'list':
-            # Search functionality
-            search_query = self.request.query_params.get('search', '').strip()
-            if search_query:
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) |
-                    Q(company__icontains=search_query) |
-                    Q(description__icontains=search_query) |
-                    Q(requirements__icontains=search_query)
-                )
+            # Full-text search, ranked by relevance, newest first among equals
+            self.search_query = self.request.query_params.get('search', '').strip()
+            if self.search_query:
+                queryset = search_jobs(queryset, self.search_query).order_by('-rank', '-created_at', '-id')
 
             # Filter by job type
             job_type = self.request.query_params.get('job_type')
@@ -67,36 +81,31 @@ class JobPostingViewSet(viewsets.ModelViewSet):
             location = self.request.query_params.get('location')
             if location:
                 queryset = queryset.filter(location__icontains=location)
-
-            # Only show jobs that haven't passed their deadline
-            return queryset.filter(
-                Q(deadline__gte=timezone.now()) | Q(deadline__isnull=True)
-            ).order_by('-created_at')
         return queryset
 
-    def list(self, request, *args, **kwargs):
+    @action(detail=False, methods=['get'], url_path='for-me')
+    def for_me(self, request):
+        """Open jobs ranked by overlap with the user's skills, department and experience"""
         try:
-            queryset = self.filter_queryset(self.get_queryset())
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except Exception as e:
-            logger.error(f"Error in list: {str(e)}")
-            return Response([], status=status.HTTP_200_OK)
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        for job, score, matched_skills in recommend_jobs(request.user, limit=limit):
+            data = self.get_serializer(job).data
+            data['match_score'] = round(score, 2)
+            data['matched_skills'] = matched_skills
+            results.append(data)
+        return Response(results)
 
     def perform_create(self, serializer):
-        serializer.save(posted_by=self.request.user)
+        job = serializer.save(posted_by=self.request.user)
+        # Match saved searches in the background once the posting is committed
+        submit_on_commit(send_job_alerts, job.id)
 
     def create(self, request, *args, **kwargs):
         try:
-            logger.info("\n=== Debug Information ===")
-            logger.info(f"Request Method: {request.method}")
-            logger.info(f"Request Headers: {dict(request.headers)}")
-            logger.info(f"Request Data: {request.data}")
-            logger.info(f"Request User: {request.user}")
-            logger.info(f"User Type: {request.user.user_type}")
-            logger.info(f"Action: {self.action}")
-            logger.info("======================\n")
-
             if not request.user.is_authenticated:
                 return Response(
                     {'detail': 'Authentication required'},
@@ -111,14 +120,14 @@ class JobPostingViewSet(viewsets.ModelViewSet):
 
             serializer = self.get_serializer(data=request.data)
             if not serializer.is_valid():
-                logger.error(f"Serializer Errors: {serializer.errors}")
+                logger.info("Invalid job posting: %s", serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
             self.perform_create(serializer)
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         except Exception as e:
-            logger.error(f"Error creating job: {str(e)}")
+            logger.exception("Error creating job")
             return Response(
                 {'detail': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -128,8 +137,22 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         try:
             return super().update(request, *args, **kwargs)
         except Exception as e:
-            logger.error(f"Error in update: {str(e)}")
+            logger.exception("Error updating job")
             return Response(
                 {'detail': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+class SavedJobSearchViewSet(viewsets.ModelViewSet):
+    serializer_class = SavedJobSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'patch', 'delete']
+
+    def get_queryset(self):
+        return SavedJobSearch.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        index_saved_search(serializer.save(user=self.request.user))
+
+    def perform_update(self, serializer):
+        index_saved_search(serializer.save())
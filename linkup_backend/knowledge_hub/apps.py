@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class KnowledgeHubConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'knowledge_hub'
+
+    def ready(self):
+        try:
+            import knowledge_hub.signals
+        except ImportError:
+            pass
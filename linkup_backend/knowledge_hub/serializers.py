@@ -1,10 +1,13 @@
 from rest_framework import serializers
 from .models import Tag, Article, ArticleLike, ArticleComment, ArticleBookmark, ArticleMedia, Question, Answer, QuestionVote, AnswerVote
 from django.contrib.auth import get_user_model
+from authentication.serializers import AvatarField, LIST_AVATAR_SIZE
 
 User = get_user_model()
 
 class UserMinimalSerializer(serializers.ModelSerializer):
+    profile_picture = AvatarField(size=LIST_AVATAR_SIZE)
+
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'profile_picture']
@@ -0,0 +1,4 @@
+from linkup_backend.caching import watch_models
+from .models import Article, ArticleBookmark, ArticleComment, ArticleLike, ArticleMedia, Tag
+
+watch_models(Tag, Article, ArticleLike, ArticleBookmark, ArticleComment, ArticleMedia)
@@ -3,6 +3,8 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, F
+from django.contrib.auth import get_user_model
+from linkup_backend.caching import CatalogueCacheMixin
 from .models import (
     Tag, Article, ArticleLike, ArticleComment, ArticleBookmark, ArticleMedia,
     Question, Answer, QuestionVote, AnswerVote, QuestionView
@@ -14,17 +16,23 @@ from .serializers import (
     AnswerSerializer, AnswerCreateSerializer
 )
 
+User = get_user_model()
+
 # Create your views here.
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CatalogueCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
+    cache_models = (Tag,)
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     queryset = Article.objects.filter(is_published=True)
+    cache_models = (Article, ArticleLike, ArticleBookmark, ArticleComment, ArticleMedia, Tag, User)
+    # is_liked and is_bookmarked differ per user
+    cache_per_user = True
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
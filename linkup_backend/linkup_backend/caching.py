@@ -0,0 +1,171 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .models import CatalogueVersion
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def model_versions(models):
+    """
+    (token, last modified timestamp) stamps for the models, in order, read
+    from the database in one query so a bump in any process is seen at once.
+    Models never bumped yet get a stamp on first use.
+    """
+    labels = [_label(model) for model in models]
+    stamps = {
+        row.model: (str(row.version), row.modified)
+        for row in CatalogueVersion.objects.filter(model__in=labels)
+    }
+    for label in labels:
+        if label not in stamps:
+            row, _ = CatalogueVersion.objects.get_or_create(model=label, defaults={'modified': int(time.time())})
+            stamps[label] = (str(row.version), row.modified)
+    return [stamps[label] for label in labels]
+
+
+def bump_model_version(model):
+    """
+    Move a model to a new version once the caller's transaction commits.
+    Bumping inside it would hold the lock on the shared version row until
+    the commit, serialising every writer of the model; a reader seeing the
+    write before the bump only caches the newer data under the old stamp.
+    """
+    label = _label(model)
+    transaction.on_commit(lambda: _bump_label(label))
+
+
+def _bump_label(label):
+    now = int(time.time())
+    # Last-Modified has one second resolution; keep it strictly increasing
+    # so a second write within the same second still defeats If-Modified-Since
+    bumped = CatalogueVersion.objects.filter(model=label).update(
+        version=F('version') + 1,
+        modified=Greatest(Value(now), F('modified') + 1),
+    )
+    if not bumped:
+        try:
+            with transaction.atomic():
+                CatalogueVersion.objects.create(model=label, modified=now)
+        except IntegrityError:
+            # Created concurrently by a first read or bump; bump that row instead
+            _bump_label(label)
+
+
+def _bump(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def _bump_m2m(sender, action, instance, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_model_version(type(instance))
+        bump_model_version(model)
+
+
+def watch_models(*models):
+    """Bump the version of each model whenever one of its rows changes"""
+    for model in models:
+        uid = f'catalogue-version-{model._meta.label_lower}'
+        post_save.connect(_bump, sender=model, dispatch_uid=f'{uid}-save')
+        post_delete.connect(_bump, sender=model, dispatch_uid=f'{uid}-delete')
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(_bump_m2m, sender=field.remote_field.through, dispatch_uid=f'{uid}-{field.name}')
+
+
+class CatalogueCacheMixin:
+    """
+    Conditional GET and response caching for read-heavy endpoints.
+
+    The ETag is derived from the version stamps of `cache_models`, which
+    `watch_models` bumps on every write, so If-None-Match is answered with
+    304 after one indexed query and before any serialization. Otherwise
+    rendered bytes are served from the cache, keyed by path, query string,
+    renderer, version stamps and user class (or the user itself when `cache_per_user` is set because the
+    serializer output depends on who is asking).
+    """
+    cache_models = ()
+    cache_actions = ('list', 'retrieve')
+    cache_per_user = False
+
+    def get_cache_variant(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            return 'anon'
+        if self.cache_per_user:
+            return f'user:{user.pk}'
+        return 'staff' if user.is_staff else f'type:{user.user_type}'
+
+    def _cache_key(self, request, versions):
+        parts = [
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            self.get_cache_variant(request),
+        ] + [token for token, _ in versions]
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        versions = model_versions(self.cache_models)
+        key = self._cache_key(request, versions)
+        etag = quote_etag(key)
+        last_modified = max(modified for _, modified in versions)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+                return self._not_modified(etag, last_modified)
+        else:
+            since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            if since is not None and last_modified <= since:
+                return self._not_modified(etag, last_modified)
+
+        cached = cache.get(f'catalogue:response:{key}')
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = handler(request, *args, **kwargs)
+            # Rendered and stored in finalize_response
+            response._catalogue_cache_key = f'catalogue:response:{key}'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _not_modified(self, etag, last_modified):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(response, '_catalogue_cache_key', None)
+        if key and response.status_code == 200:
+            response.render()
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                settings.CATALOGUE_CACHE_TIMEOUT,
+            )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.cache_actions:
+            return super().list(request, *args, **kwargs)
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.cache_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
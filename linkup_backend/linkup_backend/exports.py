@@ -0,0 +1,302 @@
+import csv
+import logging
+import re
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from .models import ExportJob
+from .tasks import submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Characters XML 1.0 cannot carry, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class Export:
+    """A named table: column headers and a queryset rendered one row at a time"""
+
+    def __init__(self, filename, columns, queryset, row):
+        self.filename = filename
+        self.columns = columns
+        self.queryset = queryset
+        self.row = row
+
+    def rows(self):
+        # iterator() keeps only one chunk of model instances alive at a time
+        for obj in self.queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield self.row(obj)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class _Lines:
+    """File-like sink that hands back whatever the csv writer wrote"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(export):
+    """Yield the export as CSV, a buffer of EXPORT_CHUNK_SIZE rows at a time"""
+    writer = csv.writer(_Lines())
+    buffer = ['\ufeff' + writer.writerow(export.columns)]
+    for row in export.rows():
+        cells = []
+        for value in row:
+            text = _text(value)
+            if text.startswith(FORMULA_PREFIXES) and not isinstance(value, (int, float, Decimal)):
+                text = "'" + text
+            cells.append(text)
+        buffer.append(writer.writerow(cells))
+        if len(buffer) >= settings.EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+class _Drain:
+    """Unseekable sink for zipfile; the generator empties it after every write"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _xlsx_row(number, values):
+    cells = []
+    for index, value in enumerate(values):
+        ref = f'{_column_name(index)}{number}'
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_XML_ILLEGAL.sub('', _text(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def iter_xlsx(export):
+    """
+    Yield the export as a single-sheet XLSX workbook. The worksheet is
+    deflated into the zip as rows arrive, using inline strings so no shared
+    string table has to be held in memory.
+    """
+    sink = _Drain()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield sink.take()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(1, export.columns).encode('utf-8'))
+            for number, row in enumerate(export.rows(), start=2):
+                sheet.write(_xlsx_row(number, row).encode('utf-8'))
+                if number % settings.EXPORT_CHUNK_SIZE == 0:
+                    yield sink.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.take()
+
+
+WRITERS = {
+    'csv': iter_csv,
+    'xlsx': iter_xlsx,
+}
+
+
+def _job(job_id, user):
+    """The user's export job, or None when it does not exist or expired"""
+    expired_before = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    try:
+        return ExportJob.objects.filter(pk=job_id, user=user, created_at__gte=expired_before).first()
+    except ValidationError:
+        # Not a job id at all
+        return None
+
+
+def run_export(job_id, build, args, filetype):
+    """Render an export into default storage for later download"""
+    try:
+        export = build(*args)
+        with tempfile.TemporaryFile() as handle:
+            for chunk in WRITERS[filetype](export):
+                handle.write(chunk)
+            handle.seek(0)
+            filename = f'{export.filename}.{filetype}'
+            path = default_storage.save(f'exports/{job_id}/{filename}', File(handle, name=filename))
+    except Exception:
+        logger.exception('Export %s failed', job_id)
+        ExportJob.objects.filter(pk=job_id).update(status='failed')
+        raise
+    ExportJob.objects.filter(pk=job_id).update(status='ready', path=path, filename=filename)
+
+
+def _prune_jobs(user):
+    """Drop the user's expired jobs and their files"""
+    expired_before = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    expired = ExportJob.objects.filter(user=user, created_at__lt=expired_before)
+    for path in expired.exclude(path='').values_list('path', flat=True):
+        try:
+            default_storage.delete(path)
+        except OSError:
+            logger.warning('Could not delete expired export %s', path)
+    expired.delete()
+
+
+def start_export(user, build, args, filetype):
+    """Queue an export on the worker pool and return its job id"""
+    _prune_jobs(user)
+    job = ExportJob.objects.create(user=user, filetype=filetype)
+    # Workers look the job up by id, so hand it over once the row is committed
+    submit_on_commit(run_export, job.pk, build, args, filetype)
+    return job.pk
+
+
+def export_response(request, build, *args):
+    """
+    Answer an export request: stream the file right away, or with `?async=1`
+    render it in the background and return the job to poll. `?filetype=`
+    picks csv (default) or xlsx.
+    """
+    filetype = request.query_params.get('filetype', 'csv').lower()
+    if filetype not in WRITERS:
+        return Response(
+            {'detail': f"filetype must be one of: {', '.join(WRITERS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if request.query_params.get('async', '').lower() in ('1', 'true'):
+        job_id = start_export(request.user, build, args, filetype)
+        return Response(
+            {
+                'job': job_id,
+                'status': 'pending',
+                'status_url': request.build_absolute_uri(reverse('export-status', args=[job_id])),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    export = build(*args)
+    response = StreamingHttpResponse(WRITERS[filetype](export), content_type=CONTENT_TYPES[filetype])
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}.{filetype}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_status(request, job_id):
+    job = _job(job_id, request.user)
+    if job is None:
+        return Response({'detail': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    data = {'job': job.pk, 'status': job.status}
+    if job.status == 'ready':
+        data['download_url'] = request.build_absolute_uri(reverse('export-download', args=[job_id]))
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_download(request, job_id):
+    job = _job(job_id, request.user)
+    if job is None or job.status != 'ready':
+        return Response({'detail': 'Export not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return FileResponse(
+        default_storage.open(job.path, 'rb'),
+        as_attachment=True,
+        filename=job.filename,
+        content_type=CONTENT_TYPES[job.filetype],
+    )
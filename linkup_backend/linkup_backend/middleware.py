@@ -0,0 +1,87 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .observability import VERBOSE_HEADER, verbose_logging
+
+logger = logging.getLogger('linkup.requests')
+
+# Never written to the logs, even in verbose mode
+REDACTED_HEADERS = {'authorization', 'cookie', 'x-csrftoken'}
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries, optionally keeping the SQL"""
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.statements is not None:
+                self.statements.append({'sql': sql, 'ms': round(elapsed * 1000, 2)})
+
+
+class RequestTimingMiddleware:
+    """
+    Logs one structured record per request with its duration, query count
+    and response size. Successful fast requests are sampled at
+    REQUEST_LOG_SAMPLE_RATE; errors and requests slower than
+    REQUEST_LOG_SLOW_MS are always logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        keep_sql = settings.VERBOSE_REQUEST_LOGGING or VERBOSE_HEADER in request.headers
+        counter = QueryCounter(keep_sql=keep_sql)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        verbose = verbose_logging(request)
+        if not (verbose or self.should_log(response, duration_ms)):
+            return response
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+            'db_queries': counter.count,
+            'db_ms': round(counter.duration * 1000, 1),
+            'response_bytes': None if response.streaming else len(response.content),
+            'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+        }
+        if verbose:
+            record['query_params'] = request.GET.dict()
+            record['headers'] = {
+                name: value for name, value in request.headers.items()
+                if name.lower() not in REDACTED_HEADERS
+            }
+            record['sql'] = counter.statements
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra=record)
+        return response
+
+    def should_log(self, response, duration_ms):
+        if response.status_code >= 500 or duration_ms >= settings.REQUEST_LOG_SLOW_MS:
+            return True
+        return random.random() < settings.REQUEST_LOG_SAMPLE_RATE
@@ -0,0 +1,46 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class CatalogueVersion(models.Model):
+    """
+    Version stamp of a cached model, bumped by linkup_backend.caching on every
+    write. Kept in the database so every process sees a bump at once.
+    """
+    # Model label, e.g. jobs.jobposting
+    model = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+    # Unix time of the last bump; strictly increasing for Last-Modified
+    modified = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.model} v{self.version}"
+
+
+class ExportJob(models.Model):
+    """A background export, rendered by linkup_backend.exports into default storage"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs')
+    filetype = models.CharField(max_length=10)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Storage path of the rendered file, and the name it is downloaded as
+    path = models.CharField(max_length=255, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='export_job_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename or self.filetype} export ({self.status})"
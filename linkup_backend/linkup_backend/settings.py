@@ -49,6 +49,8 @@ INSTALLED_APPS = [
     'channels',
     'games',
     'knowledge_hub',
+    # Shared models of the project package (caching, exports)
+    'linkup_backend',
     # Google Authentication
     'django.contrib.sites',
     'allauth',
@@ -61,6 +63,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'linkup_backend.middleware.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -200,8 +203,8 @@ CSRF_COOKIE_SAMESITE = None
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'dj_rest_auth.jwt_auth.JWTCookieAuthentication',
+        'authentication.jwt_auth.ClaimsJWTAuthentication',
+        'authentication.jwt_auth.ClaimsJWTCookieAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -234,6 +237,20 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'linkup-default',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+# In-process worker pool for background tasks (linkup_backend.tasks)
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 4))
+
 # WebSocket specific settings
 WEBSOCKET_ACCEPT_ALL = True  # Accept WebSocket connections from all origins in development
 
@@ -243,11 +260,23 @@ AUTH_USER_MODEL = 'authentication.CustomUser'
 # Razorpay settings
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
+RAZORPAY_WEBHOOK_SECRET = os.getenv('RAZORPAY_WEBHOOK_SECRET')
 RAZORPAY_CURRENCY = 'INR'  # Default currency
 RAZORPAY_COMPANY_NAME = 'LinkUp Alumni Association'
 RAZORPAY_COMPANY_DESCRIPTION = 'Alumni Association Donation'
 RAZORPAY_COMPANY_LOGO = None  # URL to your logo if you have one
 
+# Payment gateway client (donations.gateway); point PAYMENT_GATEWAY_URL at
+# `manage.py run_gateway_stub` to work offline
+PAYMENT_GATEWAY_URL = os.getenv('PAYMENT_GATEWAY_URL', 'https://api.razorpay.com')
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_CONNECT_TIMEOUT', 3.05))  # seconds
+PAYMENT_GATEWAY_READ_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_READ_TIMEOUT', 8))  # seconds
+PAYMENT_GATEWAY_RETRIES = 2  # extra attempts after the first
+PAYMENT_GATEWAY_BACKOFF = 0.25  # seconds; base of the jittered exponential backoff
+PAYMENT_GATEWAY_POOL_SIZE = 20  # keep-alive connections to the gateway
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = 5  # consecutive failures before failing fast
+PAYMENT_GATEWAY_BREAKER_RESET = 30  # seconds before a trial call is let through
+
 # Google Authentication Settings
 SITE_ID = 1
 
@@ -296,3 +325,71 @@ SOCIAL_AUTH_PIPELINE = (
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
 ACCOUNT_LOGOUT_REDIRECT_URL = '/auth/login/'
+
+# Alumni directory settings
+DIRECTORY_FACET_CACHE_TIMEOUT = 300  # seconds
+DIRECTORY_TOP_SKILLS = 10
+
+# Catalogue endpoint caching (linkup_backend.caching)
+CATALOGUE_CACHE_TIMEOUT = 300  # seconds a rendered response is kept
+
+# iCalendar feeds (events.ical)
+CALENDAR_FEED_CACHE_TIMEOUT = 3600  # seconds
+CALENDAR_FEED_PAST_DAYS = 90
+
+# Event reminders and announcements (events.notifications)
+EVENT_REMINDER_WINDOWS = {'24h': 24 * 60, '1h': 60}  # label -> minutes before start
+EVENT_NOTIFICATION_CHUNK_SIZE = 1000  # registrations notified per bulk insert
+
+# Scans accepted per check-in request (events.checkin)
+CHECK_IN_MAX_BATCH = 5000
+
+# CSV/XLSX exports (linkup_backend.exports)
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per query and written per streamed chunk
+EXPORT_JOB_TIMEOUT = 24 * 3600  # seconds a background export stays downloadable
+
+# Kanban ranks (projects.ranking)
+KANBAN_RANK_STEP = 1024.0  # gap between neighbours after a rebalance
+KANBAN_RANK_MIN_GAP = 1e-6  # respread a list once neighbours are closer than this
+
+# Donation analytics (donations.analytics)
+ANALYTICS_HOURLY_RETENTION_DAYS = 35  # days of hourly rollups kept; daily ones are kept for good
+DONATION_LEADERBOARD_MAX = 100  # donors a leaderboard request may ask for
+
+# Donation receipts (donations.receipts)
+RECEIPT_ISSUER = os.getenv('RECEIPT_ISSUER', 'LinkUp Alumni Association')
+RECEIPT_NUMBER_PREFIX = 'LU'
+
+# Avatar renditions generated from profile pictures, one per width the
+# serializers ask for: nested users and directory cards, and profile pages
+AVATAR_LIST_SIZE = 64
+AVATAR_PROFILE_SIZE = 256
+AVATAR_SIZES = (AVATAR_LIST_SIZE, AVATAR_PROFILE_SIZE)
+AVATAR_WEBP_QUALITY = 80
+
+# Structured request logging (linkup_backend.middleware.RequestTimingMiddleware)
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', 0.1))
+REQUEST_LOG_SLOW_MS = int(os.getenv('REQUEST_LOG_SLOW_MS', 500))
+# Verbose dumps for every request; staff can also ask per request with X-Debug-Logging
+VERBOSE_REQUEST_LOGGING = os.getenv('VERBOSE_REQUEST_LOGGING', '') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'json': {
+            '()': 'linkup_backend.observability.AsyncJsonHandler',
+        },
+    },
+    'root': {
+        'handlers': ['json'],
+        'level': os.getenv('LOG_LEVEL', 'WARNING'),
+    },
+    'loggers': {
+        'linkup.requests': {
+            'handlers': ['json'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
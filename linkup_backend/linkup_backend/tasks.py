@@ -0,0 +1,49 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Shared in-process worker pool for work that must stay off the request
+    path. Threads suit the I/O and Pillow work queued here, both of which
+    release the GIL.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_WORKERS,
+                    thread_name_prefix='linkup-worker',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+        raise
+    finally:
+        # Worker threads open their own connections; never leave them idle
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Run func in the worker pool and return its Future"""
+    return get_executor().submit(_run, func, args, kwargs)
+
+
+def submit_on_commit(func, *args, **kwargs):
+    """Queue func once the current transaction commits, so workers see its writes"""
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
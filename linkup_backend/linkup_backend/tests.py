@@ -0,0 +1,216 @@
+import atexit
+import io
+import json
+import logging
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import exports
+from .middleware import RequestTimingMiddleware
+from .models import ExportJob
+from .observability import VERBOSE_HEADER, AsyncJsonHandler
+
+User = get_user_model()
+
+VERBOSE = {'HTTP_' + VERBOSE_HEADER.upper().replace('-', '_'): '1'}
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(email=f'{name}@example.com', username=name, password='pass', **fields)
+
+
+def run_in_foreground(func, *args, **kwargs):
+    # Stands in for linkup_backend.tasks.submit so queued work runs inline
+    func(*args, **kwargs)
+
+
+@override_settings(REQUEST_LOG_SAMPLE_RATE=0, REQUEST_LOG_SLOW_MS=60000, VERBOSE_REQUEST_LOGGING=False)
+class RequestLoggingTests(TestCase):
+    def setUp(self):
+        self.user = make_user('member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def logged(self, path='/api/auth/me/', **headers):
+        with self.assertLogs('linkup.requests', level='INFO') as logs:
+            self.client.get(path, **headers)
+        [record] = logs.records
+        return record
+
+    def test_sampled_out_requests_are_not_logged(self):
+        with self.assertNoLogs('linkup.requests'):
+            self.client.get('/api/auth/me/')
+
+    @override_settings(REQUEST_LOG_SAMPLE_RATE=1)
+    def test_record_describes_the_request(self):
+        record = self.logged()
+
+        self.assertEqual(record.getMessage(), 'GET /api/auth/me/ 200')
+        self.assertEqual((record.method, record.path, record.status), ('GET', '/api/auth/me/', 200))
+        self.assertEqual(record.view, 'current-user')
+        self.assertEqual(record.user_id, self.user.pk)
+        self.assertGreater(record.db_queries, 0)
+        self.assertGreater(record.response_bytes, 0)
+        self.assertFalse(hasattr(record, 'sql'))
+
+    @override_settings(REQUEST_LOG_SLOW_MS=0)
+    def test_slow_requests_are_always_logged(self):
+        self.assertEqual(self.logged().status, 200)
+
+    def test_server_errors_are_always_logged(self):
+        middleware = RequestTimingMiddleware(lambda request: HttpResponse(status=503))
+
+        with self.assertLogs('linkup.requests', level='INFO') as logs:
+            middleware(RequestFactory().get('/broken/'))
+
+        self.assertEqual(logs.records[0].status, 503)
+
+    def test_staff_can_ask_for_a_verbose_record(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        record = self.logged(HTTP_AUTHORIZATION='Bearer secret', **VERBOSE)
+
+        self.assertEqual(len(record.sql), record.db_queries)
+        self.assertIn(VERBOSE_HEADER, record.headers)
+        self.assertNotIn('Authorization', record.headers)
+
+    def test_verbose_header_is_ignored_for_other_users(self):
+        with self.assertNoLogs('linkup.requests'):
+            self.client.get('/api/auth/me/', **VERBOSE)
+
+
+class JsonHandlerTests(TestCase):
+    def test_records_are_written_as_json_lines(self):
+        stream = io.StringIO()
+        handler = AsyncJsonHandler(stream)
+        logger = logging.getLogger('linkup.tests.json')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning('%s failed', 'export', extra={'job_id': 7})
+        # Flushes the queue; the atexit hook would stop the listener a second time
+        handler.listener.stop()
+        atexit.unregister(handler.listener.stop)
+
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry['message'], 'export failed')
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['job_id'], 7)
+        self.assertIn('ts', entry)
+
+
+@mock.patch('linkup_backend.tasks.submit', run_in_foreground)
+class ExportTests(TestCase):
+    url = '/api/auth/directory/export/'
+
+    def setUp(self):
+        # Rendered exports hold member emails; keep them out of the project's MEDIA_ROOT
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = make_user('admin', is_staff=True)
+        self.member = make_user('member', company='=HYPERLINK("http://evil")', first_name='Ada')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def start(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.url, {'async': '1', **params})
+        self.assertEqual(response.status_code, 202)
+        return response.data['job']
+
+    def test_csv_is_streamed_with_formulas_neutralised(self):
+        response, body = self.download()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="directory.csv"')
+        lines = body.decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['User', 'Name', 'Email'])
+        self.assertEqual(len(lines), 3)
+        self.assertIn('\'=HYPERLINK', lines[2])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_rows_are_streamed_in_chunks(self):
+        for i in range(5):
+            make_user(f'alumnus{i}')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(list(response.streaming_content)), 4)
+
+    def test_xlsx_is_a_workbook(self):
+        response, body = self.download(filetype='xlsx')
+
+        self.assertEqual(response['Content-Type'], exports.CONTENT_TYPES['xlsx'])
+        with zipfile.ZipFile(io.BytesIO(body)) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('member@example.com', sheet)
+        self.assertIn('<row r="3">', sheet)
+
+    def test_unknown_filetype_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'filetype': 'pdf'}).status_code, 400)
+
+    def test_only_admins_can_export_the_directory(self):
+        self.client.force_authenticate(self.member)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, {'async': '1'}).status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_background_export_can_be_polled_and_downloaded(self):
+        _, streamed = self.download()
+
+        job_id = self.start()
+        status = self.client.get(f'/api/exports/{job_id}/')
+        download = self.client.get(f'/api/exports/{job_id}/download/')
+
+        self.assertEqual(status.data['status'], 'ready')
+        self.assertTrue(status.data['download_url'].endswith(f'/api/exports/{job_id}/download/'))
+        self.assertEqual(b''.join(download.streaming_content), streamed)
+        self.assertTrue(default_storage.exists(ExportJob.objects.get(pk=job_id).path))
+
+    def test_jobs_are_private_to_their_owner(self):
+        job_id = self.start()
+        self.client.force_authenticate(make_user('other', is_staff=True))
+
+        self.assertEqual(self.client.get(f'/api/exports/{job_id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/exports/{job_id}/download/').status_code, 404)
+        self.assertEqual(self.client.get('/api/exports/not-a-job/').status_code, 404)
+
+    def test_failed_export_is_reported(self):
+        job = ExportJob.objects.create(user=self.admin, filetype='csv')
+
+        with self.assertRaises(ZeroDivisionError), self.assertLogs('linkup_backend.exports', level='ERROR'):
+            exports.run_export(job.pk, lambda: 1 / 0, (), 'csv')
+
+        self.assertEqual(self.client.get(f'/api/exports/{job.pk}/').data['status'], 'failed')
+
+    def test_expired_jobs_and_their_files_are_pruned(self):
+        old_id = self.start()
+        path = ExportJob.objects.get(pk=old_id).path
+        ExportJob.objects.filter(pk=old_id).update(created_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(self.client.get(f'/api/exports/{old_id}/').status_code, 404)
+        self.start()
+
+        self.assertFalse(ExportJob.objects.filter(pk=old_id).exists())
+        self.assertFalse(default_storage.exists(path))
@@ -19,6 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .exports import export_download, export_status
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
@@ -32,6 +34,8 @@ urlpatterns = [
     path('api/mentorship/', include('mentorship.urls')),
     path('api/games/', include('games.urls')),
     path('api/knowledge-hub/', include('knowledge_hub.urls')),
+    path('api/exports/<str:job_id>/', export_status, name='export-status'),
+    path('api/exports/<str:job_id>/download/', export_download, name='export-download'),
     
     # Django allauth URLs
     path('accounts/', include('allauth.urls')),
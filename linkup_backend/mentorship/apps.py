@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MentorshipConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mentorship'
+
+    def ready(self):
+        try:
+            import mentorship.signals
+        except ImportError:
+            pass
@@ -0,0 +1,4 @@
+from linkup_backend.caching import watch_models
+from .models import Meeting, MentorProfile
+
+watch_models(MentorProfile, Meeting)
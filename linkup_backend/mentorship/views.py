@@ -5,7 +5,9 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.utils import timezone
+from django.contrib.auth import get_user_model
 
+from linkup_backend.caching import CatalogueCacheMixin
 from .models import MentorProfile, MeetingRequest, Meeting
 from .serializers import (
     MentorProfileSerializer, MentorProfileCreateUpdateSerializer,
@@ -13,12 +15,15 @@ from .serializers import (
     MeetingSerializer
 )
 
+User = get_user_model()
 
-class MentorProfileViewSet(viewsets.ModelViewSet):
+
+class MentorProfileViewSet(CatalogueCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet for mentor profiles
     """
     queryset = MentorProfile.objects.all()
+    cache_models = (MentorProfile, User)
     filter_backends = [filters.SearchFilter]
     search_fields = ['skills', 'user__username', 'user__first_name', 'user__last_name']
     permission_classes = [permissions.IsAuthenticated]
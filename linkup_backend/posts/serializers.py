@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from .models import Post, Comment, Poll, PollOption
 from django.contrib.auth import get_user_model
+from authentication.serializers import AvatarField, LIST_AVATAR_SIZE
 
 User = get_user_model()
 
 class UserBriefSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
+    profile_picture = AvatarField(size=LIST_AVATAR_SIZE)
     
     class Meta:
         model = User
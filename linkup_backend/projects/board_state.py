@@ -0,0 +1,74 @@
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, prefetch_related_objects
+
+from .models import Board, BoardRemoval, Column, Task, TaskAssignment
+
+# Every change to a board bumps Board.version and stamps the changed column
+# or task with the new version, so clients can revalidate a whole board with
+# one ETag and fetch only what changed since the version they hold.
+
+# Model -> lookup from a board to its rows
+PATHS = {
+    Column: 'columns',
+    Task: 'columns__tasks',
+}
+
+
+def changed(rows):
+    """Bump the version of the boards holding `rows` and stamp the rows with it"""
+    path = PATHS[rows.model]
+    # The bump locks the board row, so concurrent changes get distinct versions
+    Board.objects.filter(**{f'{path}__in': rows}).update(version=F('version') + 1)
+    rows.update(version=Subquery(Board.objects.filter(**{path: OuterRef('pk')}).values('version')[:1]))
+
+
+def removed(board_id, kind, object_id):
+    """Bump a board's version for a deleted column or task and record the removal"""
+    Board.objects.filter(pk=board_id).update(version=F('version') + 1)
+    version = Board.objects.filter(pk=board_id).values_list('version', flat=True).first()
+    if version is not None:
+        BoardRemoval.objects.create(board_id=board_id, kind=kind, object_id=object_id, version=version)
+
+
+def column_prefetch():
+    """Prefetch of board columns with the task counts BoardDetailSerializer shows"""
+    return Prefetch('columns', queryset=Column.objects.annotate(task_count=Count('tasks')))
+
+
+def with_columns(board):
+    prefetch_related_objects([board], column_prefetch())
+    return board
+
+
+def columns(board, since=None):
+    """Columns of a board with their task counts, optionally only those changed after version `since`"""
+    items = Column.objects.filter(board=board).annotate(task_count=Count('tasks'))
+    if since is not None:
+        items = items.filter(version__gt=since)
+    return items.order_by('order')
+
+
+def tasks(board, since=None):
+    """
+    Tasks of a board with everything the task serializer shows: creators and
+    comment counts in one query, assignments and assignees in a second.
+    """
+    items = (
+        Task.objects.filter(column__board=board)
+        .select_related('created_by')
+        .annotate(comment_count=Count('comments'))
+        .prefetch_related(Prefetch(
+            'assignments',
+            queryset=TaskAssignment.objects.select_related('assignee', 'assigned_by'),
+        ))
+    )
+    if since is not None:
+        items = items.filter(version__gt=since)
+    return items.order_by('column_id', 'order')
+
+
+def removals(board, since):
+    """Ids of the columns and tasks removed from a board after version `since`"""
+    gone = {'columns': [], 'tasks': []}
+    for kind, object_id in BoardRemoval.objects.filter(board=board, version__gt=since).values_list('kind', 'object_id'):
+        gone[f'{kind}s'].append(object_id)
+    return gone
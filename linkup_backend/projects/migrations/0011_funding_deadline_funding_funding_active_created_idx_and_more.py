@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_alter_funding_qr_code_alter_funding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='funding',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='funding',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['-created_at'], name='funding_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='funding',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['deadline'], name='funding_active_deadline_idx'),
+        ),
+    ]
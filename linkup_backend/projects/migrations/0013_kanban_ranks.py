@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:06
+
+from itertools import groupby
+
+from django.db import migrations, models
+
+RANK_STEP = 1024.0
+
+
+def spread_ranks(apps, schema_editor):
+    """
+    Turn the old 0..n positions into evenly spaced ranks, keeping each
+    list's effective order (ties included) so no board visibly changes.
+    """
+    lists = [
+        (apps.get_model('projects', 'Column'), 'board_id', ['order', 'created_at']),
+        (apps.get_model('projects', 'Task'), 'column_id', ['order', 'due_date', '-created_at']),
+    ]
+    for model, scope, ordering in lists:
+        items = model.objects.order_by(scope, *ordering).only('pk', scope, 'order')
+        changed = []
+        for _, group in groupby(items.iterator(chunk_size=2000), key=lambda item: getattr(item, scope)):
+            for index, item in enumerate(group, start=1):
+                item.order = index * RANK_STEP
+                changed.append(item)
+            if len(changed) >= 1000:
+                model.objects.bulk_update(changed, ['order'])
+                changed = []
+        model.objects.bulk_update(changed, ['order'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_project_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='column',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='column',
+            index=models.Index(fields=['board', 'order'], name='projects_column_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['column', 'order'], name='projects_task_rank_idx'),
+        ),
+        migrations.RunPython(spread_ranks, migrations.RunPython.noop),
+    ]
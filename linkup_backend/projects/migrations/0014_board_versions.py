@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_kanban_ranks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='BoardRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('column', 'Column'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('version', models.PositiveBigIntegerField()),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='removals', to='projects.board')),
+            ],
+            options={
+                'ordering': ['version'],
+                'indexes': [models.Index(fields=['board', 'version'], name='projects_board_removal_idx')],
+            },
+        ),
+    ]
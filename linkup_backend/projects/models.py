@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from django.utils.text import slugify
 import uuid
@@ -37,6 +38,10 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset for the cursor-paginated project list
+            models.Index(fields=['-created_at', '-id'], name='projects_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -267,6 +272,9 @@ class Board(models.Model):
     )
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
+    # Bumped on every change to the board's columns, tasks, assignments and
+    # comments; see projects.board_state
+    version = models.PositiveBigIntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -290,7 +298,10 @@ class Column(models.Model):
     )
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
-    order = models.PositiveIntegerField(default=0)  # For ordering columns on the board
+    # Rank on the board; see projects.ranking
+    order = models.FloatField(default=0)
+    # Board version of the last change
+    version = models.PositiveBigIntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -299,6 +310,9 @@ class Column(models.Model):
     class Meta:
         ordering = ['order']
         unique_together = ('board', 'title')
+        indexes = [
+            models.Index(fields=['board', 'order'], name='projects_column_rank_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.board.title})"
@@ -324,7 +338,10 @@ class Task(models.Model):
     description = models.TextField(blank=True, null=True)
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
     due_date = models.DateField(blank=True, null=True)
-    order = models.PositiveIntegerField(default=0)  # For ordering tasks within a column
+    # Rank within the column; see projects.ranking
+    order = models.FloatField(default=0)
+    # Board version of the last change to the task, its assignments or comments
+    version = models.PositiveBigIntegerField(default=0)
     
     # Task attributes
     is_blocked = models.BooleanField(default=False)
@@ -347,10 +364,42 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['order', 'due_date', '-created_at']
+        indexes = [
+            models.Index(fields=['column', 'order'], name='projects_task_rank_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+class BoardRemoval(models.Model):
+    """
+    A column or task deleted from a board, kept so delta snapshots can tell
+    clients what to drop
+    """
+    KIND_CHOICES = (
+        ('column', 'Column'),
+        ('task', 'Task'),
+    )
+    
+    board = models.ForeignKey(
+        Board,
+        on_delete=models.CASCADE,
+        related_name='removals'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    # Board version the removal was made at
+    version = models.PositiveBigIntegerField()
+    
+    class Meta:
+        ordering = ['version']
+        indexes = [
+            models.Index(fields=['board', 'version'], name='projects_board_removal_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} removed at version {self.version}"
+
 class TaskAssignment(models.Model):
     """
     Model to track task assignments to project members
@@ -492,6 +541,14 @@ class Funding(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     note = models.TextField(blank=True, null=True)
+    # Active requests past their deadline are closed by expire_listings
+    deadline = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(status='active'), name='funding_active_created_idx'),
+            models.Index(fields=['deadline'], condition=Q(status='active'), name='funding_active_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.project.title}"
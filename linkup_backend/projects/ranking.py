@@ -0,0 +1,137 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from linkup_backend.tasks import submit_on_commit
+from . import board_state
+from .models import Board, Column, Task
+
+logger = logging.getLogger(__name__)
+
+# Kanban items are ordered by a float rank. Moving one picks a rank between
+# its new neighbours, so a move writes a single row; the ranks of a list are
+# spread out again in the background once neighbours get too close.
+
+# Ranked model -> (field scoping a list, model locked while the list changes)
+LISTS = {
+    Task: ('column', Column),
+    Column: ('board', Board),
+}
+
+
+class RankError(Exception):
+    """The requested neighbour is not in the list"""
+
+
+def _items(model, scope_id, exclude=None):
+    field, _ = LISTS[model]
+    items = model.objects.filter(**{f'{field}_id': scope_id})
+    if exclude is not None:
+        items = items.exclude(pk=exclude)
+    return items
+
+
+def lock(model, scope_id):
+    """Serialize changes to one list for the rest of the transaction"""
+    _, owner = LISTS[model]
+    owner.objects.select_for_update().filter(pk=scope_id).values_list('pk', flat=True).first()
+
+
+def last_rank(model, scope_id):
+    """Rank that places a new item at the end of the list"""
+    highest = _items(model, scope_id).aggregate(rank=Max('order'))['rank']
+    return settings.KANBAN_RANK_STEP if highest is None else highest + settings.KANBAN_RANK_STEP
+
+
+def neighbours_at(model, scope_id, position, exclude=None):
+    """
+    Ranks either side of a 0-based `position` in the list, ignoring the item
+    being moved; None stands for the end of the list.
+    """
+    items = _items(model, scope_id, exclude).values_list('order', flat=True)
+    if position <= 0:
+        return None, items.first()
+    pair = list(items[position - 1:position + 1])
+    if not pair:
+        return neighbours_at_end(model, scope_id, exclude)
+    return pair[0], (pair[1] if len(pair) > 1 else None)
+
+
+def neighbours_at_end(model, scope_id, exclude=None):
+    highest = _items(model, scope_id, exclude).aggregate(rank=Max('order'))['rank']
+    return highest, None
+
+
+def neighbours_of(model, scope_id, before=None, after=None, exclude=None):
+    """
+    Ranks around the slot right after item `after` or right before item
+    `before`: two indexed lookups whatever the size of the list.
+    """
+    items = _items(model, scope_id, exclude)
+    anchor_pk = after if after is not None else before
+    anchor = items.filter(pk=anchor_pk).values_list('order', flat=True).first()
+    if anchor is None:
+        raise RankError('The neighbouring item is not in this list')
+    if after is not None:
+        following = items.filter(order__gt=anchor).order_by('order').values_list('order', flat=True).first()
+        return anchor, following
+    preceding = items.filter(order__lt=anchor).order_by('-order').values_list('order', flat=True).first()
+    return preceding, anchor
+
+
+def rank_between(lower, upper):
+    """A rank strictly between two neighbours, or None when floats have no room left"""
+    step = settings.KANBAN_RANK_STEP
+    if lower is None and upper is None:
+        return step
+    if lower is None:
+        return upper - step
+    if upper is None:
+        return lower + step
+    rank = (lower + upper) / 2
+    if not lower < rank < upper:
+        return None
+    return rank
+
+
+def place(model, scope_id, find):
+    """
+    Rank for an item moving into the slot `find()` returns the neighbours
+    of, inside the caller's locked transaction. Crowded lists are respread
+    in the background; a list with no room at all is respread right away.
+    """
+    lower, upper = find()
+    rank = rank_between(lower, upper)
+    if rank is None:
+        rebalance(model, scope_id)
+        lower, upper = find()
+        rank = rank_between(lower, upper)
+    elif lower is not None and upper is not None and upper - lower < settings.KANBAN_RANK_MIN_GAP:
+        schedule_rebalance(model, scope_id)
+    return rank
+
+
+def rebalance(model, scope_id):
+    """Respread the ranks of one list evenly, keeping its order; returns the rows rewritten"""
+    step = settings.KANBAN_RANK_STEP
+    with transaction.atomic():
+        lock(model, scope_id)
+        items = list(_items(model, scope_id).only('pk', 'order'))
+        changed = []
+        for index, item in enumerate(items, start=1):
+            if item.order != index * step:
+                item.order = index * step
+                changed.append(item)
+        # Only the rank column is written; updated_at stays as it was
+        model.objects.bulk_update(changed, ['order'], batch_size=500)
+        if changed:
+            board_state.changed(model.objects.filter(pk__in=[item.pk for item in changed]))
+    if changed:
+        logger.info('Rebalanced %d %s ranks in %s', len(changed), model.__name__, scope_id)
+    return len(changed)
+
+
+def schedule_rebalance(model, scope_id):
+    submit_on_commit(rebalance, model, scope_id)
@@ -1,3 +1,4 @@
+import logging
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
@@ -7,11 +8,14 @@ from .models import (
     ProjectInvitation, Funding
 )
 from decimal import Decimal, InvalidOperation
+from authentication.serializers import AvatarField, LIST_AVATAR_SIZE
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class UserMiniSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
+    profile_picture = AvatarField(size=LIST_AVATAR_SIZE)
     
     class Meta:
         model = User
@@ -51,18 +55,17 @@ class ProjectListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'creator', 'workspace']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        # Annotated by with_list_relations in the project views
+        count = getattr(obj, 'member_count', None)
+        return obj.members.count() if count is None else count
     
     def get_workspace_slug(self, obj):
         try:
             workspace = obj.workspace
             if workspace:
-                print(f"Found workspace for project {obj.id}: {workspace.slug}")
                 return workspace.slug
-            print(f"No workspace found for project {obj.id}")
             return None
         except Workspace.DoesNotExist:
-            print(f"Workspace does not exist for project {obj.id}")
             return None
 
 class ProjectDetailSerializer(serializers.ModelSerializer):
@@ -82,7 +85,8 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'creator']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        count = getattr(obj, 'member_count', None)
+        return obj.members.count() if count is None else count
 
 class ProjectCreateSerializer(serializers.ModelSerializer):
     creator = UserMiniSerializer(read_only=True)
@@ -107,12 +111,11 @@ class ProjectCreateSerializer(serializers.ModelSerializer):
                 title=project.title,  # Use project title directly
                 description=project.short_description
             )
-            print(f"Created workspace with slug: {workspace.slug}")
             
             return project
             
         except Exception as e:
-            print(f"Error in project creation: {str(e)}")
+            logger.exception("Error in project creation")
             raise serializers.ValidationError({"detail": f"Failed to create project: {str(e)}"})
 
 class JoinRequestSerializer(serializers.ModelSerializer):
@@ -328,10 +331,13 @@ class TaskSerializer(serializers.ModelSerializer):
             'attachment_url', 'created_at', 'updated_at',
             'created_by', 'assignments', 'comments_count'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
+        # Ranks change through the move action
+        read_only_fields = ['id', 'order', 'created_at', 'updated_at', 'created_by']
     
     def get_comments_count(self, obj):
-        return obj.comments.count()
+        # Annotated by projects.board_state.tasks
+        count = getattr(obj, 'comment_count', None)
+        return obj.comments.count() if count is None else count
     
     def get_attachment_url(self, obj):
         request = self.context.get('request')
@@ -354,10 +360,13 @@ class ColumnSerializer(serializers.ModelSerializer):
             'id', 'board', 'title', 'description', 
             'order', 'created_at', 'updated_at', 'tasks_count'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        # Ranks change through the reorder action
+        read_only_fields = ['id', 'order', 'created_at', 'updated_at']
     
     def get_tasks_count(self, obj):
-        return obj.tasks.count()
+        # Annotated by projects.board_state.columns
+        count = getattr(obj, 'task_count', None)
+        return obj.tasks.count() if count is None else count
 
 class ColumnDetailSerializer(ColumnSerializer):
     tasks = TaskSerializer(many=True, read_only=True, source='tasks.all')
@@ -372,9 +381,9 @@ class BoardSerializer(serializers.ModelSerializer):
         model = Board
         fields = [
             'id', 'workspace', 'title', 'description',
-            'created_at', 'updated_at', 'columns_count'
+            'created_at', 'updated_at', 'columns_count', 'version'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version']
     
     def get_columns_count(self, obj):
         return obj.columns.count()
@@ -400,7 +409,7 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             'board', 'workspace',  # Added for permission checks
             'created_at', 'updated_at'  # Include timestamps
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'order', 'created_at', 'updated_at']
     
     def create(self, validated_data):
         # Remove the board and workspace fields since they're not part of the Task model
@@ -420,7 +429,15 @@ class TaskCreateSerializer(serializers.ModelSerializer):
 
 class TaskMoveSerializer(serializers.Serializer):
     target_column = serializers.UUIDField()
-    order = serializers.IntegerField(required=False)
+    # 0-based position in the target column; or place the task next to a neighbour
+    order = serializers.IntegerField(required=False, min_value=0)
+    after = serializers.UUIDField(required=False)
+    before = serializers.UUIDField(required=False)
+
+    def validate(self, data):
+        if 'after' in data and 'before' in data:
+            raise serializers.ValidationError("Give either after or before, not both")
+        return data
     
     def validate_target_column(self, value):
         try:
@@ -579,7 +596,7 @@ class ProgressLogCreateSerializer(serializers.ModelSerializer):
                         **task_data
                     )
                 except Exception as e:
-                    print(f"Error creating task update: {str(e)}")
+                    logger.exception("Error creating task update")
                     # Continue with other task updates even if one fails
             
             return progress_log
@@ -624,7 +641,7 @@ class ProgressLogCreateSerializer(serializers.ModelSerializer):
                         **task_data
                     )
                 except Exception as e:
-                    print(f"Error creating task update during update: {str(e)}")
+                    logger.exception("Error creating task update during update")
                     # Continue with other task updates even if one fails
         
         return instance
@@ -772,7 +789,7 @@ class FundingSerializer(serializers.ModelSerializer):
             'id', 'project', 'project_title', 'project_creator',
             'title', 'description', 'amount', 'collected_amount',
             'qr_code', 'qr_code_url', 'created_at', 'status',
-            'progress_percentage', 'note'
+            'progress_percentage', 'note', 'deadline'
         ]
         read_only_fields = ['collected_amount', 'status', 'progress_percentage']
     
@@ -804,9 +821,12 @@ class FundingSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 class FundingContributionSerializer(serializers.ModelSerializer):
+    # Chosen by the client per contribution; a retry with the same key is credited once
+    idempotency_key = serializers.CharField(required=False, max_length=64, write_only=True)
+    
     class Meta:
         model = Funding
-        fields = ['id', 'amount', 'note']
+        fields = ['id', 'amount', 'note', 'idempotency_key']
         read_only_fields = ['id']
 
     def validate_amount(self, value):
@@ -830,7 +850,7 @@ class FundingCreateSerializer(serializers.ModelSerializer):
         model = Funding
         fields = [
             'id', 'project', 'title', 'description', 'amount',
-            'qr_code', 'note'
+            'qr_code', 'note', 'deadline'
         ]
         read_only_fields = ['id']
 
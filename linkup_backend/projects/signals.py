@@ -0,0 +1,43 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import board_state
+from .models import Column, Task, TaskAssignment, TaskComment
+
+
+def _cascaded(instance, origin):
+    """Whether a deletion came from deleting a parent, whose own removal covers it"""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and origin_model is not type(instance)
+
+
+@receiver(post_save, sender=Column)
+@receiver(post_save, sender=Task)
+def stamp_board_item(sender, instance, **kwargs):
+    board_state.changed(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=TaskAssignment)
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskAssignment)
+@receiver(post_delete, sender=TaskComment)
+def stamp_task(sender, instance, origin=None, **kwargs):
+    if _cascaded(instance, origin):
+        return
+    board_state.changed(Task.objects.filter(pk=instance.task_id))
+
+
+@receiver(post_delete, sender=Column)
+def record_column_removal(sender, instance, origin=None, **kwargs):
+    if not _cascaded(instance, origin):
+        board_state.removed(instance.board_id, 'column', instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def record_task_removal(sender, instance, origin=None, **kwargs):
+    if _cascaded(instance, origin):
+        return
+    board_id = Column.objects.filter(pk=instance.column_id).values_list('board_id', flat=True).first()
+    if board_id is not None:
+        board_state.removed(board_id, 'task', instance.pk)
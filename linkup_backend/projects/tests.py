@@ -0,0 +1,328 @@
+import math
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from linkup_backend.caching import model_versions
+from . import ranking
+from .models import Board, Column, Project, ProjectMember, Task, TaskAssignment, TaskComment, Workspace
+
+User = get_user_model()
+
+
+class BoardTestCase(TestCase):
+    """A project owner's board with two columns of tasks"""
+    tasks_per_column = 6
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner', password='pass')
+        project = Project.objects.create(
+            title='Campus app',
+            short_description='An app for the campus',
+            detailed_description='An app for the campus',
+            project_type='Startup',
+            creator=self.owner,
+        )
+        workspace = Workspace.objects.create(project=project, title='Campus app')
+        self.board = Board.objects.create(workspace=workspace, title='Campus app board')
+        self.todo, self.done = [
+            Column.objects.create(board=self.board, title=title, order=ranking.last_rank(Column, self.board.pk))
+            for title in ('To Do', 'Done')
+        ]
+        self.tasks = [self.add_task(self.todo, f'Task {i}') for i in range(self.tasks_per_column)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def add_task(self, column, title):
+        return Task.objects.create(
+            column=column, title=title, created_by=self.owner, order=ranking.last_rank(Task, column.pk)
+        )
+
+    def column_tasks(self, column):
+        return list(Task.objects.filter(column=column).order_by('order').values_list('pk', flat=True))
+
+    def move(self, task, column, **placement):
+        return self.client.patch(
+            f'/api/projects/tasks/{task.pk}/move/',
+            {'target_column': str(column.pk), **{k: str(v) for k, v in placement.items()}},
+            format='json',
+        )
+
+
+class RankingTests(BoardTestCase):
+    def test_move_to_a_position_keeps_the_order(self):
+        first, second, third = self.tasks[:3]
+
+        response = self.move(third, self.todo, order=0)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column_tasks(self.todo)[:3], [third.pk, first.pk, second.pk])
+
+    def test_move_writes_only_the_moved_task(self):
+        ranks = dict(Task.objects.values_list('pk', 'order'))
+        moved = self.tasks[-1]
+
+        # Lookup and permission (2), target column (1), then lock, neighbours, write, board
+        # version bump, task stamp and its readback (6) inside a savepoint (2)
+        with self.assertNumQueries(11):
+            response = self.move(moved, self.todo, order=1)
+
+        after = dict(Task.objects.values_list('pk', 'order'))
+        self.assertEqual([pk for pk in ranks if ranks[pk] != after[pk]], [moved.pk])
+        self.assertEqual(response.data, {
+            'id': moved.pk, 'column': self.todo.pk, 'order': after[moved.pk],
+            'version': Task.objects.values_list('version', flat=True).get(pk=moved.pk),
+        })
+
+    def test_move_next_to_a_neighbour(self):
+        self.move(self.tasks[0], self.todo, after=self.tasks[3].pk)
+        self.move(self.tasks[5], self.todo, before=self.tasks[1].pk)
+
+        expected = [self.tasks[i].pk for i in (5, 1, 2, 3, 0, 4)]
+        self.assertEqual(self.column_tasks(self.todo), expected)
+
+    def test_neighbour_from_another_column_is_rejected(self):
+        other = self.add_task(self.done, 'Elsewhere')
+
+        response = self.move(self.tasks[0], self.todo, after=other.pk)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_to_another_column(self):
+        self.add_task(self.done, 'Shipped')
+
+        self.move(self.tasks[2], self.done, order=0)
+        self.move(self.tasks[4], self.done)
+
+        self.assertEqual(self.column_tasks(self.done)[0], self.tasks[2].pk)
+        self.assertEqual(self.column_tasks(self.done)[-1], self.tasks[4].pk)
+        self.assertEqual(len(self.column_tasks(self.todo)), self.tasks_per_column - 2)
+
+    def test_random_moves_match_a_list(self):
+        rng = random.Random(49)
+        expected = {self.todo.pk: [task.pk for task in self.tasks], self.done.pk: []}
+        tasks = {task.pk: task for task in self.tasks}
+
+        for _ in range(60):
+            pk = rng.choice(list(tasks))
+            source = next(column for column, items in expected.items() if pk in items)
+            target = rng.choice([self.todo, self.done])
+            expected[source].remove(pk)
+            position = rng.randint(0, len(expected[target.pk]))
+            expected[target.pk].insert(position, pk)
+
+            self.assertEqual(self.move(tasks[pk], target, order=position).status_code, 200)
+
+        self.assertEqual(self.column_tasks(self.todo), expected[self.todo.pk])
+        self.assertEqual(self.column_tasks(self.done), expected[self.done.pk])
+
+    def test_rebalance_keeps_the_order_and_respreads_ranks(self):
+        for index, task in enumerate(self.tasks):
+            Task.objects.filter(pk=task.pk).update(order=1 + index * 1e-9)
+        before = self.column_tasks(self.todo)
+
+        ranking.rebalance(Task, self.todo.pk)
+
+        self.assertEqual(self.column_tasks(self.todo), before)
+        step = settings.KANBAN_RANK_STEP
+        self.assertEqual(
+            list(Task.objects.filter(column=self.todo).order_by('order').values_list('order', flat=True)),
+            [index * step for index in range(1, self.tasks_per_column + 1)]
+        )
+
+    def test_move_into_an_exhausted_gap_rebalances_first(self):
+        first, second, third = self.tasks[:3]
+        Task.objects.filter(pk=first.pk).update(order=1.0)
+        Task.objects.filter(pk=second.pk).update(order=math.nextafter(1.0, 2.0))
+
+        self.move(self.tasks[-1], self.todo, order=1)
+
+        self.assertEqual(self.column_tasks(self.todo)[:4], [first.pk, self.tasks[-1].pk, second.pk, third.pk])
+
+    def test_crowded_gap_schedules_a_rebalance(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(order=1.0)
+        Task.objects.filter(pk=self.tasks[1].pk).update(order=1.0 + settings.KANBAN_RANK_MIN_GAP / 2)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.move(self.tasks[-1], self.todo, order=1)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.column_tasks(self.todo)[:2], [self.tasks[0].pk, self.tasks[-1].pk])
+
+    def test_column_reorder(self):
+        response = self.client.patch(f'/api/projects/columns/{self.done.pk}/reorder/', {'order': 0}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Column.objects.filter(board=self.board).order_by('order').values_list('pk', flat=True)),
+            [self.done.pk, self.todo.pk]
+        )
+
+
+class BoardSnapshotTests(BoardTestCase):
+    def snapshot(self, **headers):
+        since = headers.pop('since', None)
+        return self.client.get(
+            f'/api/projects/boards/{self.board.pk}/snapshot/',
+            {} if since is None else {'since': since},
+            **headers
+        )
+
+    def version(self):
+        return Board.objects.values_list('version', flat=True).get(pk=self.board.pk)
+
+    def test_full_snapshot(self):
+        response = self.snapshot()
+
+        self.assertEqual(response.status_code, 200)
+        users_version = model_versions([User])[0][0]
+        self.assertEqual(response['ETag'], f'"{self.board.pk}:{self.version()}:{users_version}"')
+        self.assertIsNone(response.data['since'])
+        self.assertEqual([c['id'] for c in response.data['columns']], [str(self.todo.pk), str(self.done.pk)])
+        self.assertEqual([t['id'] for t in response.data['tasks']], [str(t.pk) for t in self.tasks])
+        self.assertNotIn('removed', response.data)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.snapshot()['ETag']
+
+        response = self.snapshot(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_changes_invalidate_the_etag(self):
+        etag = self.snapshot()['ETag']
+        changes = [
+            lambda: self.move(self.tasks[0], self.done),
+            lambda: TaskComment.objects.create(task=self.tasks[1], author=self.owner, content='Looks good'),
+            lambda: TaskAssignment.objects.create(task=self.tasks[2], assignee=self.owner, assigned_by=self.owner),
+            lambda: self.tasks[3].delete(),
+        ]
+
+        for change in changes:
+            change()
+            response = self.snapshot(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_profile_changes_invalidate_the_etag(self):
+        TaskAssignment.objects.create(task=self.tasks[0], assignee=self.owner, assigned_by=self.owner)
+        since = self.version()
+        etag = self.snapshot()['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.first_name = 'Grace'
+            self.owner.save()
+        response = self.snapshot(since=since, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.version(), since)
+        # The delta would miss the new name, so the whole board is sent
+        self.assertIsNone(response.data['since'])
+        self.assertEqual(len(response.data['tasks']), self.tasks_per_column)
+        self.assertEqual(response.data['tasks'][0]['assignments'][0]['assignee']['full_name'], 'Grace')
+        self.assertEqual(self.snapshot(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_since_sends_only_what_changed(self):
+        since = self.version()
+        self.move(self.tasks[0], self.done)
+        TaskComment.objects.create(task=self.tasks[1], author=self.owner, content='Looks good')
+        gone = self.tasks[2].pk
+        self.tasks[2].delete()
+
+        response = self.snapshot(since=since)
+
+        self.assertEqual(response.data['since'], since)
+        self.assertEqual(response.data['columns'], [])
+        self.assertEqual(
+            {t['id'] for t in response.data['tasks']}, {str(self.tasks[0].pk), str(self.tasks[1].pk)}
+        )
+        self.assertEqual(response.data['removed'], {'columns': [], 'tasks': [gone]})
+
+    def test_deleting_a_column_reports_only_the_column(self):
+        since = self.version()
+        gone = self.todo.pk
+        self.todo.delete()
+
+        response = self.snapshot(since=since)
+
+        self.assertEqual(response.data['removed'], {'columns': [gone], 'tasks': []})
+
+    def test_invalid_since_is_rejected(self):
+        self.assertEqual(self.snapshot(since='yesterday').status_code, 400)
+
+    def test_since_ahead_of_the_board_sends_everything(self):
+        response = self.snapshot(since=self.version() + 10)
+
+        self.assertIsNone(response.data['since'])
+        self.assertEqual(len(response.data['tasks']), self.tasks_per_column)
+
+    def test_query_count_does_not_grow_with_the_board(self):
+        # The first request stamps the user version
+        self.snapshot()
+        with CaptureQueriesContext(connection) as small:
+            self.snapshot()
+
+        for i in range(20):
+            task = self.add_task(self.done, f'Extra {i}')
+            TaskComment.objects.create(task=task, author=self.owner, content='Noted')
+            TaskAssignment.objects.create(task=task, assignee=self.owner, assigned_by=self.owner)
+
+        with self.assertNumQueries(len(small)):
+            response = self.snapshot()
+        self.assertEqual(len(response.data['tasks']), self.tasks_per_column + 20)
+
+
+class ProjectListTests(TestCase):
+    url = '/api/projects/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', username='member', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_projects(self, count):
+        for _ in range(count):
+            index = Project.objects.count()
+            creator = User.objects.create_user(
+                email=f'creator{index}@example.com', username=f'creator{index}', password='pass'
+            )
+            project = Project.objects.create(
+                title=f'Project {index}',
+                short_description='A project',
+                detailed_description='A project',
+                project_type='Startup',
+                creator=creator,
+            )
+            Workspace.objects.create(project=project, title=project.title)
+            ProjectMember.objects.create(project=project, user=creator, role='admin')
+            ProjectMember.objects.create(project=project, user=self.user)
+
+    def test_pages_follow_the_cursor(self):
+        self.add_projects(5)
+
+        first = self.client.get(self.url, {'page_size': 3}).data
+        second = self.client.get(first['next']).data
+
+        titles = [p['title'] for p in first['results'] + second['results']]
+        self.assertEqual(titles, [f'Project {i}' for i in range(4, -1, -1)])
+        self.assertIsNone(second['next'])
+        self.assertEqual({p['member_count'] for p in first['results']}, {2})
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.add_projects(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        self.add_projects(18)
+
+        with self.assertNumQueries(len(small)):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results']), 20)